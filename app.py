@@ -1,9 +1,18 @@
-from flask import Flask, render_template_string, request, jsonify
-from db_utils import get_all_news as get_articles
+from flask import Flask, render_template_string, request, jsonify, g, Response
+from db_utils import aggregate_news as get_articles_aggregate, get_collection_names_in_range, count_news_by_collection
 from datetime import datetime
+# calculate_* / analyze_media_trustworthiness는 rollup_utils로 옮겨졌지만 기존 import 경로(app)도 유지
+from rollup_utils import (  # noqa: F401
+    read_rollup, summarize_rollup, daily_trend, collection_day,
+    calculate_engagement_score, calculate_controversial_ratio, analyze_media_trustworthiness,
+    ENGAGEMENT_LIKE_WEIGHT, ENGAGEMENT_COMMENT_WEIGHT, HIGH_RISK_THRESHOLD, HIGH_ENGAGEMENT_THRESHOLD,
+    CONTROVERSIAL_THRESHOLD, UNKNOWN_MEDIA, RISK_BUCKETS
+)
 import logging
+import os
 from collections import Counter
-import json
+import time
+from metrics import observe, increment, render_prometheus
 
 
 
@@ -11,6 +20,14 @@ logging.getLogger("transformers.tokenization_utils_base").setLevel(logging.ERROR
 
 app = Flask(__name__)
 
+# /predict 요청당 최대 대기 시간 (초)
+PREDICT_TIMEOUT = 60
+
+# 기사 목록·통계 계산 위치
+# store: 프로세스 메모리의 열 저장소(article_store)에서 계산 (기본)
+# mongo: 요청마다 MongoDB 집계·롤업 조회 (여러 워커 프로세스가 각자 기사 전체를 들고 있기 부담스러울 때)
+DASHBOARD_SOURCE = os.environ.get("CTN_DASHBOARD_SOURCE", "store")
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="ko">
@@ -173,6 +190,10 @@ HTML_TEMPLATE = """
           <option value="engagement" {% if sort_order == 'engagement' %}selected{% endif %}>참여도순</option>
           <option value="latest" {% if sort_order == 'latest' %}selected{% endif %}>최신순</option>
         </select>
+        <label for="start" class="ml-4 mr-2 text-sm text-gray-700 font-medium">기간:</label>
+        <input type="date" name="start" id="start" value="{{ start or '' }}" class="text-sm px-2 py-2 rounded-md border border-gray-300 shadow-sm" />
+        <span class="mx-1 text-gray-500">~</span>
+        <input type="date" name="end" id="end" value="{{ end or '' }}" class="text-sm px-2 py-2 rounded-md border border-gray-300 shadow-sm" />
       </form>
     </div>
     </div>
@@ -231,6 +252,13 @@ HTML_TEMPLATE = """
           </div>
           {% endif %}
           
+          <!--유사 기사 묶음 -->
+          {% if article.duplicate_count > 1 %}
+          <div class="mb-3 px-2 py-1 bg-gray-100 text-gray-600 text-xs rounded-lg text-center">
+            📑 유사 기사 {{ article.duplicate_count }}건
+          </div>
+          {% endif %}
+          
           <a href="{{ article.url }}" target="_blank" class="inline-flex items-center justify-center w-full px-4 py-2 bg-gray-100 hover:bg-gray-200 text-gray-700 font-medium rounded-lg transition duration-200">
             <span>기사 보기</span>
             <svg class="w-4 h-4 ml-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
@@ -395,12 +423,13 @@ document.addEventListener('DOMContentLoaded', function() {
   let offset = {{ articles|length }};
   const limit = 30;
   const sortOrder = "{{ sort_order }}";
+  const dateRange = "{{ '&start=' ~ start if start }}{{ '&end=' ~ end if end }}";
 
   loadMoreBtn.addEventListener('click', () => {
     loadMoreBtn.disabled = true;
     loadMoreBtn.textContent = '로딩 중...';
 
-    fetch(`/load_more?offset=${offset}&limit=${limit}&sort=${sortOrder}`)
+    fetch(`/load_more?offset=${offset}&limit=${limit}&sort=${sortOrder}${dateRange}`)
       .then(response => response.json())
       .then(data => {
         if(data.articles.length === 0) {
@@ -430,6 +459,9 @@ document.addEventListener('DOMContentLoaded', function() {
           if(article.controversial_ratio >= 2.0) {
             controversialBadge = `<div class="mb-3 px-2 py-1 bg-red-100 text-red-700 text-xs rounded-lg text-center">🔥 화제성 기사 (댓글/공감 비율: ${article.controversial_ratio.toFixed(1)})</div>`;
           }
+          if(article.duplicate_count > 1) {
+            controversialBadge += `<div class="mb-3 px-2 py-1 bg-gray-100 text-gray-600 text-xs rounded-lg text-center">📑 유사 기사 ${article.duplicate_count}건</div>`;
+          }
           
           div.innerHTML = `
             <div class="${riskClass} p-4 text-white relative">
@@ -488,6 +520,12 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('sortForm').submit();
   });
 
+  ['start', 'end'].forEach(id => {
+    document.getElementById(id).addEventListener('change', () => {
+      document.getElementById('sortForm').submit();
+    });
+  });
+
     
 </script>
 </body>
@@ -495,150 +533,212 @@ document.addEventListener('DOMContentLoaded', function() {
 """
 
 
-def calculate_engagement_score(like_count, comment_count):
-    """
-    참여도 점수 계산
-    공감수와 댓글수를 가중평균하여 참여도 산출
-    """
-    # 댓글이 공감보다 더 높은 참여를 의미하므로 가중치 부여
-    return (like_count * 0.3) + (comment_count * 0.7)
-
-def calculate_controversial_ratio(like_count, comment_count):
-    """
-    화제성 지표 계산
-    댓글 대 공감 비율이 높을수록 화제성이 높음
-    """
-    if like_count == 0:
-        return comment_count if comment_count > 0 else 0
-    return comment_count / like_count
-
-def analyze_media_trustworthiness(articles):
+# ✅ MongoDB 집계 단계 (rollup_utils의 calculate_* 함수와 같은 식)
+# 일별 컬렉션마다 필요한 필드만 남기고 기본값을 채움
+ARTICLE_FIELDS = [{"$project": {
+    "title": 1, "URL": 1, "date": 1, "duplicate_cluster": 1,
+    "media": {"$ifNull": ["$media", UNKNOWN_MEDIA]},
+    "mismatch_prob": {"$ifNull": ["$mismatch_probability", 0]},
+    "like_count": {"$ifNull": ["$like_count", 0]},
+    "comment_count": {"$ifNull": ["$comment_count", 0]}
+}}]
+
+DERIVED_FIELDS = {"$addFields": {
+    "engagement_score": {"$add": [
+        {"$multiply": ["$like_count", ENGAGEMENT_LIKE_WEIGHT]},
+        {"$multiply": ["$comment_count", ENGAGEMENT_COMMENT_WEIGHT]}
+    ]},
+    "controversial_ratio": {"$cond": [
+        {"$eq": ["$like_count", 0]},
+        {"$max": ["$comment_count", 0]},
+        {"$divide": ["$comment_count", "$like_count"]}
+    ]}
+}}
+
+
+def _count_if(condition):
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+def _risk_bucket_counts():
+    # 채점된 기사는 RISK_BUCKETS 구간별로, 확률이 없는 기사는 unscored로 셈
+    counts = {}
+    uppers = [lower for lower, _ in RISK_BUCKETS[1:]] + [None]
+    for (lower, name), upper in zip(RISK_BUCKETS, uppers):
+        condition = [{"$eq": ["$scored", True]}, {"$gte": ["$mismatch_prob", lower]}]
+        if upper is not None:
+            condition.append({"$lt": ["$mismatch_prob", upper]})
+        counts[f"risk_{name}"] = _count_if({"$and": condition})
+    counts["risk_unscored"] = _count_if({"$ne": ["$scored", True]})
+    return counts
+
+
+def get_live_rollup_rows(day):
+    """날짜 하나를 기사 컬렉션에서 직접 집계해 롤업 문서와 같은 형식의 (언론사별) 행으로 반환합니다."""
+    head = [{"$project": dict(ARTICLE_FIELDS[0]["$project"], scored={"$gt": ["$mismatch_probability", None]})}]
+    rows = get_articles_aggregate(head, [
+        DERIVED_FIELDS,
+        {"$group": {
+            "_id": "$media",
+            "count": {"$sum": 1},
+            "prob_sum": {"$sum": "$mismatch_prob"},
+            "high_risk_count": _count_if({"$gte": ["$mismatch_prob", HIGH_RISK_THRESHOLD]}),
+            "likes_sum": {"$sum": "$like_count"},
+            "comments_sum": {"$sum": "$comment_count"},
+            "engagement_sum": {"$sum": "$engagement_score"},
+            "high_engagement_count": _count_if({"$gte": ["$engagement_score", HIGH_ENGAGEMENT_THRESHOLD]}),
+            "controversial_count": _count_if({"$gte": ["$controversial_ratio", CONTROVERSIAL_THRESHOLD]}),
+            **_risk_bucket_counts()
+        }}
+    ], start=day, end=day, name="rollup_gap")
+    for row in rows:
+        row["media"] = row.pop("_id")
+        row["day"] = day
+        row["risk_buckets"] = {name: row.pop(f"risk_{name}") for _, name in RISK_BUCKETS + [(None, "unscored")]}
+    return rows
+
+
+def get_rollup_rows(start=None, end=None):
     """
-    언론사별 신뢰도 분석
-    - 고위험 기사(불일치율 ≥ 0.7) 개수 기준 정렬
-    - 고위험 기사 비율, 총 기사 수 포함
+    (일, 언론사) 롤업을 읽고, 날짜별 롤업 기사 수가 일별 컬렉션의 문서 수와 다르면 그 날짜는 기사 컬렉션을 직접 집계한 행으로 바꿉니다.
+    롤업 도입 이전 날짜, 재구축 전 날짜, 롤업 행은 있지만 기사 수가 0인 날짜(도입 이전 기사를 재채점한 경우) 등이 해당합니다.
     """
-    media_data = {}
-
-    for article in articles:
-        media = article.get("media", "알 수 없음")
-        mismatch_prob = article.get("mismatch_probability", 0)
+    rows = read_rollup(start, end)
+    rolled = Counter()
+    for row in rows:
+        rolled[row["day"]] += row.get("count", 0)
+    counts = count_news_by_collection(get_collection_names_in_range(start, end))
+    stale = sorted({day for day, count in ((collection_day(name), count) for name, count in counts.items())
+                    if day and rolled[day] != count})
+    if stale:
+        logging.getLogger(__name__).warning(
+            f"롤업 기사 수가 맞지 않는 날짜 {len(stale)}일은 직접 집계합니다. (python rollup_utils.py rebuild로 채울 수 있음)"
+        )
+        rows = [row for row in rows if row["day"] not in stale]
+        for day in stale:
+            rows.extend(get_live_rollup_rows(day))
+    return rows
+
+
+def _parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d") if value else None
+    except ValueError:
+        return None
 
-        if media not in media_data:
-            media_data[media] = {
-                "media": media,
-                "total_articles": 0,
-                "high_risk_articles": 0
-            }
 
-        media_data[media]["total_articles"] += 1
-        if mismatch_prob >= 0.7:
-            media_data[media]["high_risk_articles"] += 1
+def _article_store():
+    from article_store import get_store
 
-    media_stats = []
-    for media, data in media_data.items():
-        if data["total_articles"] >= 3:  # 최소 3개 기사
-            high_risk_ratio = data["high_risk_articles"] / data["total_articles"]
-            media_stats.append({
-                "media": media,
-                "total_articles": data["total_articles"],
-                "high_risk_articles": data["high_risk_articles"],
-                "high_risk_ratio": high_risk_ratio
-            })
+    return get_store()
 
-    # 각 언론사별 (고위험 기사 순 / 전체 기사) 기준으로 정렬 (비율 높은 순)
-    media_stats.sort(key=lambda x: x["high_risk_ratio"], reverse=True)
-    return media_stats
 
+def get_dashboard_stats(start=None, end=None):
+    """
+    store 모드면 메모리 저장소에서 계산합니다.
+    mongo 모드면 (일, 언론사) 롤업에서 통계를 합치고, 롤업이 맞지 않는 날짜는 기사 컬렉션을 직접 집계해 더합니다.
+    """
+    if DASHBOARD_SOURCE == "store":
+        return _article_store().stats(start, end)
+    return summarize_rollup(get_rollup_rows(start, end))
+
+
+def get_date_range():
+    """요청의 start/end(YYYY-MM-DD)를 반환합니다. 비어 있거나 형식이 틀리면 None"""
+    return _parse_day(request.args.get("start")), _parse_day(request.args.get("end"))
+
+
+# 정렬 기준 (동점이면 _id 순으로 고정해 페이지가 겹치지 않도록 함)
+SORT_ORDERS = {
+    "safe": {"mismatch_prob": 1, "_id": 1},
+    "engagement": {"engagement_score": -1, "_id": -1},
+    "latest": {"date": -1, "_id": -1},
+    "risk": {"mismatch_prob": -1, "_id": -1},
+}
+
+
+def get_sorted_articles(sort_order, offset=0, limit=40, start=None, end=None):
+    """요청한 페이지의 기사만 가져옵니다. store 모드는 메모리 저장소의 정렬 결과를, mongo 모드는 MongoDB 집계를 씁니다."""
+    if DASHBOARD_SOURCE == "store":
+        return _article_store().page(sort_order, offset, limit, start, end)
+    sort = SORT_ORDERS.get(sort_order, SORT_ORDERS["risk"])
+    page = get_articles_aggregate(ARTICLE_FIELDS, [
+        DERIVED_FIELDS,
+        {"$sort": sort},
+        {"$skip": offset},
+        {"$limit": limit}
+    ], start=start, end=end, name="article_page")
+
+    # 이 페이지에 나온 근사 중복 클러스터만 기사 수 집계
+    clusters = list({a["duplicate_cluster"] for a in page if a.get("duplicate_cluster")})
+    cluster_sizes = Counter()
+    if clusters:
+        for row in get_articles_aggregate(
+            [{"$match": {"duplicate_cluster": {"$in": clusters}}}, {"$project": {"_id": 0, "duplicate_cluster": 1}}],
+            [{"$group": {"_id": "$duplicate_cluster", "count": {"$sum": 1}}}],
+            start=start, end=end, name="cluster_sizes"
+        ):
+            cluster_sizes[str(row["_id"])] = row["count"]
 
-def get_sorted_articles(sort_order):
-    articles = get_articles()
     results = []
-    
-    for article in articles:
-        title = article.get("title", "")
-        url = article.get("URL", "#")
-        date = article.get("date", "")
-        mismatch_prob = article.get("mismatch_probability", 0)
-        media = article.get("media", "알 수 없음")
-        like_count = article.get("like_count", 0)
-        comment_count = article.get("comment_count", 0)
-        
-        # 새로운 지표 계산
-        engagement_score = calculate_engagement_score(like_count, comment_count)
-        controversial_ratio = calculate_controversial_ratio(like_count, comment_count)
-
+    for article in page:
+        cluster = str(article["duplicate_cluster"]) if article.get("duplicate_cluster") else None
         results.append({
-            "title": title,
-            "url": url,
-            "mismatch_prob": mismatch_prob,
-            "date": date,
-            "media": media,
-            "like_count": like_count,
-            "comment_count": comment_count,
-            "engagement_score": engagement_score,
-            "controversial_ratio": controversial_ratio
+            "title": article.get("title", ""),
+            "url": article.get("URL", "#"),
+            "mismatch_prob": article["mismatch_prob"],
+            "date": article.get("date", ""),
+            "media": article["media"],
+            "like_count": article["like_count"],
+            "comment_count": article["comment_count"],
+            "engagement_score": article["engagement_score"],
+            "controversial_ratio": article["controversial_ratio"],
+            "duplicate_cluster": cluster,
+            "duplicate_count": cluster_sizes[cluster] if cluster else 1
         })
-
-    # 정렬
-    if sort_order == "safe":
-        results.sort(key=lambda x: x["mismatch_prob"])
-    elif sort_order == "engagement":
-        results.sort(key=lambda x: x["engagement_score"], reverse=True)
-    elif sort_order == "latest":
-        def parse_date(a):
-            try:
-                return datetime.strptime(a["date"], "%Y-%m-%d %H:%M:%S")
-            except:
-                return datetime.min
-        results.sort(key=parse_date, reverse=True)
-    else:  # risk
-        results.sort(key=lambda x: x["mismatch_prob"], reverse=True)
-    
     return results
 
 
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    # 라벨 수가 늘지 않도록 실제 경로 대신 라우트 규칙 사용
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = {"method": request.method, "endpoint": endpoint, "status": response.status_code}
+    if "request_start" in g:
+        observe("http_request_seconds", time.perf_counter() - g.request_start, **labels)
+    increment("http_request_total", 1, **labels)
+    return response
+
+
 @app.route("/")
 def index():
     sort_order = request.args.get("sort", "risk")
-    all_articles = get_sorted_articles(sort_order)
-    total_articles = len(all_articles)
-
-    # 처음 40개만 렌더링
-    articles = all_articles[:40]
+    start, end = get_date_range()
 
-    # 기존 통계
-    high_mismatch_count = sum(1 for a in all_articles if a["mismatch_prob"] >= 0.7)
-    avg_mismatch = sum(a["mismatch_prob"] for a in all_articles) / total_articles if total_articles else 0
-
-    # 새로운 통계 계산
-    total_likes = sum(a["like_count"] for a in all_articles)
-    total_comments = sum(a["comment_count"] for a in all_articles)
-    avg_engagement = sum(a["engagement_score"] for a in all_articles) / total_articles if total_articles else 0
-    
-    # 고참여 기사 (참여도 20 이상)
-    high_engagement_count = sum(1 for a in all_articles if a["engagement_score"] >= 20)
-    
-    # 화제성 기사 (댓글/공감 비율 2.0 이상)
-    controversial_count = sum(1 for a in all_articles if a["controversial_ratio"] >= 2.0)
-    
-    # 언론사별 분석
-    raw_articles = get_articles()  # 원본 데이터로 언론사 분석
-    media_stats = analyze_media_trustworthiness(raw_articles)
+    # 처음 40개만 렌더링, 통계는 서버 집계 결과만 가져옴
+    articles = get_sorted_articles(sort_order, 0, 40, start, end)
+    stats = get_dashboard_stats(start, end)
 
     return render_template_string(
         HTML_TEMPLATE,
         articles=articles,
-        total_articles=total_articles,
-        high_mismatch_count=high_mismatch_count,
-        avg_mismatch=avg_mismatch * 100,  # 백분율로 표시
-        avg_engagement=avg_engagement,
-        total_likes=total_likes,
-        total_comments=total_comments,
-        high_engagement_count=high_engagement_count,
-        controversial_count=controversial_count,
-        media_stats=media_stats,
-        sort_order=sort_order
+        total_articles=stats["total_articles"],
+        high_mismatch_count=stats["high_mismatch_count"],
+        avg_mismatch=stats["avg_mismatch"] * 100,  # 백분율로 표시
+        avg_engagement=stats["avg_engagement"],
+        total_likes=stats["total_likes"],
+        total_comments=stats["total_comments"],
+        high_engagement_count=stats["high_engagement_count"],
+        controversial_count=stats["controversial_count"],
+        media_stats=stats["media_stats"],
+        sort_order=sort_order,
+        start=start,
+        end=end
     )
 
 
@@ -648,14 +748,56 @@ def load_more():
         offset = int(request.args.get("offset", 0))
         limit = int(request.args.get("limit", 40))
         sort_order = request.args.get("sort", "risk")
+        start, end = get_date_range()
+        slice_articles = get_sorted_articles(sort_order, offset, limit, start, end)
     except ValueError:
         return jsonify({"articles": []})
 
-    all_articles = get_sorted_articles(sort_order)
-    slice_articles = all_articles[offset:offset + limit]
-
     return jsonify({"articles": slice_articles})
 
 
+@app.route("/trend")
+def trend():
+    # 날짜별 기사 수·고위험 수·평균 불일치율·위험 분포 (롤업이 맞지 않는 날짜는 직접 집계)
+    start, end = get_date_range()
+    return jsonify({"trend": daily_trend(get_rollup_rows(start, end))})
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    data = request.get_json(silent=True) or {}
+    title = (data.get("title") or "").strip()
+    body = (data.get("body") or "").strip()
+    if not title or not body:
+        return jsonify({"error": "title과 body가 필요합니다."}), 400
+
+    # 모델은 첫 예측 요청 때 로딩 (대시보드 시작 속도 유지)
+    from serving import get_batcher
+
+    start = time.perf_counter()
+    try:
+        prob = get_batcher().predict(title, body, timeout=PREDICT_TIMEOUT)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"예측 실패: {e}")
+        return jsonify({"error": "예측에 실패했습니다."}), 500
+
+    return jsonify({
+        "mismatch_probability": prob,
+        "latency_ms": (time.perf_counter() - start) * 1000
+    })
+
+
+@app.route("/predict/stats")
+def predict_stats():
+    from serving import get_batcher_stats
+
+    return jsonify(get_batcher_stats())
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
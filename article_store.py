@@ -0,0 +1,346 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from db_utils import get_collection_names_in_range, iter_news_by_collection, DateLike
+from metrics import timer, describe
+from rollup_utils import (
+    ENGAGEMENT_LIKE_WEIGHT, ENGAGEMENT_COMMENT_WEIGHT, HIGH_RISK_THRESHOLD, HIGH_ENGAGEMENT_THRESHOLD,
+    CONTROVERSIAL_THRESHOLD, MEDIA_MIN_ARTICLES, UNKNOWN_MEDIA, RISK_BUCKETS, collection_day
+)
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 저장소 설정
+# REFRESH_SECONDS: 요청이 들어와도 이 간격 안에서는 MongoDB를 다시 조회하지 않음
+# REFRESH_OVERLAP: 시계 차이·늦게 끝난 쓰기를 놓치지 않도록 이전 조회 시각보다 이만큼 앞부터 다시 조회
+# FULL_REFRESH_SECONDS: 이 간격마다 전체를 다시 읽어 삭제된 기사(컬렉션)를 저장소에서 제거
+REFRESH_SECONDS = float(os.environ.get("CTN_STORE_REFRESH_SECONDS", "30"))
+FULL_REFRESH_SECONDS = float(os.environ.get("CTN_STORE_FULL_REFRESH_SECONDS", "3600"))
+REFRESH_OVERLAP = timedelta(seconds=10)
+INITIAL_CAPACITY = 1024
+# 정렬 결과 캐시에 남겨 둘 (정렬 기준, 날짜 범위) 조합 수 (가장 오래 쓰지 않은 것부터 제거)
+ORDER_CACHE_SIZE = 8
+
+describe("store_refresh_seconds", "대시보드 기사 저장소 갱신 시간 (full=true: 전체 적재)")
+describe("store_refresh_total", "대시보드 기사 저장소 갱신 횟수")
+
+_PROJECTION = {"title": 1, "URL": 1, "date": 1, "media": 1, "mismatch_probability": 1,
+               "like_count": 1, "comment_count": 1, "duplicate_cluster": 1}
+_NO_TIMESTAMP = 0  # 날짜가 없으면 최신순 맨 뒤
+
+# 정렬 기준: 키 이름, 내림차순 여부 (동점이면 적재 순서)
+SORT_KEYS = {
+    "safe": ("risk", False),
+    "engagement": ("engagement", True),
+    "latest": ("timestamp", True),
+    "risk": ("risk", True),
+}
+
+
+def _parse_timestamp(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    try:
+        return int(datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp())
+    except (TypeError, ValueError):
+        return _NO_TIMESTAMP
+
+
+def _day_number(day: Optional[str]) -> int:
+    # "2025-06-09" → 20250609
+    return int(day.replace("-", "")) if day else 0
+
+
+class ArticleStore:
+    """
+    대시보드용 기사 열(column) 저장소.
+    숫자 열(확률, 공감, 댓글, 시각, 언론사·클러스터 코드, 컬렉션 날짜)은 NumPy 배열에, 제목·URL·날짜 문자열은 별도 리스트에 둡니다.
+    참여도·화제성·위험 구간·언론사별 집계는 배열 연산으로 계산하고, 새 기사와 updated_at이 바뀐 기사만 주기적으로 반영합니다.
+    """
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {
+            "prob": np.empty(0, dtype=np.float32),
+            "likes": np.empty(0, dtype=np.int32),
+            "comments": np.empty(0, dtype=np.int32),
+            "timestamp": np.empty(0, dtype=np.int64),
+            "media": np.empty(0, dtype=np.int32),
+            "cluster": np.empty(0, dtype=np.int32),
+            "day": np.empty(0, dtype=np.int32),
+        }
+        self.titles: List[str] = []
+        self.urls: List[str] = []
+        self.dates: List[str] = []
+        self._rows: Dict[ObjectId, int] = {}
+        self.media_names: List[str] = []
+        self._media_codes: Dict[str, int] = {}
+        self.cluster_ids: List[str] = []
+        self._cluster_codes: Dict[str, int] = {}
+        self._synced_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._full_at = 0.0
+        self._orders: "OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ✅ 적재
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._columns["prob"])
+        if needed <= capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, capacity)
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    @staticmethod
+    def _code(value: str, codes: Dict[str, int], names: List[str]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _upsert(self, day: int, doc: Dict) -> None:
+        row = self._rows.get(doc["_id"])
+        if row is None:
+            row = self._size
+            self._grow(row + 1)
+            self._rows[doc["_id"]] = row
+            self._size += 1
+            self.titles.append("")
+            self.urls.append("")
+            self.dates.append("")
+
+        prob = doc.get("mismatch_probability")
+        cluster = doc.get("duplicate_cluster")
+        columns = self._columns
+        columns["prob"][row] = np.nan if prob is None else prob
+        columns["likes"][row] = doc.get("like_count") or 0
+        columns["comments"][row] = doc.get("comment_count") or 0
+        columns["timestamp"][row] = _parse_timestamp(doc.get("date"))
+        columns["media"][row] = self._code(doc.get("media") or UNKNOWN_MEDIA, self._media_codes, self.media_names)
+        columns["cluster"][row] = self._code(str(cluster), self._cluster_codes, self.cluster_ids) if cluster else -1
+        columns["day"][row] = day
+        self.titles[row] = doc.get("title", "")
+        self.urls[row] = doc.get("URL", "#")
+        self.dates[row] = doc.get("date", "")
+
+    def _evict(self, seen: set) -> int:
+        # 전체 조회에서 보이지 않은 행을 지우고 남은 행을 앞으로 모음 (적재 순서 유지)
+        keep = np.asarray(sorted(row for doc_id, row in self._rows.items() if doc_id in seen), dtype=np.int64)
+        removed = self._size - len(keep)
+        if not removed:
+            return 0
+        for name, column in self._columns.items():
+            column[:len(keep)] = column[keep]
+        self.titles = [self.titles[row] for row in keep]
+        self.urls = [self.urls[row] for row in keep]
+        self.dates = [self.dates[row] for row in keep]
+        new_rows = {int(old): new for new, old in enumerate(keep)}
+        self._rows = {doc_id: new_rows[row] for doc_id, row in self._rows.items() if row in new_rows}
+        self._size = len(keep)
+        return removed
+
+    def refresh(self, force: bool = False, full: bool = False) -> int:
+        """
+        마지막 조회 이후 새로 저장되었거나(_id) 확률·클러스터가 바뀐(updated_at) 기사만 가져와 반영합니다.
+        처음 호출할 때, full=True일 때, FULL_REFRESH_SECONDS가 지났을 때는 모든 일별 컬렉션을 읽고
+        그 사이 삭제된 기사를 제거합니다. 일별 컬렉션은 스레드 풀에서 동시에 조회합니다. 반영한 문서 수를 반환합니다.
+        """
+        if not force and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return 0
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return 0
+            started = datetime.now(timezone.utc)
+            full = full or self._synced_at is None or time.monotonic() - self._full_at >= FULL_REFRESH_SECONDS
+            query = {}
+            if not full:
+                since = self._synced_at - REFRESH_OVERLAP
+                query = {"$or": [{"_id": {"$gte": ObjectId.from_datetime(since)}}, {"updated_at": {"$gte": since}}]}
+
+            count = removed = 0
+            seen = set()
+            try:
+                with timer("store_refresh", full=str(full).lower()):
+                    for name, docs in iter_news_by_collection(get_collection_names_in_range(), query, _PROJECTION):
+                        day = _day_number(collection_day(name))
+                        for doc in docs:
+                            self._upsert(day, doc)
+                            seen.add(doc["_id"])
+                        count += len(docs)
+                    if full:
+                        removed = self._evict(seen)
+                        self._full_at = time.monotonic()
+                self._synced_at = started
+            except Exception as e:
+                # 조회 시각을 옮기지 않으므로 다음 갱신에서 같은 구간을 다시 읽음 (그동안은 기존 데이터로 응답)
+                logger.error(f"❌ 기사 저장소 갱신 실패: {e}")
+            finally:
+                self._checked_at = time.monotonic()
+            if count or removed:
+                self._orders.clear()
+                logger.info(f"🔄 기사 저장소 갱신: {count}개 반영, {removed}개 제거 (전체 {self._size}개)")
+            return count
+
+    # ✅ 벡터 연산
+    def _column(self, name: str) -> np.ndarray:
+        return self._columns[name][:self._size]
+
+    def _derived(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        def col(key):
+            values = self._column(key)
+            return values if rows is None else values[rows]
+
+        if name == "risk":
+            # 확률이 없는 기사는 0으로 취급 (기존 대시보드와 동일)
+            return np.nan_to_num(col("prob"), nan=0.0)
+        likes = col("likes").astype(np.float64)
+        comments = col("comments").astype(np.float64)
+        if name == "engagement":
+            return likes * ENGAGEMENT_LIKE_WEIGHT + comments * ENGAGEMENT_COMMENT_WEIGHT
+        if name == "controversial":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(likes == 0, np.maximum(comments, 0), comments / np.where(likes == 0, 1, likes))
+        return col(name)
+
+    def _mask(self, start: DateLike = None, end: DateLike = None) -> np.ndarray:
+        day = self._column("day")
+        mask = np.ones(self._size, dtype=bool)
+        if start:
+            mask &= day >= _day_number(str(start))
+        if end:
+            mask &= day <= _day_number(str(end))
+        return mask
+
+    def stats(self, start: DateLike = None, end: DateLike = None) -> Dict:
+        """대시보드 상단 통계, 언론사 신뢰도, 위험 구간 분포를 계산합니다. (rollup_utils.summarize_rollup과 같은 형식)"""
+        with self._lock:
+            rows = np.nonzero(self._mask(start, end))[0]
+            total = len(rows)
+            prob = self._column("prob")[rows]
+            risk = np.nan_to_num(prob, nan=0.0)
+            engagement = self._derived("engagement", rows)
+            controversial = self._derived("controversial", rows)
+            high_risk = risk >= HIGH_RISK_THRESHOLD
+
+            media = self._column("media")[rows]
+            media_totals = np.bincount(media, minlength=len(self.media_names))
+            media_high = np.bincount(media, weights=high_risk, minlength=len(self.media_names))
+            eligible = np.nonzero(media_totals >= MEDIA_MIN_ARTICLES)[0]
+            ratios = media_high[eligible] / media_totals[eligible]
+            media_stats = [
+                {"media": self.media_names[code], "total_articles": int(media_totals[code]),
+                 "high_risk_articles": int(media_high[code]), "high_risk_ratio": float(ratio)}
+                for code, ratio in zip(eligible, ratios)
+            ]
+            media_stats.sort(key=lambda x: (-x["high_risk_ratio"], x["media"]))
+
+            scored = ~np.isnan(prob)
+            bounds = np.asarray([lower for lower, _ in RISK_BUCKETS[1:]], dtype=prob.dtype)
+            bucket_counts = np.bincount(np.digitize(prob[scored], bounds), minlength=len(RISK_BUCKETS))
+            risk_buckets = {name: int(count) for (_, name), count in zip(RISK_BUCKETS, bucket_counts)}
+            risk_buckets["unscored"] = int(total - scored.sum())
+
+            return {
+                "total_articles": total,
+                "high_mismatch_count": int(high_risk.sum()),
+                "avg_mismatch": float(risk.mean(dtype=np.float64)) if total else 0,
+                "total_likes": int(self._column("likes")[rows].sum()),
+                "total_comments": int(self._column("comments")[rows].sum()),
+                "avg_engagement": float(engagement.mean()) if total else 0,
+                "high_engagement_count": int((engagement >= HIGH_ENGAGEMENT_THRESHOLD).sum()),
+                "controversial_count": int((controversial >= CONTROVERSIAL_THRESHOLD).sum()),
+                "media_stats": media_stats,
+                "risk_buckets": risk_buckets
+            }
+
+    def _sorted_rows(self, sort_order: str, start: DateLike, end: DateLike) -> Tuple[np.ndarray, np.ndarray]:
+        # 정렬 결과와 클러스터별 기사 수는 다음 갱신 전까지 재사용 (더보기 요청은 슬라이스만)
+        cache_key = (sort_order, start, end)
+        cached = self._orders.get(cache_key)
+        if cached is not None:
+            self._orders.move_to_end(cache_key)
+            return cached
+
+        key_name, descending = SORT_KEYS.get(sort_order, SORT_KEYS["risk"])
+        rows = np.nonzero(self._mask(start, end))[0]
+        keys = self._derived(key_name, rows)
+        # 동점이면 내림차순은 나중에 적재된 기사 먼저, 오름차순은 먼저 적재된 기사 먼저 (MongoDB 정렬의 _id 동점 처리와 같은 순서)
+        order = rows[np.lexsort((-rows, -keys))] if descending else rows[np.lexsort((rows, keys))]
+
+        clusters = self._column("cluster")[rows]
+        cluster_sizes = np.bincount(clusters[clusters >= 0], minlength=len(self.cluster_ids))
+        self._orders[cache_key] = (order, cluster_sizes)
+        while len(self._orders) > ORDER_CACHE_SIZE:
+            self._orders.popitem(last=False)
+        return order, cluster_sizes
+
+    def page(self, sort_order: str, offset: int = 0, limit: int = 40,
+             start: DateLike = None, end: DateLike = None) -> List[Dict]:
+        """정렬한 기사 중 offset부터 limit개를 대시보드 카드 형식으로 반환합니다."""
+        with self._lock:
+            order, cluster_sizes = self._sorted_rows(sort_order, start, end)
+            rows = order[offset:offset + limit]
+            risk = self._derived("risk", rows)
+            engagement = self._derived("engagement", rows)
+            controversial = self._derived("controversial", rows)
+            likes = self._column("likes")[rows]
+            comments = self._column("comments")[rows]
+            media = self._column("media")[rows]
+            clusters = self._column("cluster")[rows]
+
+            results = []
+            for i, row in enumerate(rows):
+                cluster = int(clusters[i])
+                results.append({
+                    "title": self.titles[row],
+                    "url": self.urls[row],
+                    "mismatch_prob": float(risk[i]),
+                    "date": self.dates[row],
+                    "media": self.media_names[media[i]],
+                    "like_count": int(likes[i]),
+                    "comment_count": int(comments[i]),
+                    "engagement_score": float(engagement[i]),
+                    "controversial_ratio": float(controversial[i]),
+                    "duplicate_cluster": self.cluster_ids[cluster] if cluster >= 0 else None,
+                    "duplicate_count": int(cluster_sizes[cluster]) if cluster >= 0 else 1
+                })
+            return results
+
+    def memory_bytes(self) -> int:
+        """숫자 열이 차지하는 메모리 (문자열 리스트 제외)"""
+        return sum(column.nbytes for column in self._columns.values())
+
+
+_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+
+# 공용 저장소 (처음 요청 시 전체 적재, 이후 REFRESH_SECONDS마다 증분 갱신)
+def get_store() -> ArticleStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArticleStore()
+    _store.refresh()
+    return _store
@@ -0,0 +1,92 @@
+import logging
+import threading
+from typing import Dict, List, Sequence, Union
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PaddingStats:
+    """배치별 실제 토큰 수와 패딩 포함 토큰 수를 누적해 패딩 효율을 계산합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.batches = 0
+        self.sequences = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def record(self, lengths: Sequence[int]) -> None:
+        if not lengths:
+            return
+        with self._lock:
+            self.batches += 1
+            self.sequences += len(lengths)
+            self.real_tokens += sum(lengths)
+            self.padded_tokens += max(lengths) * len(lengths)
+
+    def merge(self, values: Dict[str, Union[int, float]]) -> None:
+        """다른 프로세스에서 받은 as_dict() 결과를 더합니다."""
+        with self._lock:
+            self.batches += values["batches"]
+            self.sequences += values["sequences"]
+            self.real_tokens += values["real_tokens"]
+            self.padded_tokens += values["padded_tokens"]
+
+    @property
+    def efficiency(self) -> float:
+        return self.real_tokens / self.padded_tokens if self.padded_tokens else 1.0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return {
+            "batches": self.batches,
+            "sequences": self.sequences,
+            "real_tokens": self.real_tokens,
+            "padded_tokens": self.padded_tokens,
+            "padding_efficiency": self.efficiency
+        }
+
+
+# 단계별 패딩 통계
+padding_stats = {
+    "summarizer": PaddingStats(),
+    "classifier": PaddingStats(),
+}
+
+
+# ✅ 길이 버킷 + 토큰 예산 배치 계획
+def plan_token_batches(lengths: Sequence[int], max_batch_tokens: int,
+                       max_batch_size: int = 64) -> List[List[int]]:
+    """
+    시퀀스 길이 목록을 길이순으로 묶고, 패딩 포함 토큰 수(최장 길이 × 개수)가
+    max_batch_tokens를 넘지 않도록 배치를 나눕니다. 각 배치는 원래 인덱스 목록입니다.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current = []
+    longest = 0
+    for idx in order:
+        new_longest = max(longest, lengths[idx])
+        if current and (len(current) >= max_batch_size or new_longest * (len(current) + 1) > max_batch_tokens):
+            batches.append(current)
+            current = []
+            new_longest = lengths[idx]
+        current.append(idx)
+        longest = new_longest
+    if current:
+        batches.append(current)
+    return batches
+
+
+# 패딩 효율 로그
+def log_padding_stats() -> None:
+    for stage, stats in padding_stats.items():
+        if stats.batches:
+            logger.info(
+                f"📐 {stage} 패딩 효율: {stats.efficiency * 100:.1f}% "
+                f"({stats.batches}개 배치, 실제 {stats.real_tokens} / 패딩 포함 {stats.padded_tokens} 토큰)"
+            )
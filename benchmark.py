@@ -0,0 +1,238 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+
+import torch
+
+import model_utils
+from cache_utils import set_cache_enabled
+from dataset_utils import load_dataset, VAL_DATASET_PATH
+from serving import percentile
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ✅ 오프라인용 작은 랜덤 모델
+def build_tiny_models(rows, workdir):
+    """
+    데이터셋 문자로 만든 문자 단위 vocab과 랜덤 초기화한 작은 BERT/BART를 레지스트리에 등록합니다.
+    실제 가중치 없이(오프라인, CI) 파이프라인 각 단계의 상대적인 비용을 측정하기 위한 용도입니다.
+    """
+    from transformers import (
+        BertConfig, BertForSequenceClassification, BertTokenizerFast,
+        BartConfig, BartForConditionalGeneration
+    )
+
+    chars = sorted({c for row in rows for c in row["title"] + row["body"] if not c.isspace()})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + chars + ["##" + c for c in chars]
+    vocab_path = os.path.join(workdir, "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+
+    # 한글이 자모로 분해되지 않도록 소문자화·악센트 제거를 끔
+    tokenizer = BertTokenizerFast(vocab_file=vocab_path, do_lower_case=False, strip_accents=False)
+
+    torch.manual_seed(0)
+    classifier = BertForSequenceClassification(BertConfig(
+        vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=128, max_position_embeddings=512, num_labels=2
+    ))
+    summarizer = BartForConditionalGeneration(BartConfig(
+        vocab_size=len(vocab), d_model=64, encoder_layers=2, decoder_layers=2,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=128, decoder_ffn_dim=128,
+        max_position_embeddings=1024, pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.cls_token_id, eos_token_id=tokenizer.sep_token_id,
+        decoder_start_token_id=tokenizer.sep_token_id, forced_eos_token_id=tokenizer.sep_token_id
+    ))
+    for model in (classifier, summarizer):
+        model.to(model_utils.device)
+        model.eval()
+
+    model_utils.register_model("classifier", tokenizer, classifier)
+    model_utils.register_model("summarizer", tokenizer, summarizer)
+    logger.info(f"🧪 작은 랜덤 모델 등록 완료 (vocab {len(vocab)}개)")
+
+
+# ✅ 측정 단계 (rows 묶음 하나를 처리)
+def _stage_sliding_window(rows):
+    for row in rows:
+        model_utils.sliding_window(row["body"])
+
+
+def _stage_summarize_slices(rows):
+    for row in rows:
+        model_utils.summarize_slices(model_utils.sliding_window(row["body"]))
+
+
+def _stage_generate_summary(rows):
+    if len(rows) == 1:
+        model_utils.generate_summary(rows[0]["body"])
+    else:
+        model_utils.generate_summaries([row["body"] for row in rows])
+
+
+def _stage_get_mismatch_probability(rows):
+    if len(rows) == 1:
+        model_utils.get_mismatch_probability(rows[0]["title"], rows[0]["body"])
+    else:
+        model_utils.score_articles([(row["title"], row["body"]) for row in rows])
+
+
+# 단계 이름 → (함수, 배치 크기 적용 여부)
+STAGES = {
+    "sliding_window": (_stage_sliding_window, False),
+    "summarize_slices": (_stage_summarize_slices, False),
+    "generate_summary": (_stage_generate_summary, True),
+    "get_mismatch_probability": (_stage_get_mismatch_probability, True),
+}
+
+
+# 단계 실행 중 RSS를 읽는 간격 (초)
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def _current_rss_mb():
+    # /proc이 있으면 현재 RSS, 없으면(macOS 등) 프로세스 시작 이후 최대값으로 대신함
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """구간 동안 현재 RSS를 백그라운드 스레드로 주기적으로 읽어 구간 내 최대값을 기록합니다."""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, _current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = _current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _current_rss_mb())
+
+
+# ✅ 단일 조합 측정
+def run_stage(stage, rows, batch_size, threads):
+    """한 단계를 주어진 배치 크기·스레드 수로 실행해 처리량과 지연 시간 백분위수를 측정합니다."""
+    func, _ = STAGES[stage]
+    torch.set_num_threads(threads)
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+    # 첫 호출 비용(지연 초기화 등)은 제외
+    func(batches[0])
+
+    latencies = []
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        for batch in batches:
+            call_start = time.perf_counter()
+            func(batch)
+            latencies.append((time.perf_counter() - call_start) * 1000)
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    return {
+        "stage": stage,
+        "batch_size": batch_size,
+        "threads": threads,
+        "articles": len(rows),
+        "calls": len(batches),
+        "seconds": elapsed,
+        "articles_per_sec": len(rows) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        # 이 단계 실행 중 최대 RSS와 시작 시점 대비 증가량
+        "peak_rss_mb": rss.peak_mb,
+        "rss_growth_mb": rss.peak_mb - rss.start_mb
+    }
+
+
+# ✅ 전체 벤치마크
+def run_benchmark(rows, stages, batch_sizes, thread_counts):
+    results = []
+    for stage in stages:
+        _, batched = STAGES[stage]
+        for threads in thread_counts:
+            for batch_size in (batch_sizes if batched else [1]):
+                result = run_stage(stage, rows, batch_size, threads)
+                results.append(result)
+                logger.info(
+                    f"⏱ {stage} (배치 {batch_size}, 스레드 {threads}): {result['articles_per_sec']:.2f}개/초, "
+                    f"p50 {result['p50_ms']:.1f}ms / p95 {result['p95_ms']:.1f}ms / p99 {result['p99_ms']:.1f}ms, "
+                    f"최대 RSS {result['peak_rss_mb']:.0f}MB (+{result['rss_growth_mb']:.0f}MB)"
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추론 단계별 지연 시간·처리량·메모리 벤치마크")
+    parser.add_argument("--data", default=VAL_DATASET_PATH)
+    parser.add_argument("--limit", type=int, default=64, help="사용할 기사 수")
+    parser.add_argument("--body-repeat", type=int, default=1, help="긴 본문을 흉내 내기 위해 본문을 반복하는 횟수")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, torch.get_num_threads()])
+    parser.add_argument("--tiny", action="store_true", help="실제 가중치 대신 작은 랜덤 BERT/BART 사용 (오프라인·CI)")
+    parser.add_argument("--output", default="benchmark_results.json", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    # 측정 중에는 결과 캐시를 사용하지 않음
+    set_cache_enabled(False)
+    rows = load_dataset(args.data, args.limit)
+    if args.body_repeat > 1:
+        rows = [dict(row, body=" ".join([row["body"]] * args.body_repeat)) for row in rows]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.tiny:
+            build_tiny_models(rows, workdir)
+        else:
+            model_utils.warmup()
+
+        report = {
+            "config": {
+                "data": args.data,
+                "articles": len(rows),
+                "body_repeat": args.body_repeat,
+                "tiny": args.tiny,
+                "backend": model_utils.BACKEND,
+                "device": str(model_utils.device),
+                "torch": torch.__version__,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+            },
+            "results": run_benchmark(rows, args.stages, sorted(set(args.batch_sizes)), sorted(set(args.threads)))
+        }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"📁 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
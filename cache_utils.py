@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 캐시 설정 (환경변수로 덮어쓰기 가능)
+CACHE_PATH = os.environ.get("CTN_CACHE_PATH", "./ctn_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.environ.get("CTN_CACHE_MAX_ENTRIES", "200000"))
+# 적중한 항목의 최근 사용 시각은 이 간격이 지났을 때만 갱신 (조회마다 쓰기·커밋하지 않도록, LRU 순서는 이 간격 단위로 근사)
+CACHE_TOUCH_SECONDS = float(os.environ.get("CTN_CACHE_TOUCH_SECONDS", "60"))
+CACHE_ENABLED = True
+
+# 네임스페이스
+SUMMARY_NAMESPACE = "summary"
+PROBABILITY_NAMESPACE = "probability"
+
+
+# 내용 해시 키 생성
+def make_key(*parts: str) -> str:
+    """문자열들을 이어 붙인 SHA-256 해시를 캐시 키로 사용합니다."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """본문/제목 해시와 모델 식별자로 요약·확률을 저장하는 SQLite 기반 LRU 캐시"""
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON results (last_access)")
+        self._conn.commit()
+        self._size = self._count()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """캐시 값을 조회합니다. 최근 사용 시각이 CACHE_TOUCH_SECONDS보다 오래됐으면 갱신합니다. 없으면 None을 반환합니다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, last_access FROM results WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            if now - row[1] >= CACHE_TOUCH_SECONDS:
+                self._conn.execute(
+                    "UPDATE results SET last_access = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key)
+                )
+                self._conn.commit()
+            return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """캐시 값을 저장하고, 최대 크기를 넘으면 오래 사용되지 않은 항목부터 제거합니다."""
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO results (namespace, key, value, last_access) VALUES (?, ?, ?, ?)",
+                (namespace, key, encoded, time.time())
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self._conn.execute(
+                    "UPDATE results SET value = ?, last_access = ? WHERE namespace = ? AND key = ?",
+                    (encoded, time.time(), namespace, key)
+                )
+            if self._size > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # 다른 프로세스가 쓴 항목까지 반영해 다시 세고, 10% 여유를 두고 제거
+        self._size = self._count()
+        overflow = self._size - int(self.max_entries * 0.9)
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM results WHERE rowid IN "
+            "(SELECT rowid FROM results ORDER BY last_access ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._size -= overflow
+        logger.info(f"🧹 캐시 {overflow}개 항목 제거 (LRU)")
+
+    def clear(self) -> None:
+        """캐시를 비웁니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """적중/미스 횟수와 현재 크기를 반환합니다."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total * 100) if total else 0,
+            "size": self._size
+        }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+# 캐시 사용 여부 (벤치마크·검증 시 끄기)
+def set_cache_enabled(enabled: bool) -> None:
+    global CACHE_ENABLED
+    CACHE_ENABLED = enabled
+
+
+# 공용 캐시 인스턴스
+def get_cache() -> Optional[ResultCache]:
+    """공용 캐시를 처음 사용할 때 엽니다. 경로가 비어 있거나 꺼져 있으면 캐시를 사용하지 않습니다."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None and CACHE_PATH:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = ResultCache()
+                except Exception as e:
+                    logger.error(f"❌ 캐시 열기 실패: {e}")
+                    return None
+    return _cache
@@ -1,6 +1,5 @@
 import requests
 from bs4 import BeautifulSoup
-from pymongo import MongoClient
 from datetime import datetime
 import time
 import random
@@ -11,11 +10,14 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from db_utils import get_collection, content_hash
+from db_indexes import ensure_indexes
+from dedup_utils import resolve_duplicate, index_article
+from rollup_utils import record_articles
 
-# MongoDB 연결
-client = MongoClient("mongodb+srv://PW")
-db = client["news_politics"]
-collection = db["2025.06.09"]
+
+# 저장할 일별 컬렉션 (MongoDB 연결은 db_utils의 공용 연결 풀 사용)
+COLLECTION_NAME = "2025.06.09"
 
 # Selenium 드라이버 세팅 (헤드리스 옵션 포함)
 def get_selenium_driver():
@@ -31,6 +33,9 @@ def crawl_politics_news():
     print("🔍 정치 뉴스 크롤링 시작")
     
     headers = {'User-Agent': 'Mozilla/5.0'}
+    collection = get_collection(COLLECTION_NAME)
+    # 새 날짜 컬렉션이어도 URL 중복 확인이 인덱스를 타도록 먼저 인덱스 준비
+    ensure_indexes(COLLECTION_NAME)
 
     # Selenium 드라이버 시작
     driver = get_selenium_driver()
@@ -150,7 +155,25 @@ def crawl_politics_news():
                     "crawled_at": datetime.now()
                 }
 
-                collection.insert_one(data)
+                # 이미 채점된 기사와 본문이 거의 같고 제목도 같으면 결과 재사용
+                inherited = resolve_duplicate(title, body)
+                if inherited:
+                    # 원본을 채점한 모델 버전을 함께 기록해 재채점 대상 판단이 가능하도록 함
+                    data["mismatch_probability"] = inherited["probability"]
+                    data["model_version"] = inherited["model_version"]
+                    data["content_hash"] = content_hash(title, body)
+                    print(f"♻️ 중복 기사 결과 재사용 (유사도 {inherited['similarity']:.2f}): {title}")
+
+                result = collection.insert_one(data)
+                index_article(result.inserted_id, collection.name, title, body,
+                              inherited["probability"] if inherited else None,
+                              inherited["summary"] if inherited else None,
+                              inherited["model_version"] if inherited else None)
+                # (일, 언론사) 통계 롤업에 반영 (실패하면 rollup_utils rebuild로 복구)
+                try:
+                    record_articles(collection.name, [data])
+                except Exception as e:
+                    print(f"⚠️ 통계 롤업 갱신 실패: {e}")
                 count_saved += 1
                 print(f"{count_saved}. ✅ 저장됨: {title}")
 
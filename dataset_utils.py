@@ -0,0 +1,50 @@
+import csv
+import sys
+import logging
+from typing import List, Dict, Optional, Sequence
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRAIN_DATASET_PATH = "./Data/train_dataset.csv"
+VAL_DATASET_PATH = "./Data/val_dataset.csv"
+
+# 긴 본문 필드 허용
+csv.field_size_limit(sys.maxsize)
+
+
+# 라벨 데이터셋 불러오기 (title, body, label)
+def load_dataset(path: str = VAL_DATASET_PATH, limit: Optional[int] = None) -> List[Dict]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rows.append({
+                "title": row["title"].strip(),
+                "body": row["body"].strip(),
+                "label": int(row["label"])
+            })
+            if limit and len(rows) >= limit:
+                break
+    logger.info(f"📥 데이터셋 {path}: {len(rows)}개 로드")
+    return rows
+
+
+# 정확도
+def accuracy(probs: Sequence[float], labels: Sequence[int], threshold: float = 0.5) -> float:
+    if not labels:
+        return 0.0
+    correct = sum(1 for p, y in zip(probs, labels) if int(p >= threshold) == y)
+    return correct / len(labels)
+
+
+# F1 (불일치 = 1 기준)
+def f1_score(probs: Sequence[float], labels: Sequence[int], threshold: float = 0.5) -> float:
+    tp = sum(1 for p, y in zip(probs, labels) if p >= threshold and y == 1)
+    fp = sum(1 for p, y in zip(probs, labels) if p >= threshold and y == 0)
+    fn = sum(1 for p, y in zip(probs, labels) if p < threshold and y == 1)
+    if tp == 0:
+        return 0.0
+    precision = tp / (tp + fp)
+    recall = tp / (tp + fn)
+    return 2 * precision * recall / (precision + recall)
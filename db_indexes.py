@@ -0,0 +1,154 @@
+import argparse
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from db_utils import get_collection, get_collection_names_in_range, UNSCORED_QUERY
+from dedup_utils import ensure_dedup_index
+from rollup_utils import ensure_rollup_index
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ✅ 일별 기사 컬렉션 인덱스
+# unscored_by_date: {"mismatch_probability": {"$exists": False}} 조건은 partialFilterExpression으로 표현할 수 없어
+#   (부분 인덱스는 $exists: true만 허용), 값이 없는 문서를 null 범위로 찾는 복합 인덱스로 미채점 조회를 처리합니다.
+#   앞부분(mismatch_probability)은 확률 범위 조회·정렬에도 쓰입니다.
+# date_id_desc: 재채점 키셋 페이지(date, _id 내림차순)를 메모리 정렬 없이 처리하고, 앞부분(date)은 최신순 조회에도 쓰입니다.
+ARTICLE_INDEXES: List[Dict] = [
+    {"keys": [("URL", ASCENDING)], "name": "url_unique", "unique": True},
+    {"keys": [("mismatch_probability", ASCENDING), ("date", DESCENDING)], "name": "unscored_by_date"},
+    {"keys": [("date", DESCENDING), ("_id", DESCENDING)], "name": "date_id_desc"},
+    {"keys": [("media", ASCENDING)], "name": "media"},
+    {"keys": [("updated_at", ASCENDING)], "name": "updated_at", "sparse": True},
+    {"keys": [("duplicate_cluster", ASCENDING)], "name": "duplicate_cluster", "sparse": True},
+]
+# 다른 인덱스로 대체되어 ensure 때 삭제하는 인덱스
+OBSOLETE_INDEXES: List[str] = ["date_desc"]
+
+
+# ✅ 자주 쓰는 조회 (COLLSCAN이거나, sort가 있는데 메모리 정렬(SORT 단계)이면 검사 실패)
+HOT_QUERIES: List[Dict] = [
+    {"name": "crawler: URL 중복 확인", "filter": {"URL": "https://n.news.naver.com/"}, "limit": 1},
+    {"name": "db_utils: 확률 없는 뉴스 (키셋 페이지)",
+     "filter": {**UNSCORED_QUERY, "_id": {"$gt": ObjectId("000000000000000000000000")}},
+     "sort": [("_id", ASCENDING)], "limit": 100},
+    {"name": "db_utils: 모델 버전 재채점", "filter": {"model_version": {"$ne": ""}},
+     "sort": [("date", DESCENDING), ("_id", DESCENDING)], "limit": 100},
+    {"name": "db_utils: 최신 뉴스", "filter": {}, "sort": [("date", DESCENDING)], "limit": 40},
+    {"name": "db_utils: 채점된 뉴스 수", "filter": {"mismatch_probability": {"$exists": True}}},
+    {"name": "app: 클러스터별 기사 수", "filter": {"duplicate_cluster": {"$in": [ObjectId("000000000000000000000000")]}}},
+    {"name": "article_store: 증분 갱신", "filter": {"$or": [{"_id": {"$gte": ObjectId("000000000000000000000000")}},
+                                                           {"updated_at": {"$gte": datetime(2025, 1, 1)}}]}},
+]
+
+
+# 인덱스 생성 (이미 있으면 건너뜀)
+def ensure_indexes(collection_name: Optional[str] = None) -> List[str]:
+    """
+    일별 컬렉션 하나에 ARTICLE_INDEXES를 만듭니다. 크롤러가 새 날짜 컬렉션에 저장하기 전에도 호출합니다.
+    URL에 중복 문서가 이미 있어 고유 인덱스를 만들 수 없으면 경고만 남기고 나머지 인덱스는 계속 만듭니다.
+    """
+    collection = get_collection(collection_name)
+    existing = collection.index_information()
+    created = []
+    for spec in ARTICLE_INDEXES:
+        if spec["name"] in existing:
+            continue
+        try:
+            collection.create_index(spec["keys"], name=spec["name"], unique=spec.get("unique", False),
+                                    sparse=spec.get("sparse", False))
+            created.append(spec["name"])
+        except OperationFailure as e:
+            logger.warning(f"⚠️ {collection.name}: 인덱스 {spec['name']} 생성 실패: {e}")
+    for name in OBSOLETE_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+            logger.info(f"🗂 {collection.name}: 대체된 인덱스 {name} 삭제")
+    if created:
+        logger.info(f"🗂 {collection.name}: 인덱스 생성 {', '.join(created)}")
+    return created
+
+
+def ensure_all_indexes(collection_names: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """모든 일별 컬렉션과 보조 컬렉션(중복 인덱스, 통계 롤업)의 인덱스를 준비합니다."""
+    names = collection_names or get_collection_names_in_range()
+    result = {name: ensure_indexes(name) for name in names}
+    ensure_dedup_index()
+    ensure_rollup_index()
+    logger.info(f"✅ 인덱스 준비 완료: 컬렉션 {len(names)}개")
+    return result
+
+
+# 쿼리 플랜에서 단계 이름 모으기 (고전 엔진 inputStage(s)와 SBE queryPlan 모두 처리)
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def explain_query(collection_name: str, spec: Dict) -> Dict:
+    cursor = get_collection(collection_name).find(spec["filter"])
+    if spec.get("sort"):
+        cursor = cursor.sort(spec["sort"])
+    if spec.get("limit"):
+        cursor = cursor.limit(spec["limit"])
+    winning = cursor.explain()["queryPlanner"]["winningPlan"]
+    stages = _plan_stages(winning)
+    return {"query": spec["name"], "collection": collection_name, "stages": stages, "collscan": "COLLSCAN" in stages,
+            "blocking_sort": bool(spec.get("sort")) and "SORT" in stages}
+
+
+# ✅ 쿼리 플랜 검사
+def check_query_plans(collection_names: Optional[List[str]] = None) -> List[Dict]:
+    """HOT_QUERIES의 실행 계획을 확인해 COLLSCAN이나 메모리 정렬로 실행되는 조회 목록을 반환합니다."""
+    names = collection_names or get_collection_names_in_range()[:1]
+    failures = []
+    for name in names:
+        for spec in HOT_QUERIES:
+            result = explain_query(name, spec)
+            if result["collscan"] or result["blocking_sort"]:
+                failures.append(result)
+                reason = "COLLSCAN" if result["collscan"] else "메모리 정렬(SORT)"
+                logger.error(f"❌ {name}: '{spec['name']}' 조회가 {reason} ({' → '.join(result['stages'])})")
+            else:
+                logger.info(f"✅ {name}: '{spec['name']}' ({' → '.join(result['stages'])})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="뉴스 컬렉션 인덱스 관리와 쿼리 플랜 검사")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ensure = sub.add_parser("ensure", help="모든 일별 컬렉션에 인덱스 생성")
+    ensure.add_argument("--collections", nargs="+", help="대상 컬렉션 (기본: 모든 일별 컬렉션)")
+    check = sub.add_parser("check", help="자주 쓰는 조회가 COLLSCAN이거나 메모리 정렬이면 종료 코드 1")
+    check.add_argument("--collections", nargs="+", help="대상 컬렉션 (기본: 가장 최근 일별 컬렉션)")
+    check.add_argument("--all", action="store_true", help="모든 일별 컬렉션 검사")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        ensure_all_indexes(args.collections)
+        return
+
+    names = args.collections or (get_collection_names_in_range() if args.all else None)
+    failures = check_query_plans(names)
+    if failures:
+        logger.error(f"인덱스를 제대로 쓰지 않는 조회 {len(failures)}개")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,262 @@
-from pymongo import MongoClient, UpdateOne
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from bson import ObjectId
+import hashlib
+import heapq
+import itertools
 import logging
-from typing import List, Tuple, Union, Dict, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Iterator, List, Tuple, Union, Dict, Optional
+from metrics import timer, increment
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# MongoDB 연결
-try:
-    client = MongoClient(
-        "mongodb+srv://PW",
-        serverSelectionTimeoutMS=5000
-    )
-    client.admin.command('ping')  # 연결 테스트
-    db = client["news_politics"]
-    collections = db.list_collection_names()  # 컬렉션 이름 리스트 가져오기
+# MongoDB 설정
+MONGO_URI = os.environ.get("CTN_MONGO_URI", "mongodb+srv://PW")
+DB_NAME = "news_politics"
+# 일별 기사 컬렉션과 섞이지 않도록 보조 데이터(중복 인덱스 등)는 별도 DB에 저장
+META_DB_NAME = "news_meta"
 
-    all_documents = []
-    for col_name in collections:
-        collection = db[col_name]
-        docs = list(collection.find())  # 해당 컬렉션 모든 문서 조회
-        all_documents.extend(docs)  # 전체 문서 리스트에 추가
+# 연결 풀 설정 (환경 변수로 조정)
+# MAX_POOL_SIZE: 프로세스당 최대 동시 연결 수 / WAIT_QUEUE_TIMEOUT_MS: 풀이 가득 찼을 때 연결을 기다리는 최대 시간
+MONGO_OPTIONS: Dict[str, Any] = {
+    "maxPoolSize": int(os.environ.get("CTN_MONGO_MAX_POOL_SIZE", "50")),
+    "minPoolSize": int(os.environ.get("CTN_MONGO_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.environ.get("CTN_MONGO_MAX_IDLE_TIME_MS", "60000")),
+    "waitQueueTimeoutMS": int(os.environ.get("CTN_MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+    "serverSelectionTimeoutMS": int(os.environ.get("CTN_MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "connectTimeoutMS": int(os.environ.get("CTN_MONGO_CONNECT_TIMEOUT_MS", "10000")),
+    "socketTimeoutMS": int(os.environ.get("CTN_MONGO_SOCKET_TIMEOUT_MS", "60000")),
+}
 
-    print(f"총 문서 수: {len(all_documents)}")
-    # all_documents 안에 news_politics DB 내 모든 컬렉션 문서들이 들어있음
-    
-    #db = client["news_politics"]
-    #collection = db["2025.06.09"]
 
+class ConnectionManager:
+    """
+    프로세스마다 MongoClient(내부 연결 풀) 하나를 처음 사용할 때 만들어 공유합니다.
+    import 시점에는 아무 작업도 하지 않으며, fork된 자식 프로세스에서는 새 클라이언트를 만듭니다.
+    """
 
-    logger.info("✅ MongoDB 연결 성공")
-except Exception as e:
-    logger.error(f"❌ MongoDB 연결 실패: {e}")
-    raise
+    def __init__(self, uri: str = MONGO_URI, **options):
+        self.uri = uri
+        self.options = dict(MONGO_OPTIONS, **options)
+        self._client: Optional[MongoClient] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def configure(self, uri: Optional[str] = None, **options) -> None:
+        """연결 설정을 바꿉니다. 이미 연결되어 있으면 닫고 다음 사용 때 새 설정으로 연결합니다."""
+        with self._lock:
+            if uri:
+                self.uri = uri
+            self.options.update(options)
+            self._close_locked()
+
+    @property
+    def client(self) -> MongoClient:
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    try:
+                        self._client = MongoClient(self.uri, **self.options)
+                        self._pid = os.getpid()
+                        logger.info(f"✅ MongoDB 연결 준비 (최대 풀 {self.options['maxPoolSize']}개)")
+                    except Exception as e:
+                        logger.error(f"❌ MongoDB 연결 실패: {e}")
+                        raise
+        return self._client
+
+    def db(self, name: str = DB_NAME):
+        return self.client[name]
+
+    def collection(self, name: str, db_name: str = DB_NAME):
+        return self.client[db_name][name]
+
+    def _close_locked(self) -> None:
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
+        self._client = None
+        self._pid = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+
+_manager = ConnectionManager()
+
+
+def get_connection_manager() -> ConnectionManager:
+    return _manager
+
+
+# MongoDB 연결 (처음 사용할 때 연결)
+def get_db():
+    return _manager.db(DB_NAME)
+
+
+def close_connection() -> None:
+    _manager.close()
+
+
+# 일별 컬렉션 이름 목록
+def get_collection_names() -> List[str]:
+    return sorted(get_db().list_collection_names())
+
+
+# 일별 컬렉션 이름 형식 (예: "2025.06.09")
+COLLECTION_DATE_FORMAT = "%Y.%m.%d"
+# 여러 일별 컬렉션을 동시에 조회하는 스레드 수 (연결 풀 크기보다 작게)
+FANOUT_WORKERS = int(os.environ.get("CTN_FANOUT_WORKERS", "8"))
+
+DateLike = Union[str, date, None]
+
+_fanout_pool: Optional[ThreadPoolExecutor] = None
+_fanout_lock = threading.Lock()
+
+
+def _to_date(value: DateLike) -> Optional[date]:
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    for fmt in ("%Y-%m-%d", COLLECTION_DATE_FORMAT):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"날짜 형식이 올바르지 않습니다: {value} (YYYY-MM-DD)")
+
+
+# 날짜 범위에 속하는 일별 컬렉션 (최신순)
+def get_collection_names_in_range(start: DateLike = None, end: DateLike = None) -> List[str]:
+    """컬렉션 이름의 날짜로 범위 밖 컬렉션을 조회 전에 제외합니다. 날짜 형식이 아닌 컬렉션은 포함하지 않습니다."""
+    start, end = _to_date(start), _to_date(end)
+    names = []
+    for name in get_collection_names():
+        try:
+            day = datetime.strptime(name, COLLECTION_DATE_FORMAT).date()
+        except ValueError:
+            continue
+        if (start is None or day >= start) and (end is None or day <= end):
+            names.append(name)
+    return sorted(names, reverse=True)
+
+
+def _get_fanout_pool() -> ThreadPoolExecutor:
+    global _fanout_pool
+    if _fanout_pool is None:
+        with _fanout_lock:
+            if _fanout_pool is None:
+                _fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="mongo-fanout")
+    return _fanout_pool
+
+
+def _sort_key(sort: List[Tuple[str, int]]):
+    # MongoDB처럼 값이 없는 문서를 가장 작은 값으로 취급
+    def key(doc):
+        return tuple((doc.get(field) is not None, doc.get(field)) for field, _ in sort)
+    return key
+
+
+def _find_in_collection(name: str, query: Dict, projection: Optional[Dict],
+                        sort: Optional[List[Tuple[str, int]]], limit: Optional[int]) -> List[Dict]:
+    cursor = get_db()[name].find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+
+# ✅ 일별 컬렉션 병렬 조회
+def query_news(query: Optional[Dict] = None, projection: Optional[Dict] = None,
+               sort: Optional[List[Tuple[str, int]]] = None, limit: Optional[int] = None,
+               start: DateLike = None, end: DateLike = None) -> List[Dict]:
+    """
+    날짜 범위 안의 일별 컬렉션만 골라 스레드 풀에서 동시에 조회합니다.
+    sort를 주면 컬렉션별로 정렬된 결과를 k-way merge하고, limit은 전체 결과에 한 번만 적용됩니다.
+    (각 컬렉션에서도 limit개까지만 가져오면 충분하므로 전송량도 limit × 컬렉션 수를 넘지 않습니다.)
+    sort의 방향은 모두 같아야 합니다.
+    """
+    query = query or {}
+    names = get_collection_names_in_range(start, end)
+    if not names:
+        return []
+    if sort and len({direction for _, direction in sort}) > 1:
+        raise ValueError("query_news는 한 방향 정렬만 지원합니다.")
+
+    with timer("mongo", op="read", query="fanout"):
+        pool = _get_fanout_pool()
+        futures = [pool.submit(_find_in_collection, name, query, projection, sort, limit) for name in names]
+        partials = [future.result() for future in futures]
+
+    if sort:
+        merged = heapq.merge(*partials, key=_sort_key(sort), reverse=sort[0][1] == DESCENDING)
+    else:
+        # 정렬 없이 조회하면 최신 컬렉션부터 이어 붙임
+        merged = itertools.chain.from_iterable(partials)
+    results = list(itertools.islice(merged, limit))
+    increment("mongo_documents_total", len(results), op="read", query="fanout")
+    return results
+
+
+# 일별 컬렉션별 조회 결과 (병렬 조회, names 순서대로 끝나는 대로 반환)
+def iter_news_by_collection(names: List[str], query: Optional[Dict] = None,
+                            projection: Optional[Dict] = None) -> Iterator[Tuple[str, List[Dict]]]:
+    if not names:
+        return
+    pool = _get_fanout_pool()
+    futures = [(name, pool.submit(_find_in_collection, name, query or {}, projection, None, None)) for name in names]
+    for name, future in futures:
+        docs = future.result()
+        increment("mongo_documents_total", len(docs), op="read", query="fanout_by_collection")
+        yield name, docs
+
+
+# 일별 컬렉션별 문서 수 (컬렉션 메타데이터의 추정치, 병렬 조회)
+def count_news_by_collection(names: List[str]) -> Dict[str, int]:
+    if not names:
+        return {}
+    with timer("mongo", op="read", query="collection_counts"):
+        pool = _get_fanout_pool()
+        futures = {name: pool.submit(lambda n: get_db()[n].estimated_document_count(), name) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+
+
+# 작업 대상 컬렉션 (기본: 가장 최근 날짜 컬렉션)
+def get_collection(name: Optional[str] = None):
+    db = get_db()
+    if name is None:
+        names = get_collection_names()
+        if not names:
+            raise RuntimeError("news_politics DB에 컬렉션이 없습니다.")
+        name = names[-1]
+    return db[name]
+
+
+# 보조 데이터 컬렉션
+def get_meta_collection(name: str):
+    return _manager.collection(name, META_DB_NAME)
+
+
+# 확률값이 없는 뉴스 조건 (db_indexes의 쿼리 플랜 검사에서도 사용)
+UNSCORED_QUERY = {"mismatch_probability": {"$exists": False}}
 
 
 # 확률값이 없는 뉴스 가져오기
-def get_news_without_probability(limit: Optional[int] = None) -> List[Dict]:
+def get_news_without_probability(limit: Optional[int] = None, collection_name: Optional[str] = None) -> List[Dict]:
     try:
-        query = {"mismatch_probability": {"$exists": False}}
-        cursor = collection.find(query, {"_id": 1, "title": 1, "body": 1})
-        if limit:
-            cursor = cursor.limit(limit)
-        news_list = list(cursor)
+        query = UNSCORED_QUERY
+        with timer("mongo", op="read", query="news_without_probability"):
+            cursor = get_collection(collection_name).find(query, {"_id": 1, "title": 1, "body": 1})
+            if limit:
+                cursor = cursor.limit(limit)
+            news_list = list(cursor)
+        increment("mongo_documents_total", len(news_list), op="read", query="news_without_probability")
         logger.info(f"📥 확률값 없는 뉴스 {len(news_list)}개 조회")
         return news_list
     except Exception as e:
@@ -51,6 +264,113 @@ def get_news_without_probability(limit: Optional[int] = None) -> List[Dict]:
         return []
 
 
+# 확률값이 없는 뉴스 스트리밍 (전체를 메모리에 올리지 않음)
+def iter_news_without_probability(limit: Optional[int] = None, batch_size: int = 100,
+                                  collection_name: Optional[str] = None) -> Iterator[Dict]:
+    """
+    _id 키셋 페이지 단위로 조회합니다. 페이지마다 커서를 닫으므로 뒤 단계가 오래 막혀도 서버 커서가 만료되지 않습니다.
+    """
+    collection = get_collection(collection_name)
+    last_id = None
+    count = 0
+    while limit is None or count < limit:
+        query = UNSCORED_QUERY if last_id is None else {**UNSCORED_QUERY, "_id": {"$gt": last_id}}
+        size = batch_size if limit is None else min(batch_size, limit - count)
+        with timer("mongo", op="read", query="news_without_probability"):
+            page = list(collection.find(query, {"_id": 1, "title": 1, "body": 1})
+                        .sort("_id", ASCENDING).limit(size))
+        increment("mongo_documents_total", len(page), op="read", query="news_without_probability")
+        if not page:
+            return
+        for news in page:
+            yield news
+        count += len(page)
+        last_id = page[-1]["_id"]
+        if len(page) < size:
+            return
+
+
+# 본문 내용 해시 (제목·본문이 바뀌었는지 확인용)
+def content_hash(title: str, body: str) -> str:
+    return hashlib.sha256(f"{(title or '').strip()}\n{(body or '').strip()}".encode("utf-8")).hexdigest()
+
+
+# 현재 모델 버전으로 채점되지 않은 뉴스 (확률 없음 포함)를 최신순으로 스트리밍
+def iter_stale_news(model_version: str, collection_name: Optional[str] = None, limit: Optional[int] = None,
+                    page_size: int = 100) -> Iterator[Dict]:
+    """
+    (date, _id) 키셋 페이지 단위로 조회해 오래 걸리는 작업에서도 커서가 만료되지 않습니다.
+    채점이 끝난 문서는 model_version이 바뀌어 다음 실행에서 제외되므로, 중단 후 다시 실행하면 이어서 처리합니다.
+    """
+    collection = get_collection(collection_name)
+    stale = {"model_version": {"$ne": model_version}}
+    last = None
+    count = 0
+    while limit is None or count < limit:
+        query = stale
+        if last is not None:
+            query = {"$and": [stale, _after_date_id(last)]}
+        size = page_size if limit is None else min(page_size, limit - count)
+        with timer("mongo", op="read", query="stale_news"):
+            page = list(collection.find(query, {"_id": 1, "title": 1, "body": 1, "date": 1})
+                        .sort([("date", DESCENDING), ("_id", DESCENDING)]).limit(size))
+        increment("mongo_documents_total", len(page), op="read", query="stale_news")
+        if not page:
+            return
+        for news in page:
+            yield news
+        count += len(page)
+        last = page[-1]
+        if len(page) < size:
+            return
+
+
+# (date, _id) 내림차순에서 last 다음 문서 조건 (date가 없는 문서는 내림차순의 맨 뒤)
+def _after_date_id(last: Dict) -> Dict:
+    last_date = last.get("date")
+    if last_date is None:
+        return {"date": None, "_id": {"$lt": last["_id"]}}
+    return {"$or": [
+        {"date": {"$lt": last_date}},
+        {"date": last_date, "_id": {"$lt": last["_id"]}},
+        {"date": None}
+    ]}
+
+
+# 현재 모델 버전으로 채점됐지만 저장된 해시와 내용이 달라진 뉴스 (전체 스캔)
+def iter_changed_news(model_version: str, collection_name: Optional[str] = None,
+                      batch_size: int = 500) -> Iterator[Dict]:
+    query = {"model_version": model_version}
+    projection = {"_id": 1, "title": 1, "body": 1, "date": 1, "content_hash": 1}
+    cursor = get_collection(collection_name).find(query, projection).sort("date", DESCENDING).batch_size(batch_size)
+    try:
+        for news in cursor:
+            if news.get("content_hash") != content_hash(news.get("title", ""), news.get("body", "")):
+                yield news
+    finally:
+        cursor.close()
+
+
+# ✅ 일별 컬렉션을 합쳐 서버에서 집계
+def aggregate_news(head: List[Dict], tail: Optional[List[Dict]] = None, start: DateLike = None,
+                   end: DateLike = None, name: str = "aggregate") -> List[Dict]:
+    """
+    날짜 범위 안의 일별 컬렉션마다 head 단계($match/$project 등)를 적용하고 $unionWith로 합친 뒤
+    tail 단계($group/$facet/$sort 등)를 실행해 작은 결과만 가져옵니다.
+    """
+    names = get_collection_names_in_range(start, end)
+    if not names:
+        return []
+    pipeline = list(head)
+    for other in names[1:]:
+        pipeline.append({"$unionWith": {"coll": other, "pipeline": list(head)}})
+    pipeline.extend(tail or [])
+    with timer("mongo", op="aggregate", query=name):
+        results = list(get_db()[names[0]].aggregate(pipeline, allowDiskUse=True))
+    increment("mongo_documents_total", len(results), op="aggregate", query=name)
+    return results
+
+
 # 모든 뉴스 가져오기
 """
 def get_all_news(limit: Optional[int] = None) -> List[Dict]:
@@ -65,16 +385,18 @@ def get_all_news(limit: Optional[int] = None) -> List[Dict]:
         logger.error(f"❌ 전체 뉴스 조회 실패: {e}")
         return []
 """
-def get_all_news(limit: Optional[int] = None) -> List[Dict]:
-    all_news = []
+def get_all_news(limit: Optional[int] = None, start: DateLike = None, end: DateLike = None,
+                 sort: Optional[List[Tuple[str, int]]] = None) -> List[Dict]:
+    """날짜 범위(일별 컬렉션 기준) 안의 뉴스를 조회합니다. limit은 전체 결과 수이며, 주면 기본으로 최신순입니다."""
     try:
-        for col_name in collections:
-            collection = db[col_name]
-            cursor = collection.find({}, {"_id": 1, "title": 1, "body": 1, "mismatch_probability": 1,
-                                          "URL": 1, "date": 1, "media":1, "like_count":1, "comment_count":1})
-            if limit:
-                cursor = cursor.limit(limit)
-            all_news.extend(list(cursor))
+        if limit and not sort:
+            sort = [("date", DESCENDING)]
+        all_news = query_news(
+            projection={"_id": 1, "title": 1, "body": 1, "mismatch_probability": 1,
+                        "URL": 1, "date": 1, "media":1, "like_count":1, "comment_count":1,
+                        "duplicate_cluster": 1},
+            sort=sort, limit=limit, start=start, end=end
+        )
         logger.info(f"📥 전체 뉴스 {len(all_news)}개 조회")
         return all_news
     except Exception as e:
@@ -88,12 +410,17 @@ def update_news_probability(news_id: Union[str, ObjectId], prob: float) -> bool:
         if isinstance(news_id, str):
             news_id = ObjectId(news_id)
 
-        result = collection.update_one(
+        collection = get_collection()
+        # 이전 값은 (일, 언론사) 롤업 갱신에 사용
+        previous = collection.find_one_and_update(
             {"_id": news_id},
-            {"$set": {"mismatch_probability": prob}}
+            {"$set": {"mismatch_probability": prob}, "$currentDate": {"updated_at": True}},
+            projection={"media": 1, "mismatch_probability": 1}
         )
+        if previous is not None:
+            _update_rollup(collection.name, [(previous.get("media"), previous.get("mismatch_probability"), prob)])
 
-        if result.modified_count > 0:
+        if previous is not None and previous.get("mismatch_probability") != prob:
             logger.info(f"✅ 뉴스 {news_id} 확률값 업데이트 완료: {prob:.4f}")
             return True
         else:
@@ -104,18 +431,39 @@ def update_news_probability(news_id: Union[str, ObjectId], prob: float) -> bool:
         return False
 
 
+# (일, 언론사) 통계 롤업 갱신 (실패해도 확률 저장은 유지, rollup_utils rebuild로 복구)
+def _update_rollup(collection_name: str, changes: List[Tuple[Optional[str], Optional[float], float]]) -> None:
+    from rollup_utils import record_probability_changes
+
+    try:
+        record_probability_changes(collection_name, changes)
+    except Exception as e:
+        logger.warning(f"⚠️ 통계 롤업 갱신 실패 ({collection_name}): {e}")
+
+
 # 배치 업데이트
-def batch_update_probabilities(news_prob_list: List[Tuple[Union[str, ObjectId], float]]) -> int:
+def batch_update_probabilities(news_prob_list: List[Tuple[Union[str, ObjectId], float]],
+                               model_version: Optional[str] = None,
+                               content_hashes: Optional[Dict] = None,
+                               collection_name: Optional[str] = None) -> int:
+    """
+    확률값을 저장하고 수정한 문서 수를 반환합니다.
+    model_version과 content_hashes(뉴스 ID → content_hash)를 주면 함께 기록해 재채점 대상 판단에 사용합니다.
+    문서마다 find_one_and_update로 쓰면서 이전 값을 받으므로, 여러 작업(워커 풀, 파이프라인, /predict)이 동시에 써도
+    (일, 언론사) 롤업에는 실제로 일어난 변화만 한 번씩 반영됩니다.
+    """
     try:
         operations = []
         for news_id, prob in news_prob_list:
             try:
+                fields = {"mismatch_probability": prob}
+                if model_version is not None:
+                    fields["model_version"] = model_version
+                if content_hashes and news_id in content_hashes:
+                    fields["content_hash"] = content_hashes[news_id]
                 if isinstance(news_id, str):
                     news_id = ObjectId(news_id)
-                operations.append(UpdateOne(
-                    {"_id": news_id},
-                    {"$set": {"mismatch_probability": prob}}
-                ))
+                operations.append((news_id, fields))
             except Exception as conv_err:
                 logger.warning(f"⚠️ ID 변환 실패로 건너뜀: {news_id} ({conv_err})")
                 continue
@@ -124,9 +472,23 @@ def batch_update_probabilities(news_prob_list: List[Tuple[Union[str, ObjectId],
             logger.warning("⚠️ 배치 업데이트할 문서가 없습니다.")
             return 0
 
-        result = collection.bulk_write(operations)
-        logger.info(f"✅ 배치 업데이트 완료: {result.modified_count}개 문서 수정")
-        return result.modified_count
+        collection = get_collection(collection_name)
+        changes = []
+        with timer("mongo", op="write", query="batch_update_probabilities"):
+            for news_id, fields in operations:
+                # 읽기와 쓰기를 따로 하면 동시에 쓰는 작업과 같은 변화량을 두 번 반영할 수 있으므로 한 번에 처리
+                previous = collection.find_one_and_update(
+                    {"_id": news_id},
+                    {"$set": fields, "$currentDate": {"updated_at": True}},
+                    projection={"media": 1, "mismatch_probability": 1}
+                )
+                if previous is not None:
+                    changes.append((previous.get("media"), previous.get("mismatch_probability"),
+                                    fields["mismatch_probability"]))
+        increment("mongo_documents_total", len(changes), op="write", query="batch_update_probabilities")
+        _update_rollup(collection.name, changes)
+        logger.info(f"✅ 배치 업데이트 완료: {len(changes)}개 문서 수정")
+        return len(changes)
     except Exception as e:
         logger.error(f"❌ 배치 업데이트 실패: {e}")
         return 0
@@ -135,8 +497,10 @@ def batch_update_probabilities(news_prob_list: List[Tuple[Union[str, ObjectId],
 # 통계 정보
 def get_collection_stats() -> Optional[Dict[str, Union[int, float]]]:
     try:
-        total_count = collection.count_documents({})
-        with_prob_count = collection.count_documents({"mismatch_probability": {"$exists": True}})
+        collection = get_collection()
+        with timer("mongo", op="read", query="collection_stats"):
+            total_count = collection.count_documents({})
+            with_prob_count = collection.count_documents({"mismatch_probability": {"$exists": True}})
         without_prob_count = total_count - with_prob_count
         completion_rate = (with_prob_count / total_count * 100) if total_count else 0
 
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import os
+import random
+import re
+from typing import Dict, List, Optional
+
+from db_utils import get_db, get_meta_collection
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# MinHash / LSH 설정
+# NUM_PERM = BANDS × ROWS, 밴드 하나라도 같으면 후보 (유사도 약 0.5 이상에서 후보가 될 확률이 높음)
+# DUPLICATE_THRESHOLD: 후보 중 추정 자카드 유사도가 이 값 이상이면 중복으로 판단
+DEDUP_ENABLED = os.environ.get("CTN_DEDUP", "1") == "1"
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.8
+MAX_CANDIDATES = 50
+DEDUP_COLLECTION = "minhash_index"
+
+# 프로세스가 달라도 같은 서명이 나오도록 고정 시드 사용
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250609)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+# ✅ 본문 문자 n-gram
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """공백을 제거한 본문의 문자 n-gram 집합을 만듭니다."""
+    normalized = re.sub(r"\s+", "", text or "")
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# ✅ MinHash 서명
+def minhash(text: str) -> List[int]:
+    hashes = [_hash(s) for s in shingles(text)]
+    if not hashes:
+        return []
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+# ✅ LSH 밴드 키
+def lsh_bands(signature: List[int]) -> List[str]:
+    bands = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode(), digest_size=8).hexdigest()
+        bands.append(f"{band}:{digest}")
+    return bands
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+# ✅ 근사 중복 검색
+def find_near_duplicate(body: str, signature: Optional[List[int]] = None, exclude_id=None,
+                        title: Optional[str] = None, scored: bool = False,
+                        model_version: Optional[str] = None) -> Optional[Dict]:
+    """
+    인덱스에서 본문이 가장 비슷한 기사를 찾습니다. 임계값 미만이면 None을 반환합니다.
+    title / scored / model_version을 주면 제목이 같고, 채점되었고, 같은 모델 버전인 후보 중에서만 고릅니다.
+    이 조건은 조회 조건에 넣으므로, 조건에 맞지 않는 후보가 MAX_CANDIDATES개를 채워 맞는 후보를 가리지 않습니다.
+    """
+    signature = signature or minhash(body)
+    if not signature:
+        return None
+    query = {"bands": {"$in": lsh_bands(signature)}}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    if title is not None:
+        query["title"] = title.strip()
+    if scored:
+        query["probability"] = {"$ne": None}
+    if model_version is not None:
+        query["model_version"] = model_version
+
+    best = None
+    cursor = get_meta_collection(DEDUP_COLLECTION).find(query, {"bands": 0}).limit(MAX_CANDIDATES)
+    for candidate in cursor:
+        similarity = estimate_similarity(signature, candidate.get("signature", []))
+        if similarity >= DUPLICATE_THRESHOLD and (best is None or similarity > best["similarity"]):
+            best = dict(candidate, similarity=similarity)
+    return best
+
+
+# ✅ 채점 결과 재사용
+def resolve_duplicate(title: str, body: str, model_version: Optional[str] = None) -> Optional[Dict]:
+    """
+    본문이 이미 채점된 기사와 거의 같고 제목도 같으면 그 결과(확률, 요약, 클러스터, 채점한 모델 버전)를 반환합니다.
+    model_version을 주면 같은 모델 버전으로 채점된 결과만 재사용합니다.
+    """
+    if not DEDUP_ENABLED:
+        return None
+    try:
+        match = find_near_duplicate(body, title=title or "", scored=True, model_version=model_version)
+    except Exception as e:
+        logger.warning(f"⚠️ 중복 검색 실패: {e}")
+        return None
+    if not match:
+        return None
+    return {
+        "probability": match["probability"],
+        "summary": match.get("summary"),
+        "cluster": match["cluster"],
+        "model_version": match.get("model_version"),
+        "source_id": match["_id"],
+        "similarity": match["similarity"]
+    }
+
+
+# ✅ 인덱스 등록 + 클러스터 지정
+def index_article(news_id, collection_name: str, title: str, body: str,
+                  probability: Optional[float] = None, summary: Optional[str] = None,
+                  model_version: Optional[str] = None):
+    """
+    기사 서명을 인덱스에 저장하고, 근사 중복 기사가 있으면 같은 클러스터로 묶습니다.
+    클러스터 ID는 기사 문서의 duplicate_cluster 필드에도 기록해 대시보드에서 묶어 볼 수 있게 합니다.
+    """
+    if not DEDUP_ENABLED:
+        return None
+    try:
+        signature = minhash(body)
+        if not signature:
+            return None
+        match = find_near_duplicate(body, signature, exclude_id=news_id)
+        cluster = match["cluster"] if match else news_id
+
+        entry = {
+            "collection": collection_name,
+            "title": (title or "").strip(),
+            "signature": signature,
+            "bands": lsh_bands(signature),
+            "cluster": cluster
+        }
+        if probability is not None:
+            # 확률을 만든 모델 버전을 함께 기록 (모르면 None으로 덮어써 재사용 대상에서 제외)
+            entry["probability"] = probability
+            entry["model_version"] = model_version
+        if summary is not None:
+            entry["summary"] = summary
+        get_meta_collection(DEDUP_COLLECTION).update_one({"_id": news_id}, {"$set": entry}, upsert=True)
+        get_db()[collection_name].update_one({"_id": news_id}, {"$set": {"duplicate_cluster": cluster}, "$currentDate": {"updated_at": True}})
+        return cluster
+    except Exception as e:
+        logger.warning(f"⚠️ 중복 인덱스 등록 실패 ({news_id}): {e}")
+        return None
+
+
+# 인덱스 준비 (밴드 multikey 인덱스)
+def ensure_dedup_index() -> None:
+    get_meta_collection(DEDUP_COLLECTION).create_index("bands")
+    # 결과 재사용 검색(같은 제목 + 밴드)용
+    get_meta_collection(DEDUP_COLLECTION).create_index([("title", 1), ("bands", 1)])
+    get_meta_collection(DEDUP_COLLECTION).create_index("cluster")
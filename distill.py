@@ -0,0 +1,214 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import BertConfig, BertTokenizer, BertForSequenceClassification, get_linear_schedule_with_warmup
+
+from dataset_utils import load_dataset, TRAIN_DATASET_PATH, VAL_DATASET_PATH
+from train import build_token_cache, make_loader, evaluate_model, _model_inputs, TOKEN_CACHE_DIR
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UNLABELED = -1
+
+
+# ✅ 학습 데이터 + 크롤링된 라벨 없는 기사 합치기
+def build_distill_csv(path, unlabeled_limit=None, train_path=TRAIN_DATASET_PATH):
+    """학습 데이터와 MongoDB의 크롤링 기사(라벨 -1)를 하나의 CSV로 저장합니다."""
+    rows = load_dataset(train_path)
+    seen = {(row["title"], row["body"]) for row in rows}
+
+    unlabeled = []
+    if unlabeled_limit != 0:
+        from db_utils import get_all_news
+
+        # 라벨 없는 기사는 최신순으로 unlabeled_limit개까지만 조회 (None이면 전체)
+        for news in get_all_news(limit=unlabeled_limit):
+            title = (news.get("title") or "").strip()
+            body = (news.get("body") or "").strip()
+            if title and body and (title, body) not in seen:
+                seen.add((title, body))
+                unlabeled.append({"title": title, "body": body, "label": UNLABELED})
+                if unlabeled_limit and len(unlabeled) >= unlabeled_limit:
+                    break
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "body", "label"])
+        writer.writeheader()
+        writer.writerows(rows + unlabeled)
+    logger.info(f"📥 증류 데이터: 라벨 {len(rows)}개 + 라벨 없음 {len(unlabeled)}개")
+    return path
+
+
+# ✅ 학생 모델 (교사 레이어를 균등 간격으로 골라 초기화)
+def build_student(teacher, num_layers):
+    config = BertConfig.from_dict(teacher.config.to_dict())
+    config.num_hidden_layers = num_layers
+    student = BertForSequenceClassification(config)
+
+    student_state = student.state_dict()
+    teacher_state = teacher.state_dict()
+    step = teacher.config.num_hidden_layers / num_layers
+    layer_map = {i: int(round(i * step + step - 1)) for i in range(num_layers)}
+    for name in student_state:
+        source = name
+        if ".layer." in name:
+            prefix, rest = name.split(".layer.", 1)
+            idx, suffix = rest.split(".", 1)
+            source = f"{prefix}.layer.{layer_map[int(idx)]}.{suffix}"
+        if source in teacher_state:
+            student_state[name] = teacher_state[source].clone()
+    student.load_state_dict(student_state)
+    return student
+
+
+# ✅ 교사 로짓 계산 (한 번만)
+def teacher_logits(teacher, loader, device):
+    logits = np.zeros((len(loader.dataset), teacher.config.num_labels), dtype=np.float32)
+    teacher.eval()
+    with torch.no_grad():
+        for batch in loader:
+            output = teacher(**_model_inputs(batch, device)).logits
+            logits[batch["index"].numpy()] = output.cpu().numpy()
+    return torch.from_numpy(logits)
+
+
+def _inference_seconds(model, loader, device):
+    start = time.time()
+    evaluate_model(model, loader, device)
+    return time.time() - start
+
+
+# ✅ 지식 증류
+def distill(teacher_path, output_dir, num_layers=4, epochs=3, batch_size=16, lr=5e-5,
+            temperature=2.0, alpha=0.7, max_length=512, unlabeled_limit=None, cache_dir=TOKEN_CACHE_DIR):
+    """
+    교사(KoBERT 분류기)의 soft label과 정답 라벨로 더 얕은 학생 모델을 학습합니다.
+    손실 = alpha × KL(학생/T ‖ 교사/T) × T² + (1 - alpha) × 정답 교차엔트로피 (라벨 있는 샘플만)
+    """
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = BertTokenizer.from_pretrained(teacher_path)
+    teacher = BertForSequenceClassification.from_pretrained(teacher_path).to(device)
+    student = build_student(teacher, num_layers).to(device)
+
+    distill_path = build_distill_csv(os.path.join(cache_dir, "distill_train.csv"), unlabeled_limit)
+    train_set = build_token_cache(distill_path, tokenizer, max_length, cache_dir)
+    val_set = build_token_cache(VAL_DATASET_PATH, tokenizer, max_length, cache_dir)
+    train_loader, train_sampler = make_loader(train_set, batch_size, tokenizer.pad_token_id, shuffle=True)
+    eval_train_loader, _ = make_loader(train_set, batch_size * 2, tokenizer.pad_token_id, shuffle=False)
+    val_loader, _ = make_loader(val_set, batch_size * 2, tokenizer.pad_token_id, shuffle=False)
+
+    soft_targets = teacher_logits(teacher, eval_train_loader, device)
+    teacher_metrics = evaluate_model(teacher, val_loader, device)
+    logger.info(f"👩‍🏫 교사 검증 정확도 {teacher_metrics['accuracy']:.4f}, F1 {teacher_metrics['f1']:.4f}")
+
+    optimizer = torch.optim.AdamW(student.parameters(), lr=lr, weight_decay=0.01)
+    total_steps = len(train_loader) * epochs
+    scheduler = get_linear_schedule_with_warmup(optimizer, int(total_steps * 0.1), total_steps)
+
+    best = None
+    for epoch in range(epochs):
+        student.train()
+        train_sampler.set_epoch(epoch)
+        total_loss = 0.0
+        for step, batch in enumerate(train_loader, 1):
+            logits = student(**_model_inputs(batch, device)).logits
+            targets = soft_targets[batch["index"]].to(device)
+            loss = alpha * F.kl_div(
+                F.log_softmax(logits / temperature, dim=1),
+                F.softmax(targets / temperature, dim=1),
+                reduction="batchmean"
+            ) * temperature ** 2
+
+            labels = batch["labels"].to(device)
+            labeled = labels != UNLABELED
+            if labeled.any():
+                loss = loss + (1 - alpha) * F.cross_entropy(logits[labeled], labels[labeled])
+
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+            total_loss += loss.item()
+            if step % 50 == 0:
+                logger.info(f"epoch {epoch + 1} step {step}/{len(train_loader)} loss {total_loss / step:.4f}")
+
+        metrics = evaluate_model(student, val_loader, device)
+        logger.info(f"✅ epoch {epoch + 1}: 학생 검증 정확도 {metrics['accuracy']:.4f}, F1 {metrics['f1']:.4f}")
+        if best is None or metrics["accuracy"] > best["accuracy"]:
+            best = {"epoch": epoch + 1, "accuracy": metrics["accuracy"], "f1": metrics["f1"]}
+            student.save_pretrained(output_dir)
+            tokenizer.save_pretrained(output_dir)
+
+    # 저장된 최고 성능 학생으로 속도·성능 보고서 작성 (CPU 기준)
+    cpu = torch.device("cpu")
+    student = BertForSequenceClassification.from_pretrained(output_dir).to(cpu)
+    teacher = teacher.to(cpu)
+    teacher_time = _inference_seconds(teacher, val_loader, cpu)
+    student_time = _inference_seconds(student, val_loader, cpu)
+    report = {
+        "teacher": {
+            "path": teacher_path,
+            "layers": teacher.config.num_hidden_layers,
+            "parameters": sum(p.numel() for p in teacher.parameters()),
+            "accuracy": teacher_metrics["accuracy"],
+            "f1": teacher_metrics["f1"],
+            "val_cpu_seconds": teacher_time
+        },
+        "student": {
+            "path": output_dir,
+            "layers": num_layers,
+            "parameters": sum(p.numel() for p in student.parameters()),
+            "best_epoch": best["epoch"],
+            "accuracy": best["accuracy"],
+            "f1": best["f1"],
+            "val_cpu_seconds": student_time
+        },
+        "speedup": teacher_time / student_time if student_time else 0.0,
+        "accuracy_retained": best["accuracy"] / teacher_metrics["accuracy"] if teacher_metrics["accuracy"] else 0.0,
+        "f1_retained": best["f1"] / teacher_metrics["f1"] if teacher_metrics["f1"] else 0.0,
+        "temperature": temperature,
+        "alpha": alpha
+    }
+    with open(os.path.join(output_dir, "distill_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(
+        f"📊 학생 {num_layers}층: 속도 {report['speedup']:.2f}배, 정확도 유지 {report['accuracy_retained'] * 100:.1f}%, "
+        f"F1 유지 {report['f1_retained'] * 100:.1f}%"
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KoBERT 분류기 지식 증류")
+    parser.add_argument("--teacher", default="./model2")
+    parser.add_argument("--output-dir", default="./model2-student")
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=5e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--unlabeled-limit", type=int, default=None, help="MongoDB에서 가져올 라벨 없는 기사 수 (0이면 사용 안 함)")
+    parser.add_argument("--cache-dir", default=TOKEN_CACHE_DIR)
+    args = parser.parse_args()
+
+    report = distill(args.teacher, args.output_dir, args.layers, args.epochs, args.batch_size, args.lr,
+                     args.temperature, args.alpha, args.max_length, args.unlabeled_limit, args.cache_dir)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    logger.info(f"학생 모델 사용: CTN_CLASSIFIER_PATH={args.output_dir} python model_utils.py")
+
+
+if __name__ == "__main__":
+    main()
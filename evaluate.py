@@ -0,0 +1,176 @@
+import argparse
+import json
+import logging
+import time
+
+import model_utils
+from cache_utils import set_cache_enabled
+from dataset_utils import load_dataset, accuracy, VAL_DATASET_PATH
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# 위험도 구간 (대시보드 기준: 저위험 < 0.4 ≤ 중위험 < 0.7 ≤ 고위험)
+def risk_level(prob):
+    if prob >= 0.7:
+        return "high"
+    if prob >= 0.4:
+        return "medium"
+    return "low"
+
+
+# 기준 점수 대비 일치도
+def agreement(probs, reference):
+    """기준 점수와 비교한 라벨(0.5)·위험도 구간 일치율과 평균 확률 차이를 계산합니다."""
+    n = len(reference) or 1
+    return {
+        "label_agreement": sum(1 for p, r in zip(probs, reference) if (p >= 0.5) == (r >= 0.5)) / n,
+        "risk_agreement": sum(1 for p, r in zip(probs, reference) if risk_level(p) == risk_level(r)) / n,
+        "mean_abs_diff": sum(abs(p - r) for p, r in zip(probs, reference)) / n
+    }
+
+
+# 채점 함수 실행 시간 측정
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    return result, time.time() - start
+
+
+# ✅ 신뢰도 캐스케이드 평가
+def evaluate_cascade(rows, low=None, high=None):
+    """전체 경로 대비 캐스케이드의 전환 비율, 일치도, 정확도, 속도를 비교합니다."""
+    pairs = [(row["title"], row["body"]) for row in rows]
+    labels = [row["label"] for row in rows]
+
+    full, full_time = timed(model_utils.score_articles, pairs)
+
+    model_utils.cascade_stats.update(scored=0, escalated=0)
+    cascade, cascade_time = timed(model_utils.score_articles_cascade, pairs, low, high)
+    escalated = model_utils.cascade_stats["escalated"]
+
+    report = {
+        "samples": len(rows),
+        "band": [model_utils.CASCADE_LOW if low is None else low, model_utils.CASCADE_HIGH if high is None else high],
+        "escalated": escalated,
+        "escalation_rate": escalated / len(rows) if rows else 0.0,
+        "full": {"accuracy": accuracy(full, labels), "seconds": full_time},
+        "cascade": {"accuracy": accuracy(cascade, labels), "seconds": cascade_time},
+        "speedup": full_time / cascade_time if cascade_time else 0.0
+    }
+    report["cascade"].update(agreement(cascade, full))
+    logger.info(
+        f"📊 캐스케이드: {escalated}/{len(rows)}개 전환, "
+        f"라벨 일치율 {report['cascade']['label_agreement'] * 100:.2f}%, 속도 {report['speedup']:.2f}배"
+    )
+    return report
+
+
+# ✅ 요약 전략 비교
+def evaluate_summarizers(rows, strategies):
+    """요약 전략별 처리량과 분류 정확도, KoBART 기준 대비 일치도를 비교합니다."""
+    titles = [row["title"] for row in rows]
+    bodies = [row["body"] for row in rows]
+    labels = [row["label"] for row in rows]
+
+    results = {}
+    for strategy in strategies:
+        summaries, summarize_time = timed(model_utils.summarize_bodies, bodies, strategy)
+        probs, classify_time = timed(model_utils.predict_mismatch_batch, list(zip(titles, summaries)))
+        total = summarize_time + classify_time
+        results[strategy] = {
+            "probs": probs,
+            "accuracy": accuracy(probs, labels),
+            "summarize_seconds": summarize_time,
+            "total_seconds": total,
+            "articles_per_sec": len(rows) / total if total else 0.0
+        }
+        logger.info(
+            f"📊 {strategy}: 정확도 {results[strategy]['accuracy']:.4f}, "
+            f"{results[strategy]['articles_per_sec']:.2f}개/초"
+        )
+
+    reference = results["kobart"]["probs"] if "kobart" in results else None
+    report = {"samples": len(rows), "strategies": {}}
+    for strategy, result in results.items():
+        probs = result.pop("probs")
+        if reference is not None and strategy != "kobart":
+            result.update(agreement(probs, reference))
+        report["strategies"][strategy] = result
+    return report
+
+
+# ✅ 윈도우 단위 분류 평가
+def evaluate_windows(rows, aggregators):
+    """요약 + 분류 경로 대비 윈도우 단위 분류(집계 방식별)의 정확도·처리량·일치도를 비교합니다."""
+    pairs = [(row["title"], row["body"]) for row in rows]
+    labels = [row["label"] for row in rows]
+
+    full, full_time = timed(model_utils.score_articles, pairs)
+    report = {
+        "samples": len(rows),
+        "full": {
+            "accuracy": accuracy(full, labels),
+            "seconds": full_time,
+            "articles_per_sec": len(rows) / full_time if full_time else 0.0
+        },
+        "windows": {}
+    }
+
+    for aggregator in aggregators:
+        probs, elapsed = timed(model_utils.score_articles_windows, pairs, aggregator)
+        result = {
+            "accuracy": accuracy(probs, labels),
+            "seconds": elapsed,
+            "articles_per_sec": len(rows) / elapsed if elapsed else 0.0,
+            "speedup": full_time / elapsed if elapsed else 0.0
+        }
+        result.update(agreement(probs, full))
+        report["windows"][aggregator] = result
+        logger.info(f"📊 windows/{aggregator}: 정확도 {result['accuracy']:.4f}, 속도 {result['speedup']:.2f}배")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="채점 방식 정확도·처리량 평가")
+    parser.add_argument("--data", default=VAL_DATASET_PATH)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cascade_parser = sub.add_parser("cascade", help="신뢰도 캐스케이드 평가")
+    cascade_parser.add_argument("--low", type=float, default=None)
+    cascade_parser.add_argument("--high", type=float, default=None)
+
+    summarizer_parser = sub.add_parser("summarizers", help="요약 전략 처리량·정확도 비교")
+    summarizer_parser.add_argument("--strategies", nargs="+", default=list(model_utils.SUMMARIZERS),
+                                   choices=list(model_utils.SUMMARIZERS))
+
+    windows_parser = sub.add_parser("windows", help="윈도우 단위 분류 정확도·처리량 비교")
+    windows_parser.add_argument("--aggregators", nargs="+", default=["max", "mean", "attention"],
+                                choices=["max", "mean", "attention"])
+
+    args = parser.parse_args()
+
+    # 측정 중에는 결과 캐시를 사용하지 않음
+    set_cache_enabled(False)
+    model_utils.warmup()
+    rows = load_dataset(args.data, args.limit)
+
+    if args.command == "cascade":
+        report = evaluate_cascade(rows, args.low, args.high)
+    elif args.command == "summarizers":
+        report = evaluate_summarizers(rows, args.strategies)
+    elif args.command == "windows":
+        report = evaluate_windows(rows, args.aggregators)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
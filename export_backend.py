@@ -0,0 +1,115 @@
+import argparse
+import json
+import logging
+import os
+import time
+
+import model_utils
+from cache_utils import set_cache_enabled
+from dataset_utils import load_dataset, accuracy, VAL_DATASET_PATH
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ✅ ONNX 내보내기
+def export_onnx(out_dir=model_utils.ONNX_DIR):
+    """KoBERT 분류 모델과 KoBART 요약 모델을 ONNX로 내보냅니다."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTModelForSeq2SeqLM
+
+    classifier_dir = os.path.join(out_dir, "classifier")
+    classifier = ORTModelForSequenceClassification.from_pretrained(model_utils.CLASSIFIER_PATH, export=True)
+    classifier.save_pretrained(classifier_dir)
+    logger.info(f"✅ KoBERT ONNX 내보내기 완료: {classifier_dir}")
+
+    summarizer_dir = os.path.join(out_dir, "summarizer")
+    summarizer = ORTModelForSeq2SeqLM.from_pretrained(model_utils.SUMMARY_MODEL_NAME, export=True)
+    summarizer.save_pretrained(summarizer_dir)
+    logger.info(f"✅ KoBART ONNX 내보내기 완료: {summarizer_dir}")
+
+
+# ✅ 백엔드별 점수 계산
+def _score(rows, summarize):
+    """현재 백엔드로 데이터셋 확률과 소요 시간을 계산합니다."""
+    if summarize:
+        model_utils.warmup()
+    else:
+        model_utils.warmup("classifier")
+    start = time.time()
+    bodies = [row["body"] for row in rows]
+    if summarize:
+        bodies = model_utils.generate_summaries(bodies)
+    probs = model_utils.predict_mismatch_batch([(row["title"], body) for row, body in zip(rows, bodies)])
+    return probs, time.time() - start
+
+
+# ✅ fp32 기준 대비 정합성 검사
+def check_parity(backends, path=VAL_DATASET_PATH, limit=None, summarize=False):
+    """fp32 PyTorch 대비 각 백엔드의 확률 차이와 정확도 변화를 보고합니다."""
+    set_cache_enabled(False)
+    rows = load_dataset(path, limit)
+    labels = [row["label"] for row in rows]
+
+    model_utils.set_backend("torch")
+    baseline, baseline_time = _score(rows, summarize)
+    baseline_acc = accuracy(baseline, labels)
+    report = {
+        "dataset": path,
+        "samples": len(rows),
+        "summarize": summarize,
+        "baseline": {"backend": "torch", "accuracy": baseline_acc, "seconds": baseline_time},
+        "backends": []
+    }
+
+    for backend in backends:
+        model_utils.set_backend(backend)
+        probs, elapsed = _score(rows, summarize)
+        drift = [abs(p - b) for p, b in zip(probs, baseline)]
+        backend_acc = accuracy(probs, labels)
+        report["backends"].append({
+            "backend": backend,
+            "accuracy": backend_acc,
+            "accuracy_change": backend_acc - baseline_acc,
+            "mean_prob_drift": sum(drift) / len(drift) if drift else 0.0,
+            "max_prob_drift": max(drift) if drift else 0.0,
+            "label_flips": sum(1 for p, b in zip(probs, baseline) if (p >= 0.5) != (b >= 0.5)),
+            "seconds": elapsed,
+            "speedup": baseline_time / elapsed if elapsed else 0.0
+        })
+        logger.info(
+            f"📊 {backend}: 정확도 {backend_acc:.4f} ({backend_acc - baseline_acc:+.4f}), "
+            f"평균 확률 차이 {report['backends'][-1]['mean_prob_drift']:.5f}, 속도 {baseline_time / elapsed:.2f}배"
+        )
+
+    model_utils.set_backend("torch")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추론 백엔드 내보내기 및 정합성 검사")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="ONNX 모델 내보내기")
+    export_parser.add_argument("--out-dir", default=model_utils.ONNX_DIR)
+
+    parity_parser = sub.add_parser("parity", help="fp32 대비 확률 차이·정확도 검사")
+    parity_parser.add_argument("--backends", nargs="+", default=["int8", "onnx"], choices=model_utils.BACKENDS)
+    parity_parser.add_argument("--data", default=VAL_DATASET_PATH)
+    parity_parser.add_argument("--limit", type=int, default=None)
+    parity_parser.add_argument("--summarize", action="store_true", help="요약 모델까지 포함해 비교")
+    parity_parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.out_dir)
+    else:
+        report = check_parity(args.backends, args.data, args.limit, args.summarize)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
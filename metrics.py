@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 계측 설정
+# TRACE_PATH: 지정하면 측정 구간마다 JSON 한 줄(JSON Lines)로 기록
+METRICS_PREFIX = "ctn"
+TRACE_PATH = os.environ.get("CTN_TRACE_PATH") or None
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_histograms: Dict[str, Dict[LabelKey, Dict]] = {}
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_help: Dict[str, str] = {}
+_trace_lock = threading.Lock()
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def describe(name: str, text: str) -> None:
+    """/metrics 출력의 HELP 설명을 등록합니다."""
+    _help[name] = text
+
+
+# ✅ 카운터
+def increment(name: str, value: float = 1, **labels) -> None:
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+# ✅ 히스토그램 (초 단위)
+def observe(name: str, seconds: float, **labels) -> None:
+    key = _label_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+        entry["count"] += 1
+        entry["sum"] += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry["buckets"][i] += 1
+
+
+# ✅ JSON 트레이스
+def set_trace_path(path: Optional[str]) -> None:
+    """트레이스 파일 경로를 바꿉니다. None이면 트레이스를 끕니다."""
+    global TRACE_PATH
+    TRACE_PATH = path
+
+
+def _write_trace(name: str, labels: Dict[str, object], start: float, seconds: float, error: bool) -> None:
+    record = {
+        "name": name,
+        "labels": {k: str(v) for k, v in labels.items()},
+        "start": start,
+        "duration_ms": seconds * 1000,
+        "error": error,
+        "pid": os.getpid(),
+        "thread": threading.current_thread().name
+    }
+    try:
+        with _trace_lock, open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"⚠️ 트레이스 기록 실패: {e}")
+
+
+# ✅ 구간 측정
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    """
+    구간 실행 시간을 히스토그램 `<name>_seconds`에 기록하고 호출 수를 `<name>_total`에 셉니다.
+    예외가 나면 error="1" 라벨로 따로 셉니다.
+    """
+    wall = time.time()
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        observe(f"{name}_seconds", seconds, **labels)
+        increment(f"{name}_total", 1, error="1" if error else "0", **labels)
+        if TRACE_PATH:
+            _write_trace(name, labels, wall, seconds, error)
+
+
+def timed(name: str, **labels):
+    """함수 전체를 timer()로 감싸는 데코레이터"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ✅ Prometheus 텍스트 출력
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """수집한 카운터·히스토그램을 Prometheus 텍스트 형식(0.0.4)으로 반환합니다."""
+    with _lock:
+        counters = {name: dict(series) for name, series in _counters.items()}
+        histograms = {
+            name: {key: dict(entry, buckets=list(entry["buckets"])) for key, entry in series.items()}
+            for name, series in _histograms.items()
+        }
+
+    lines: List[str] = []
+    for name in sorted(counters):
+        metric = f"{METRICS_PREFIX}_{name}"
+        if name in _help:
+            lines.append(f"# HELP {metric} {_help[name]}")
+        lines.append(f"# TYPE {metric} counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{metric}{_format_labels(key)} {value}")
+
+    for name in sorted(histograms):
+        metric = f"{METRICS_PREFIX}_{name}"
+        if name in _help:
+            lines.append(f"# HELP {metric} {_help[name]}")
+        lines.append(f"# TYPE {metric} histogram")
+        for key, entry in sorted(histograms[name].items()):
+            for bound, count in zip(BUCKETS, entry["buckets"]):
+                lines.append(f"{metric}_bucket{_format_labels(key, (('le', repr(bound)),))} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(key, (('le', '+Inf'),))} {entry['count']}")
+            lines.append(f"{metric}_sum{_format_labels(key)} {entry['sum']}")
+            lines.append(f"{metric}_count{_format_labels(key)} {entry['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> Dict[str, Dict]:
+    """구간별 호출 수·합계·평균(초)을 사전으로 반환합니다. 로그나 보고서용"""
+    with _lock:
+        result = {}
+        for name, series in _histograms.items():
+            for key, entry in series.items():
+                label = ",".join(f"{k}={v}" for k, v in key)
+                result[f"{name}{{{label}}}" if label else name] = {
+                    "count": entry["count"],
+                    "sum": entry["sum"],
+                    "mean": entry["sum"] / entry["count"] if entry["count"] else 0.0
+                }
+        return result
+
+
+def log_timings() -> None:
+    """구간별 누적 시간을 많이 쓴 순서대로 로그로 남깁니다."""
+    timings = sorted(snapshot().items(), key=lambda item: item[1]["sum"], reverse=True)
+    for name, entry in timings:
+        logger.info(f"⏱ {name}: {entry['count']}회, 합계 {entry['sum']:.2f}초, 평균 {entry['mean'] * 1000:.1f}ms")
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+describe("stage_seconds", "추론 단계별 실행 시간 (tokenize / summarize / classify)")
+describe("stage_total", "추론 단계 호출 수")
+describe("mongo_seconds", "MongoDB 읽기·쓰기 실행 시간")
+describe("mongo_total", "MongoDB 읽기·쓰기 호출 수")
+describe("mongo_documents_total", "MongoDB에서 읽거나 쓴 문서 수")
+describe("http_request_seconds", "Flask 요청 처리 시간")
+describe("http_request_total", "Flask 요청 수")
@@ -1,45 +1,166 @@
 from transformers import BertTokenizer, BertForSequenceClassification
 import torch
 import torch.nn.functional as F
+import argparse
+import collections
+import functools
+import hashlib
+import itertools
 import logging
+import multiprocessing
+import os
+import threading
 import time
 from tqdm import tqdm
-from db_utils import get_news_without_probability, update_news_probability, batch_update_probabilities, get_collection_stats
+from batching import plan_token_batches, padding_stats, log_padding_stats
+from summarizers import lead_summaries, textrank_summaries
+from cache_utils import get_cache, make_key, SUMMARY_NAMESPACE, PROBABILITY_NAMESPACE
+from dedup_utils import resolve_duplicate, index_article
+from metrics import timer, log_timings
+from db_utils import (
+    iter_news_without_probability, batch_update_probabilities, get_collection_stats,
+    get_collection, get_collection_names, content_hash, iter_stale_news, iter_changed_news
+)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 모델 경로
+CLASSIFIER_PATH = os.environ.get("CTN_CLASSIFIER_PATH", "./model2")
+SUMMARY_MODEL_NAME = "digit82/kobart-summarization"
+
+# ✅ 추론 백엔드 설정
+# torch: 기본 fp32 PyTorch / int8: PyTorch 동적 int8 양자화 (CPU) / onnx: ONNX Runtime (CPU, export_backend.py로 내보낸 모델)
+BACKENDS = ("torch", "int8", "onnx")
+BACKEND = os.environ.get("CTN_BACKEND", "torch")
+ONNX_DIR = os.environ.get("CTN_ONNX_DIR", "./onnx")
+
+def _select_device():
+    # int8 / onnx 백엔드는 CPU 전용
+    if BACKEND == "torch" and torch.cuda.is_available():
+        return torch.device("cuda")
+    return torch.device("cpu")
+
 # GPU 사용 가능 여부 확인
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-logger.info(f"사용 중인 디바이스: {device}")
-
-# KoBERT 불러오기
-try:
-    tokenizer = BertTokenizer.from_pretrained("./model2")
-    model = BertForSequenceClassification.from_pretrained("./model2")
-    model.to(device)
-    model.eval()
-    logger.info("KoBERT 모델 로딩 완료")
-except Exception as e:
-    logger.error(f"KoBERT 모델 로딩 실패: {e}")
-    raise
-
-# KoBART 요약 관련 모듈
-try:
-    from transformers import PreTrainedTokenizerFast, BartForConditionalGeneration
-    import re
-
-    summary_tokenizer = PreTrainedTokenizerFast.from_pretrained("digit82/kobart-summarization")
-    summary_model = BartForConditionalGeneration.from_pretrained("digit82/kobart-summarization")
-    summary_model.to(device)
-    summary_model.eval()
-    logger.info("KoBART 요약 모델 로딩 완료")
-except Exception as e:
-    logger.error(f"KoBART 모델 로딩 실패: {e}")
-    # 요약 기능 없이도 동작하도록 설정
-    summary_model = None
-    summary_tokenizer = None
+device = _select_device()
+
+# ✅ 지연 로딩 모델 레지스트리
+# 모델은 처음 사용할 때 한 번만 로딩되며, warmup()으로 미리 로딩할 수 있습니다.
+_registry = {}
+_registry_lock = threading.Lock()
+# register_model()로 직접 등록한 모델 (워커 프로세스에도 그대로 넘김)
+_injected = {}
+
+def _quantize(model):
+    """Linear 레이어를 동적 int8로 양자화합니다."""
+    return torch.quantization.quantize_dynamic(model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8)
+
+def _load_classifier():
+    """KoBERT 분류 모델을 불러옵니다."""
+    try:
+        tokenizer = BertTokenizer.from_pretrained(CLASSIFIER_PATH)
+        if BACKEND == "onnx":
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            model = ORTModelForSequenceClassification.from_pretrained(os.path.join(ONNX_DIR, "classifier"))
+        else:
+            model = BertForSequenceClassification.from_pretrained(CLASSIFIER_PATH)
+            model.to(device)
+            model.eval()
+            if BACKEND == "int8":
+                model = _quantize(model)
+        logger.info(f"KoBERT 모델 로딩 완료 (백엔드: {BACKEND})")
+        return tokenizer, model
+    except Exception as e:
+        logger.error(f"KoBERT 모델 로딩 실패: {e}")
+        raise
+
+def _load_summarizer():
+    """KoBART 요약 모델을 불러옵니다. 실패하면 (None, None)을 반환합니다."""
+    try:
+        from transformers import PreTrainedTokenizerFast, BartForConditionalGeneration
+
+        summary_tokenizer = PreTrainedTokenizerFast.from_pretrained(SUMMARY_MODEL_NAME)
+        if BACKEND == "onnx":
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            summary_model = ORTModelForSeq2SeqLM.from_pretrained(os.path.join(ONNX_DIR, "summarizer"))
+        else:
+            summary_model = BartForConditionalGeneration.from_pretrained(SUMMARY_MODEL_NAME)
+            summary_model.to(device)
+            summary_model.eval()
+            if BACKEND == "int8":
+                summary_model = _quantize(summary_model)
+        logger.info(f"KoBART 요약 모델 로딩 완료 (백엔드: {BACKEND})")
+        return summary_tokenizer, summary_model
+    except Exception as e:
+        logger.error(f"KoBART 모델 로딩 실패: {e}")
+        # 요약 기능 없이도 동작하도록 설정
+        return None, None
+
+_LOADERS = {
+    "classifier": _load_classifier,
+    "summarizer": _load_summarizer,
+}
+
+def get_model(name):
+    """등록된 모델의 (토크나이저, 모델)을 반환합니다. 처음 호출될 때 로딩합니다."""
+    if name not in _registry:
+        with _registry_lock:
+            if name not in _registry:
+                _registry[name] = _LOADERS[name]()
+    return _registry[name]
+
+def register_model(name, tokenizer, model):
+    """레지스트리에 이미 만들어진 (토크나이저, 모델)을 등록합니다. 벤치마크·테스트용 작은 모델 주입에 사용합니다."""
+    if name not in _LOADERS:
+        raise ValueError(f"알 수 없는 모델: {name}")
+    with _registry_lock:
+        _registry[name] = (tokenizer, model)
+        _injected[name] = (tokenizer, model)
+
+def set_backend(name):
+    """추론 백엔드를 바꾸고, 이미 로딩된 모델은 다음 사용 시 다시 로딩되도록 비웁니다."""
+    global BACKEND, device
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 백엔드: {name} (가능: {', '.join(BACKENDS)})")
+    with _registry_lock:
+        BACKEND = name
+        device = _select_device()
+        _registry.clear()
+        _injected.clear()
+
+def warmup(*names):
+    """지정한 모델(기본: 전체)을 미리 로딩합니다."""
+    for name in names or _LOADERS:
+        get_model(name)
+
+# ✅ 채점 결과의 모델 버전
+# MODEL_VERSION을 지정하면 그대로 사용하고, 없으면 모델 파일 내용·채점 설정으로 계산
+MODEL_VERSION = os.environ.get("CTN_MODEL_VERSION") or None
+
+@functools.lru_cache(maxsize=None)
+def _content_fingerprint(name_or_path):
+    """로컬 모델 디렉터리의 파일 내용 해시. 복사·재배포로 수정 시각만 바뀐 경우에는 그대로입니다."""
+    if not os.path.isdir(name_or_path):
+        return name_or_path
+    digest = hashlib.sha256()
+    for fname in sorted(os.listdir(name_or_path)):
+        fpath = os.path.join(name_or_path, fname)
+        if not os.path.isfile(fpath):
+            continue
+        digest.update(fname.encode())
+        with open(fpath, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def get_model_version(mode=None):
+    """기사에 함께 저장하는 모델 버전. 분류기·요약 모델·백엔드·요약 전략·채점 모드 중 하나라도 바뀌면 달라집니다."""
+    if MODEL_VERSION:
+        return MODEL_VERSION
+    mode = mode or SCORING_MODE
+    summary_id = _content_fingerprint(SUMMARY_MODEL_NAME) if SUMMARIZER == "kobart" and mode != "windows" else ""
+    return make_key(_content_fingerprint(CLASSIFIER_PATH), summary_id, BACKEND, SUMMARIZER, mode)[:12]
 
 # ✅ 본문 슬라이딩
 def sliding_window(text, window=300, step=150):
@@ -60,63 +181,383 @@ def sliding_window(text, window=300, step=150):
             break
     return slices
 
-# ✅ 슬라이스 요약
-def summarize_slices(slices):
-    """텍스트 슬라이스들을 요약합니다."""
-    if not summary_model or not summary_tokenizer:
-        return slices  # 요약 모델이 없으면 원본 반환
+# ✅ 토큰 단위 슬라이딩
+# 윈도우 크기와 이동 간격은 토큰 수 기준 (겹침 = SUMMARY_WINDOW_TOKENS - SUMMARY_WINDOW_STRIDE)
+SUMMARY_WINDOW_TOKENS = 512
+SUMMARY_WINDOW_STRIDE = 256
+
+def sliding_window_ids(input_ids, window=SUMMARY_WINDOW_TOKENS, step=SUMMARY_WINDOW_STRIDE):
+    """토큰 ID 시퀀스를 슬라이딩 윈도우로 분할합니다."""
+    if not input_ids:
+        return []
     
-    summaries = []
-    for chunk in slices:
+    if len(input_ids) <= window:
+        return [list(input_ids)]
+    
+    windows = []
+    for i in range(0, len(input_ids), step):
+        windows.append(list(input_ids[i:i+window]))
+        if i + window >= len(input_ids):
+            break
+    return windows
+
+# ✅ 요약 배치 설정
+# SUMMARY_BATCH_SIZE: 한 번의 generate 호출에 묶는 최대 슬라이스 수
+# SUMMARY_MAX_BATCH_TOKENS: 패딩 포함 입력 토큰 수 상한 (배치 크기 × 최장 길이), 메모리 사용량 제한용
+SUMMARY_BATCH_SIZE = 8
+SUMMARY_MAX_BATCH_TOKENS = 4096
+
+# ✅ 분류 배치 설정 (길이순 정렬 후 토큰 예산으로 배치 구성)
+CLASSIFIER_BATCH_SIZE = 64
+CLASSIFIER_MAX_BATCH_TOKENS = 8192
+
+def _summarize_windows(windows, batch_size=None, max_batch_tokens=None):
+    """토큰 ID 윈도우들을 패딩 배치로 묶어 요약하고, 입력 순서대로 요약을 반환합니다."""
+    summary_tokenizer, summary_model = get_model("summarizer")
+    batch_size = batch_size or SUMMARY_BATCH_SIZE
+    max_batch_tokens = max_batch_tokens or SUMMARY_MAX_BATCH_TOKENS
+
+    summaries = [None] * len(windows)
+
+    lengths = [len(ids) for ids in windows]
+    for batch in plan_token_batches(lengths, max_batch_tokens, batch_size):
+        padding_stats["summarizer"].record([lengths[i] for i in batch])
         try:
-            inputs = summary_tokenizer(
-                chunk, 
-                return_tensors="pt", 
-                max_length=512, 
-                truncation=True
+            padded = summary_tokenizer.pad(
+                {"input_ids": [windows[i] for i in batch]},
+                return_tensors="pt"
             )
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-            
-            with torch.no_grad():
+            with torch.no_grad(), timer("stage", stage="summarize"):
                 summary_ids = summary_model.generate(
-                    inputs['input_ids'],
+                    padded["input_ids"].to(device),
+                    attention_mask=padded["attention_mask"].to(device),
                     max_length=64,
                     num_beams=4,
                     early_stopping=True,
                     pad_token_id=summary_tokenizer.pad_token_id
                 )
-            summary = summary_tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-            summaries.append(summary)
+            decoded = summary_tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+            for i, summary in zip(batch, decoded):
+                summaries[i] = summary
         except Exception as e:
-            logger.warning(f"슬라이스 요약 실패: {e}")
-            summaries.append(chunk[:200])  # 실패시 앞부분만 사용
-    
+            logger.warning(f"슬라이스 배치 요약 실패: {e}")
+            for i in batch:
+                # 실패시 앞부분만 사용
+                summaries[i] = summary_tokenizer.decode(windows[i], skip_special_tokens=True)[:200]
+
     return summaries
 
-# ✅ 전체 본문 요약
-def generate_summary(body_text):
-    """본문을 요약합니다."""
-    if not body_text or not body_text.strip():
-        return ""
+# ✅ 슬라이스 요약
+def summarize_slices(slices):
+    """텍스트 슬라이스들을 요약합니다."""
+    summary_tokenizer, summary_model = get_model("summarizer")
+    if not summary_model or not summary_tokenizer:
+        return slices  # 요약 모델이 없으면 원본 반환
     
+    with timer("stage", stage="tokenize", model="summarizer"):
+        encoded = [
+            summary_tokenizer(chunk, max_length=SUMMARY_WINDOW_TOKENS, truncation=True)["input_ids"]
+            for chunk in slices
+        ]
+    return _summarize_windows(encoded)
+
+# ✅ 요약 캐시
+def _summary_cache_key(body):
+    summary_id = f"{_content_fingerprint(SUMMARY_MODEL_NAME)}|{BACKEND}|{SUMMARY_WINDOW_TOKENS}/{SUMMARY_WINDOW_STRIDE}"
+    return make_key(summary_id, body)
+
+def get_cached_summary(body):
+    """캐시에 저장된 KoBART 요약을 반환합니다. 없으면 None을 반환합니다."""
+    cache = get_cache()
+    return cache.get(SUMMARY_NAMESPACE, _summary_cache_key(body)) if cache else None
+
+def put_cached_summary(body, summary):
+    """다른 기사에서 가져온 요약을 이 본문의 요약으로 캐시에 저장합니다."""
+    cache = get_cache()
+    if cache and summary:
+        cache.set(SUMMARY_NAMESPACE, _summary_cache_key(body), summary)
+
+# ✅ 요약 입력 준비 (캐시 조회 → 토크나이징 → 윈도우 분할)
+def prepare_summaries(bodies):
+    """본문들의 요약 작업 상태를 만듭니다. 짧은 본문과 캐시 적중분은 이 단계에서 결과가 확정됩니다."""
+    state = {"results": ["" for _ in bodies], "windows": [], "owners": [], "keys": {}}
+    cache = get_cache()
+
+    # 같은 본문을 이미 요약했다면 캐시 사용 (모두 적중하면 요약 모델을 로딩하지 않음)
+    todo = []
+    for i, body in enumerate(bodies):
+        if not body or not body.strip():
+            continue
+        if cache:
+            state["keys"][i] = _summary_cache_key(body)
+            cached = cache.get(SUMMARY_NAMESPACE, state["keys"][i])
+            if cached is not None:
+                state["results"][i] = cached
+                continue
+        todo.append(i)
+    if not todo:
+        return state
+
+    summary_tokenizer, summary_model = get_model("summarizer")
     if not summary_model or not summary_tokenizer:
         # 요약 모델이 없으면 앞부분만 사용
-        return body_text[:1000]
-    
-    try:
-        tokenized = summary_tokenizer(body_text, return_tensors="pt", truncation=False)
-        
-        # 토큰 길이가 512 이하면 그대로 반환
-        if tokenized['input_ids'].shape[1] <= 512:
-            return body_text
+        for i in todo:
+            state["results"][i] = bodies[i][:1000]
+        return state
+
+    for i in todo:
+        body = bodies[i]
+        try:
+            # 본문은 한 번만 토크나이징하고 그 ID를 그대로 윈도우로 사용
+            with timer("stage", stage="tokenize", model="summarizer"):
+                input_ids = summary_tokenizer(body, truncation=False)["input_ids"]
+
+            # 토큰 길이가 윈도우 이하면 그대로 사용
+            if len(input_ids) <= SUMMARY_WINDOW_TOKENS:
+                state["results"][i] = body
+                continue
+
+            # 토큰 윈도우로 분할 후 다른 기사 윈도우와 함께 요약
+            for window in sliding_window_ids(input_ids):
+                state["windows"].append(window)
+                state["owners"].append(i)
+        except Exception as e:
+            logger.warning(f"본문 요약 실패: {e}")
+            state["results"][i] = body[:1000]  # 실패시 앞부분만 사용
+
+    return state
+
+# ✅ 준비된 윈도우 요약
+def run_summaries(state, batch_size=None, max_batch_tokens=None):
+    """prepare_summaries()가 만든 윈도우를 요약해 기사별 요약 목록을 반환합니다."""
+    results = state["results"]
+    if not state["windows"]:
+        return results
+
+    cache = get_cache()
+    summaries = _summarize_windows(state["windows"], batch_size, max_batch_tokens)
+    grouped = {}
+    for owner, summary in zip(state["owners"], summaries):
+        grouped.setdefault(owner, []).append(summary)
+    for owner, parts in grouped.items():
+        results[owner] = ' '.join(parts)
+        if cache and owner in state["keys"]:
+            cache.set(SUMMARY_NAMESPACE, state["keys"][owner], results[owner])
+
+    return results
+
+# ✅ 여러 기사 본문 일괄 요약
+def generate_summaries(bodies, batch_size=None, max_batch_tokens=None):
+    """여러 본문을 요약합니다. 긴 본문의 슬라이스는 기사 경계를 넘어 한 배치로 묶입니다."""
+    return run_summaries(prepare_summaries(bodies), batch_size, max_batch_tokens)
+
+# ✅ 전체 본문 요약
+def generate_summary(body_text):
+    """본문을 요약합니다."""
+    return generate_summaries([body_text])[0]
+
+# ✅ 요약 전략
+# kobart: KoBART 추상 요약 (기본) / lead: 앞 k문장 / textrank: TF-IDF TextRank 추출 요약
+SUMMARIZER = os.environ.get("CTN_SUMMARIZER", "kobart")
+SUMMARIZERS = {
+    "kobart": generate_summaries,
+    "lead": lead_summaries,
+    "textrank": textrank_summaries,
+}
+
+def set_summarizer(name):
+    """이번 실행에서 사용할 요약 전략을 고릅니다."""
+    global SUMMARIZER
+    if name not in SUMMARIZERS:
+        raise ValueError(f"지원하지 않는 요약 전략: {name} (가능: {', '.join(SUMMARIZERS)})")
+    SUMMARIZER = name
+
+def get_summarizer():
+    """현재 요약 전략 이름을 반환합니다."""
+    return SUMMARIZER
+
+def summarize_bodies(bodies, strategy=None):
+    """선택한 요약 전략으로 여러 본문을 요약합니다."""
+    return SUMMARIZERS[strategy or SUMMARIZER](bodies)
+
+# ✅ KoBERT 배치 불일치 확률 계산
+def _classify_encoded(encoded, batch_size=CLASSIFIER_BATCH_SIZE, max_batch_tokens=CLASSIFIER_MAX_BATCH_TOKENS):
+    """토크나이징된 입력(패딩 없음)을 길이별 배치로 분류해 입력 순서대로 로짓 [정상, 불일치]을 반환합니다."""
+    tokenizer, model = get_model("classifier")
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    logits = [None] * len(lengths)
+
+    for batch in plan_token_batches(lengths, max_batch_tokens, batch_size):
+        padding_stats["classifier"].record([lengths[i] for i in batch])
+
+        # 배치 내 최장 길이에 맞춰 동적 패딩
+        inputs = tokenizer.pad(
+            {key: [values[i] for i in batch] for key, values in encoded.items()},
+            return_tensors="pt"
+        )
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+        with torch.no_grad(), timer("stage", stage="classify"):
+            outputs = model(**inputs)
+
+        # 원래 순서로 되돌려 기록
+        for i, row in zip(batch, outputs.logits.tolist()):
+            logits[i] = row
+
+    return logits
+
+def predict_mismatch_batch(pairs, batch_size=CLASSIFIER_BATCH_SIZE, max_batch_tokens=CLASSIFIER_MAX_BATCH_TOKENS):
+    """(제목, 요약 본문) 쌍 리스트의 불일치 확률을 배치 단위로 계산합니다."""
+    tokenizer, _ = get_model("classifier")
+    if not pairs:
+        return []
+
+    # 패딩 없이 한 번 토크나이징한 뒤 길이가 비슷한 것끼리 묶음
+    with timer("stage", stage="tokenize", model="classifier"):
+        encoded = tokenizer(
+            [title for title, _ in pairs],
+            [body for _, body in pairs],
+            truncation=True,
+            max_length=512
+        )
+    logits = torch.tensor(_classify_encoded(encoded, batch_size, max_batch_tokens))
+    return F.softmax(logits, dim=1)[:, 1].tolist()
+
+# ✅ 윈도우 단위 분류 설정 (요약 없이 제목 + 본문 512 토큰 윈도우마다 분류 후 집계)
+# WINDOW_AGGREGATOR: max / mean / attention (불일치 로짓 softmax 가중 평균)
+WINDOW_AGGREGATOR = os.environ.get("CTN_WINDOW_AGGREGATOR", "max")
+WINDOW_STRIDE = 256
+WINDOW_MAX_TITLE_TOKENS = 64
+
+def _aggregate_windows(window_logits, aggregator):
+    """한 기사의 윈도우별 로짓을 하나의 불일치 확률로 합칩니다."""
+    logits = torch.tensor(window_logits)
+    probs = F.softmax(logits, dim=1)[:, 1]
+    if aggregator == "max":
+        return probs.max().item()
+    if aggregator == "mean":
+        return probs.mean().item()
+    if aggregator == "attention":
+        weights = F.softmax(logits[:, 1] - logits[:, 0], dim=0)
+        return (weights * probs).sum().item()
+    raise ValueError(f"지원하지 않는 집계 방식: {aggregator}")
+
+def score_articles_windows(pairs, aggregator=None):
+    """본문을 요약하지 않고 제목과 모든 본문 윈도우를 한 번에 분류한 뒤 기사별로 집계합니다."""
+    aggregator = aggregator or WINDOW_AGGREGATOR
+    tokenizer, _ = get_model("classifier")
+    if not pairs:
+        return []
+
+    encoded = {"input_ids": [], "token_type_ids": [], "attention_mask": []}
+    owners = []
+    with timer("stage", stage="tokenize", model="classifier"):
+        for i, (title, body) in enumerate(pairs):
+            title_ids = tokenizer.encode(title, add_special_tokens=False)[:WINDOW_MAX_TITLE_TOKENS]
+            body_ids = tokenizer.encode(body, add_special_tokens=False)
+            window = 512 - len(title_ids) - tokenizer.num_special_tokens_to_add(pair=True)
+            for body_window in sliding_window_ids(body_ids, window, min(WINDOW_STRIDE, window)) or [[]]:
+                input_ids = tokenizer.build_inputs_with_special_tokens(title_ids, body_window)
+                encoded["input_ids"].append(input_ids)
+                encoded["token_type_ids"].append(tokenizer.create_token_type_ids_from_sequences(title_ids, body_window))
+                encoded["attention_mask"].append([1] * len(input_ids))
+                owners.append(i)
+
+    grouped = [[] for _ in pairs]
+    for owner, row in zip(owners, _classify_encoded(encoded)):
+        grouped[owner].append(row)
+    return [_aggregate_windows(rows, aggregator) for rows in grouped]
+
+# ✅ 요약 + 분류 (캐시 우선)
+def _probability_cache_id():
+    """
+    확률 캐시 키의 모델 부분 (분류기·요약 모델 내용, 윈도우 설정, 백엔드, 요약 전략).
+    KoBART 로딩에 실패해 본문 앞부분으로 채점한 결과는 실제 요약 결과와 섞이지 않도록 다른 키를 씁니다.
+    """
+    summary_id = ""
+    if SUMMARIZER == "kobart":
+        loaded = _registry.get("summarizer")
+        if loaded is not None and loaded[1] is None:
+            summary_id = "unavailable"
         else:
-            # 슬라이딩 윈도우로 분할 후 요약
-            slices = sliding_window(body_text)
-            summaries = summarize_slices(slices)
-            return ' '.join(summaries)
-    except Exception as e:
-        logger.warning(f"본문 요약 실패: {e}")
-        return body_text[:1000]  # 실패시 앞부분만 사용
+            summary_id = f"{_content_fingerprint(SUMMARY_MODEL_NAME)}|{SUMMARY_WINDOW_TOKENS}/{SUMMARY_WINDOW_STRIDE}"
+    return f"{_content_fingerprint(CLASSIFIER_PATH)}|{summary_id}|{BACKEND}|{SUMMARIZER}"
+
+def lookup_probabilities(pairs):
+    """(제목, 원문 본문) 쌍의 캐시된 확률(없으면 None)과 저장할 때 쓸 (제목, 본문) 목록을 반환합니다."""
+    cache = get_cache()
+    probabilities = [None] * len(pairs)
+    keys = {}
+    if cache:
+        probability_id = _probability_cache_id()
+        for i, (title, body) in enumerate(pairs):
+            keys[i] = (title, body)
+            probabilities[i] = cache.get(PROBABILITY_NAMESPACE, make_key(probability_id, title, body))
+    return probabilities, keys
+
+def store_probabilities(keys, scored):
+    """lookup_probabilities()가 돌려준 목록으로 새로 계산한 (인덱스, 확률)을 캐시에 저장합니다."""
+    cache = get_cache()
+    if not cache:
+        return
+    # 조회 이후 요약 모델 로딩이 실패했을 수 있으므로 키는 저장 시점에 다시 계산
+    probability_id = _probability_cache_id()
+    for i, prob in scored:
+        if i in keys:
+            cache.set(PROBABILITY_NAMESPACE, make_key(probability_id, *keys[i]), prob)
+
+def score_articles(pairs):
+    """(제목, 원문 본문) 쌍 리스트의 불일치 확률을 계산합니다. 캐시에 있는 기사는 모델을 건너뜁니다."""
+    probabilities, keys = lookup_probabilities(pairs)
+
+    todo = [i for i, prob in enumerate(probabilities) if prob is None]
+    if todo:
+        summaries = summarize_bodies([pairs[i][1] for i in todo])
+        probs = predict_mismatch_batch([(pairs[i][0], summary) for i, summary in zip(todo, summaries)])
+        for i, prob in zip(todo, probs):
+            probabilities[i] = prob
+        store_probabilities(keys, zip(todo, probs))
+
+    return probabilities
+
+# ✅ 신뢰도 캐스케이드 설정
+# 1차: 요약 없이 제목 + 본문 앞부분(512 토큰까지 잘림)으로 KoBERT 채점
+# 1차 확률이 [CASCADE_LOW, CASCADE_HIGH] 구간에 있는 기사만 요약을 포함한 전체 경로로 다시 채점
+CASCADE_LOW = float(os.environ.get("CTN_CASCADE_LOW", "0.3"))
+CASCADE_HIGH = float(os.environ.get("CTN_CASCADE_HIGH", "0.8"))
+
+cascade_stats = {"scored": 0, "escalated": 0}
+_cascade_lock = threading.Lock()
+
+def score_articles_cascade(pairs, low=None, high=None):
+    """1차 점수가 애매한 기사만 요약 경로로 보내는 2단계 채점을 합니다."""
+    low = CASCADE_LOW if low is None else low
+    high = CASCADE_HIGH if high is None else high
+
+    probabilities = predict_mismatch_batch(pairs)
+    escalate = [i for i, prob in enumerate(probabilities) if low <= prob <= high]
+    if escalate:
+        full = score_articles([pairs[i] for i in escalate])
+        for i, prob in zip(escalate, full):
+            probabilities[i] = prob
+
+    with _cascade_lock:
+        cascade_stats["scored"] += len(pairs)
+        cascade_stats["escalated"] += len(escalate)
+    return probabilities
+
+# ✅ 채점 모드
+# full: 요약 + 분류 / cascade: 신뢰도 캐스케이드 / windows: 요약 없이 윈도우 단위 분류 후 집계
+SCORING_MODE = os.environ.get("CTN_SCORING_MODE", "full")
+SCORING_MODES = {
+    "full": score_articles,
+    "cascade": score_articles_cascade,
+    "windows": score_articles_windows,
+}
+
+def score_with_mode(pairs, mode=None):
+    """선택한 채점 모드로 (제목, 원문 본문) 쌍 리스트의 불일치 확률을 계산합니다."""
+    return SCORING_MODES[mode or SCORING_MODE](pairs)
 
 # ✅ KoBERT 불일치 확률 계산
 def get_mismatch_probability(title, body):
@@ -126,96 +567,267 @@ def get_mismatch_probability(title, body):
         return 0.0
     
     try:
-        # 본문 요약
-        summarized_body = generate_summary(body)
-        
-        # 토크나이징
-        inputs = tokenizer(
-            title, 
-            summarized_body, 
-            return_tensors="pt", 
-            truncation=True, 
-            padding=True,
-            max_length=512
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        # 예측
-        with torch.no_grad():
-            outputs = model(**inputs)
-            probs = F.softmax(outputs.logits, dim=1)
-            mismatch_prob = probs[0][1].item()
-        
-        return mismatch_prob
+        return score_articles([(title, body)])[0]
     
     except Exception as e:
         logger.error(f"확률 계산 실패: {e}")
         return 0.0
 
+# ✅ 병렬 처리 설정
+# SCORING_WORKERS: 점수 계산 프로세스 수 (1이면 단일 프로세스)
+# THREADS_PER_WORKER: 프로세스당 torch 스레드 수 (0이면 CPU 코어 수 / 프로세스 수)
+SCORING_WORKERS = int(os.environ.get("CTN_WORKERS", "1"))
+THREADS_PER_WORKER = int(os.environ.get("CTN_THREADS_PER_WORKER", "0"))
+
+# ✅ 배치 요약·점수 계산
+def _score_chunk(chunk, mode=None):
+    """(뉴스 ID, 제목, 본문) 묶음을 한 번에 요약·채점해 (뉴스 ID, 확률) 목록을 반환합니다."""
+    if not chunk:
+        return []
+    try:
+        probs = score_with_mode([(title, body) for _, title, body in chunk], mode)
+    except Exception as e:
+        logger.error(f"배치 확률 계산 실패: {e}")
+        return []
+    return [(news_id, prob) for (news_id, _, _), prob in zip(chunk, probs)]
+
+def _init_worker(threads, summarizer, backend, injected):
+    """워커 프로세스마다 스레드 수·요약 전략·백엔드와 직접 등록한 모델을 부모와 맞추고 모델을 한 번만 로딩합니다."""
+    torch.set_num_threads(threads)
+    set_summarizer(summarizer)
+    if backend != BACKEND:
+        set_backend(backend)
+    for name, (tokenizer, model) in injected.items():
+        register_model(name, tokenizer, model)
+    warmup()
+
+# ✅ 워커 통계 (패딩·캐스케이드·캐시는 프로세스마다 따로 쌓이므로 결과와 함께 부모로 보냄)
+def _take_worker_stats():
+    stats = {"padding": {}, "cascade": {}, "cache": {}}
+    for stage, values in padding_stats.items():
+        stats["padding"][stage] = values.as_dict()
+        values.reset()
+    with _cascade_lock:
+        stats["cascade"] = dict(cascade_stats)
+        cascade_stats.update(scored=0, escalated=0)
+    cache = get_cache()
+    if cache:
+        stats["cache"] = {"hits": cache.hits, "misses": cache.misses}
+        cache.hits = cache.misses = 0
+    return stats
+
+def _merge_worker_stats(stats):
+    for stage, values in stats["padding"].items():
+        padding_stats[stage].merge(values)
+    with _cascade_lock:
+        for key, value in stats["cascade"].items():
+            cascade_stats[key] += value
+    cache = get_cache()
+    if cache and stats["cache"]:
+        cache.hits += stats["cache"]["hits"]
+        cache.misses += stats["cache"]["misses"]
+
+def _score_chunk_in_worker(chunk, mode=None):
+    """워커 프로세스용 _score_chunk. 결과와 함께 이 묶음에서 쌓인 통계를 반환합니다."""
+    return _score_chunk(chunk, mode), _take_worker_stats()
+
+def _iter_scored_items(items, workers, threads_per_worker, mode=None):
+    """
+    ("score", 묶음) 항목은 채점해서, ("inherited", 업데이트) 항목은 그대로 (종류, 업데이트)로 넣은 순서대로 내보냅니다.
+    items는 항상 호출한 스레드에서 읽고, 워커 풀에는 워커 수의 두 배까지만 묶음을 미리 넘겨 메모리를 일정하게 유지합니다.
+    """
+    if workers <= 1:
+        if threads_per_worker:
+            torch.set_num_threads(threads_per_worker)
+        warmup()
+        for kind, payload in items:
+            yield kind, _score_chunk(payload, mode) if kind == "score" else payload
+        return
+
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"워커 {workers}개 × 스레드 {threads}개로 처리합니다.")
+    ctx = multiprocessing.get_context("spawn")
+    initargs = (threads, SUMMARIZER, BACKEND, dict(_injected))
+    with ctx.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        in_flight = collections.deque()
+        for kind, payload in items:
+            if kind == "score":
+                payload = pool.apply_async(_score_chunk_in_worker, (payload, mode))
+            in_flight.append((kind, payload))
+            while len(in_flight) > workers * 2:
+                yield _resolve_item(*in_flight.popleft())
+        while in_flight:
+            yield _resolve_item(*in_flight.popleft())
+
+def _resolve_item(kind, payload):
+    if kind != "score":
+        return kind, payload
+    updates, stats = payload.get()
+    _merge_worker_stats(stats)
+    return kind, updates
+
+def _iter_score_items(news_iter, batch_size, model_version, articles, counts):
+    """
+    채점 대상 뉴스를 읽는 대로 ("score", 묶음)으로 나눕니다. 제목·본문이 비어 있으면 counts["skipped"]에 셉니다.
+    중복 기사는 같은 버전의 기존 결과를 ("inherited", 업데이트) 묶음으로 내보내 저장은 호출한 쪽에서 합니다.
+    """
+    pending = []
+    inherited_updates = []
+    for news in news_iter:
+        title = news.get("title", "").strip()
+        body = news.get("body", "").strip()
+        if not title or not body:
+            counts["skipped"] += 1
+            continue
+
+        articles[news["_id"]] = (title, body)
+        inherited = resolve_duplicate(title, body, model_version)
+        if inherited:
+            put_cached_summary(body, inherited["summary"])
+            inherited_updates.append((news["_id"], inherited["probability"]))
+            if len(inherited_updates) >= batch_size:
+                yield "inherited", inherited_updates
+                inherited_updates = []
+            continue
+
+        pending.append((news["_id"], title, body))
+        if len(pending) >= batch_size:
+            yield "score", pending
+            pending = []
+    if inherited_updates:
+        yield "inherited", inherited_updates
+    if pending:
+        yield "score", pending
+
+# ✅ 채점 결과를 중복 인덱스에 등록
+def index_scored_articles(updates, articles, collection_name, model_version=None):
+    """채점된 (뉴스 ID, 확률)을 요약과 함께 중복 인덱스에 등록해 이후 사본이 재사용할 수 있게 합니다."""
+    for news_id, prob in updates:
+        title, body = articles[news_id]
+        index_article(news_id, collection_name, title, body, prob, get_cached_summary(body), model_version)
+
+# ✅ 채점 결과 저장 (확률 + 모델 버전 + 내용 해시) 후 중복 인덱스 등록
+def write_scored_articles(updates, articles, collection_name, model_version):
+    hashes = {news_id: content_hash(*articles[news_id]) for news_id, _ in updates}
+    batch_update_probabilities(updates, model_version, hashes, collection_name)
+    index_scored_articles(updates, articles, collection_name, model_version)
+
 # ✅ 전체 뉴스 처리 (개선된 버전)
-def update_all_mismatch_probabilities(batch_size=10, max_news=None):
-    """모든 뉴스의 불일치 확률을 계산하고 업데이트합니다."""
+def update_all_mismatch_probabilities(batch_size=10, max_news=None, workers=None, threads_per_worker=None,
+                                      mode=None, summarizer=None):
+    """
+    모든 뉴스의 불일치 확률을 계산하고 업데이트합니다.
+    확률값이 없는 뉴스를 페이지 단위로 읽으면서 batch_size개씩 모아 길이별 배치로 요약·분류한 뒤, 원래 순서대로 DB에 반영합니다.
+    workers가 2 이상이면 묶음을 여러 프로세스에 나눠 채점하고, DB 쓰기는 메인 프로세스가 모아서 합니다.
+    mode로 채점 모드(SCORING_MODES)를, summarizer로 요약 전략(SUMMARIZERS)을 고를 수 있습니다.
+    """
+    if summarizer:
+        set_summarizer(summarizer)
+    workers = workers or SCORING_WORKERS
+    threads_per_worker = threads_per_worker or THREADS_PER_WORKER
+    model_version = get_model_version(mode)
     
     # 통계 정보 출력
     stats = get_collection_stats()
     if stats:
         logger.info(f"처리 전 통계: {stats}")
     
-    # 확률값이 없는 뉴스만 가져오기
-    news_list = get_news_without_probability(limit=max_news)
-    
-    if not news_list:
+    # 확률값이 없는 뉴스를 _id 키셋 페이지로 읽으면서 바로 채점·저장 (읽기와 쓰기가 같은 컬렉션을 쓰도록 한 번만 결정)
+    collection_name = get_collection().name
+    total = stats["without_probability"] if stats else None
+    if total is not None and max_news is not None:
+        total = min(total, max_news)
+    if total == 0:
         logger.info("처리할 뉴스가 없습니다.")
         return
     
-    logger.info(f"총 {len(news_list)}개의 뉴스를 처리합니다.")
+    counts = {"scored": 0, "inherited": 0, "skipped": 0}
+    articles = {}
+    news_iter = iter_news_without_probability(limit=max_news, batch_size=batch_size * 5,
+                                              collection_name=collection_name)
+    items = _iter_score_items(news_iter, batch_size, model_version, articles, counts)
+    # 진행률 표시와 함께 처리 (배치 단위로 요약·분류 및 업데이트, 저장한 기사는 메모리에서 제거)
+    with tqdm(total=total, desc="뉴스 처리 중") as progress:
+        for kind, updates in _iter_scored_items(items, workers, threads_per_worker, mode):
+            if updates:
+                write_scored_articles(updates, articles, collection_name, model_version)
+                counts["scored" if kind == "score" else "inherited"] += len(updates)
+                for news_id, _ in updates:
+                    articles.pop(news_id, None)
+            progress.update(len(updates))
     
-    processed_count = 0
-    batch_updates = []
-    
-    # 진행률 표시와 함께 처리
-    for i, news in enumerate(tqdm(news_list, desc="뉴스 처리 중")):
-        try:
-            title = news.get("title", "").strip()
-            body = news.get("body", "").strip()
-            
-            if not title or not body:
-                logger.warning(f"뉴스 ID {news['_id']}: 제목 또는 본문이 비어있습니다.")
-                continue
-            
-            # 확률 계산
-            prob = get_mismatch_probability(title, body)
-            batch_updates.append((news["_id"], prob))
-            processed_count += 1
-            
-            # 배치 단위로 업데이트
-            if len(batch_updates) >= batch_size:
-                batch_update_probabilities(batch_updates)
-                batch_updates = []
-            
-        except Exception as e:
-            logger.error(f"뉴스 ID {news.get('_id')} 처리 실패: {e}")
-            continue
+    logger.info(
+        f"처리 완료: 모델 채점 {counts['scored']}개, 중복 결과 재사용 {counts['inherited']}개, "
+        f"건너뜀 {counts['skipped']}개"
+    )
     
-    # 남은 데이터 처리
-    if batch_updates:
-        batch_update_probabilities(batch_updates)
-    
-    logger.info(f"처리 완료: {processed_count}개 뉴스")
+    log_padding_stats()
+    if cascade_stats["scored"]:
+        logger.info(f"캐스케이드: {cascade_stats['scored']}개 중 {cascade_stats['escalated']}개 요약 경로로 전환")
+    cache = get_cache()
+    if cache:
+        logger.info(f"캐시 통계: {cache.stats()}")
+    # 패딩·캐스케이드·캐시 통계는 워커 결과와 함께 합쳐지지만, 추론 단계 시간은 각 워커에 쌓이므로 메인 프로세스 구간만 표시됨
+    log_timings()
     
     # 최종 통계 출력
     final_stats = get_collection_stats()
     if final_stats:
         logger.info(f"처리 후 통계: {final_stats}")
 
+# ✅ 모델 버전 기준 증분 재채점
+def rescore_stale_articles(batch_size=20, max_news=None, workers=None, threads_per_worker=None,
+                           mode=None, summarizer=None, verify_content=False, collection_names=None):
+    """
+    현재 모델 버전으로 채점되지 않은 뉴스(확률 없음, 이전 버전)만 최신 컬렉션·최신 기사부터 다시 채점합니다.
+    verify_content가 True면 현재 버전 기사 중 제목·본문 해시가 달라진 기사도 다시 채점합니다 (전체 스캔).
+    묶음마다 결과와 모델 버전을 바로 저장하므로, 중단한 뒤 다시 실행하면 남은 기사부터 이어서 처리합니다.
+    """
+    if summarizer:
+        set_summarizer(summarizer)
+    workers = workers or SCORING_WORKERS
+    threads_per_worker = threads_per_worker or THREADS_PER_WORKER
+    model_version = get_model_version(mode)
+    collection_names = collection_names or list(reversed(get_collection_names()))
+    logger.info(f"모델 버전 {model_version} 기준으로 재채점합니다. (컬렉션 {len(collection_names)}개)")
+
+    counts = {"scored": 0, "inherited": 0, "skipped": 0}
+    for collection_name in collection_names:
+        remaining = None if max_news is None else max_news - counts["scored"] - counts["inherited"]
+        if remaining is not None and remaining <= 0:
+            break
+
+        news_iter = iter_stale_news(model_version, collection_name, limit=remaining, page_size=batch_size * 5)
+        if verify_content:
+            changed = iter_changed_news(model_version, collection_name)
+            news_iter = itertools.islice(itertools.chain(news_iter, changed), remaining)
+
+        articles = {}
+        items = _iter_score_items(news_iter, batch_size, model_version, articles, counts)
+        with tqdm(desc=f"재채점 {collection_name}", unit="개") as progress:
+            for kind, updates in _iter_scored_items(items, workers, threads_per_worker, mode):
+                if updates:
+                    write_scored_articles(updates, articles, collection_name, model_version)
+                    counts["scored" if kind == "score" else "inherited"] += len(updates)
+                    for news_id, _ in updates:
+                        articles.pop(news_id, None)
+                progress.update(len(updates))
+
+    logger.info(
+        f"재채점 완료: 모델 채점 {counts['scored']}개, 중복 결과 재사용 {counts['inherited']}개, "
+        f"건너뜀 {counts['skipped']}개"
+    )
+    log_padding_stats()
+    log_timings()
+    return counts
+
 # ✅ 특정 뉴스 처리
 def update_single_news_probability(news_id):
     """특정 뉴스 하나의 확률을 계산하고 업데이트합니다."""
     try:
-        from db_utils import collection
         from bson import ObjectId
         
-        news = collection.find_one({"_id": ObjectId(news_id)}, {"title": 1, "body": 1})
+        news = get_collection().find_one({"_id": ObjectId(news_id)}, {"title": 1, "body": 1})
         if not news:
             logger.error(f"뉴스 ID {news_id}를 찾을 수 없습니다.")
             return False
@@ -228,7 +840,11 @@ def update_single_news_probability(news_id):
             return False
         
         prob = get_mismatch_probability(title, body)
-        return update_news_probability(news_id, prob)
+        # get_mismatch_probability()는 full 모드로 채점
+        updated = batch_update_probabilities(
+            [(news["_id"], prob)], get_model_version("full"), {news["_id"]: content_hash(title, body)}
+        )
+        return updated > 0
         
     except Exception as e:
         logger.error(f"단일 뉴스 처리 실패: {e}")
@@ -237,11 +853,22 @@ def update_single_news_probability(news_id):
 # ✅ 메인 실행 함수
 def main():
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="뉴스 불일치 확률 계산")
+    parser.add_argument("--rescore", action="store_true", help="현재 모델 버전이 아닌 기사를 모든 컬렉션에서 최신순으로 재채점")
+    parser.add_argument("--verify-content", action="store_true", help="재채점 시 내용이 바뀐 기사도 확인 (전체 스캔)")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--max-news", type=int, default=201)
+    args = parser.parse_args()
+
     logger.info("뉴스 불일치 확률 계산 시작")
+    logger.info(f"사용 중인 디바이스: {device}")
     start_time = time.time()
     
-    # 전체 뉴스 처리 (배치 크기 20, 최대 100개)
-    update_all_mismatch_probabilities(batch_size=20, max_news=201)
+    if args.rescore:
+        rescore_stale_articles(batch_size=args.batch_size, max_news=args.max_news, verify_content=args.verify_content)
+    else:
+        # 전체 뉴스 처리 (배치 크기 20, 최대 201개)
+        update_all_mismatch_probabilities(batch_size=args.batch_size, max_news=args.max_news)
     
     end_time = time.time()
     logger.info(f"처리 완료. 소요 시간: {end_time - start_time:.2f}초")
@@ -0,0 +1,186 @@
+import functools
+import logging
+import queue
+import threading
+import time
+
+from model_utils import (
+    prepare_summaries, run_summaries, predict_mismatch_batch,
+    lookup_probabilities, store_probabilities, warmup,
+    get_summarizer, summarize_bodies, put_cached_summary, index_scored_articles, get_model_version,
+    score_with_mode, SCORING_MODE
+)
+from dedup_utils import resolve_duplicate, index_article
+from db_utils import iter_news_without_probability, batch_update_probabilities, get_collection, content_hash
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 스트리밍 설정
+# CHUNK_SIZE: 단계 사이를 오가는 기사 묶음 크기
+# QUEUE_SIZE: 단계 사이 큐에 쌓일 수 있는 최대 묶음 수 (가득 차면 앞 단계가 대기)
+# WRITE_BATCH_SIZE: 한 번의 bulk_write에 모으는 업데이트 수
+CHUNK_SIZE = 16
+QUEUE_SIZE = 4
+WRITE_BATCH_SIZE = 100
+
+_DONE = object()
+
+
+# ✅ 1단계: Mongo 커서 읽기 (근사 중복 기사는 기존 결과를 바로 쓰기 단계로 전달)
+def _read_stage(outbox, write_box, max_news, chunk_size, collection_name, model_version):
+    chunk = []
+    try:
+        for news in iter_news_without_probability(limit=max_news, batch_size=chunk_size * QUEUE_SIZE,
+                                                  collection_name=collection_name):
+            title = news.get("title", "").strip()
+            body = news.get("body", "").strip()
+            if not title or not body:
+                logger.warning(f"뉴스 ID {news['_id']}: 제목 또는 본문이 비어있습니다.")
+                continue
+            inherited = resolve_duplicate(title, body, model_version)
+            if inherited:
+                put_cached_summary(body, inherited["summary"])
+                index_article(news["_id"], collection_name, title, body,
+                              inherited["probability"], inherited["summary"], model_version)
+                write_box.put([(news["_id"], inherited["probability"], content_hash(title, body))])
+                continue
+            chunk.append((news["_id"], title, body))
+            if len(chunk) >= chunk_size:
+                outbox.put((collection_name, chunk))
+                chunk = []
+        if chunk:
+            outbox.put((collection_name, chunk))
+    except Exception as e:
+        logger.error(f"❌ 뉴스 읽기 실패: {e}")
+    finally:
+        outbox.put(_DONE)
+
+
+# ✅ 2단계: 캐시 조회 + 토크나이징
+def _tokenize(item, mode="full"):
+    collection_name, chunk = item
+    if mode != "full":
+        # 요약 + 분류 경로가 아닌 모드는 분류 단계에서 score_with_mode로 한 번에 채점
+        return {"chunk": chunk, "probabilities": [None] * len(chunk), "keys": {}, "todo": list(range(len(chunk))),
+                "collection": collection_name}
+    probabilities, keys = lookup_probabilities([(title, body) for _, title, body in chunk])
+    todo = [i for i, prob in enumerate(probabilities) if prob is None]
+    bodies = [chunk[i][2] for i in todo]
+    if get_summarizer() == "kobart":
+        state = prepare_summaries(bodies)
+    else:
+        # 추출 요약 전략은 이 단계에서 바로 끝남
+        state = {"results": summarize_bodies(bodies), "windows": []}
+    return {"chunk": chunk, "probabilities": probabilities, "keys": keys, "todo": todo, "state": state,
+            "collection": collection_name}
+
+
+# ✅ 3단계: 요약
+def _summarize(job):
+    if "state" in job:
+        job["summaries"] = run_summaries(job["state"])
+    return job
+
+
+# ✅ 4단계: 분류
+def _classify(job, model_version=None, mode="full"):
+    chunk, todo = job["chunk"], job["todo"]
+    if todo and mode != "full":
+        probs = score_with_mode([(chunk[i][1], chunk[i][2]) for i in todo], mode)
+        for i, prob in zip(todo, probs):
+            job["probabilities"][i] = prob
+    elif todo:
+        probs = predict_mismatch_batch([(chunk[i][1], summary) for i, summary in zip(todo, job["summaries"])])
+        for i, prob in zip(todo, probs):
+            job["probabilities"][i] = prob
+        store_probabilities(job["keys"], zip(todo, probs))
+    updates = [(news_id, prob) for (news_id, _, _), prob in zip(chunk, job["probabilities"])]
+    index_scored_articles(updates, {news_id: (title, body) for news_id, title, body in chunk}, job["collection"],
+                          model_version)
+    # 쓰기 단계로는 (뉴스 ID, 확률, 내용 해시)를 전달
+    return [(news_id, prob, content_hash(title, body))
+            for (news_id, title, body), prob in zip(chunk, job["probabilities"])]
+
+
+# 중간 단계 공통 루프
+# 실패한 묶음은 result["failed"]에 기사 수를 세고 넘어감 (저장되지 않은 기사는 확률이 없으므로 다음 실행에서 다시 처리)
+def _run_stage(name, func, inbox, outbox, result):
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            outbox.put(_DONE)
+            return
+        try:
+            outbox.put(func(item))
+        except Exception as e:
+            failed = len(item[1] if isinstance(item, tuple) else item["chunk"])
+            with result["lock"]:
+                result["failed"] += failed
+            logger.error(f"❌ {name} 단계 실패, 기사 {failed}개 묶음을 건너뜁니다: {e}")
+
+
+# ✅ 5단계: 일괄 쓰기
+def _write_stage(inbox, write_batch_size, result, collection_name, model_version):
+    buffer = []
+    while True:
+        item = inbox.get()
+        if item is not _DONE:
+            buffer.extend(item)
+        if buffer and (item is _DONE or len(buffer) >= write_batch_size):
+            batch_update_probabilities([(news_id, prob) for news_id, prob, _ in buffer], model_version,
+                                       {news_id: digest for news_id, _, digest in buffer}, collection_name)
+            result["written"] += len(buffer)
+            buffer = []
+        if item is _DONE:
+            return
+
+
+# ✅ 스트리밍 파이프라인 실행
+def run_streaming_pipeline(max_news=None, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE,
+                           write_batch_size=WRITE_BATCH_SIZE, mode=None):
+    """
+    커서 읽기 → 토크나이징 → 요약 → 분류 → 일괄 쓰기를 각각의 스레드로 실행합니다.
+    단계 사이 큐의 크기가 제한되어 있어, 처리할 뉴스가 많아도 메모리 사용량이 일정합니다.
+    mode(기본: SCORING_MODE)가 full이 아니면 요약 단계를 건너뛰고 분류 단계에서 해당 모드로 채점합니다.
+    """
+    mode = mode or SCORING_MODE
+    warmup()
+    start_time = time.time()
+
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+    result = {"written": 0, "failed": 0, "lock": threading.Lock()}
+    # 읽기·중복 인덱스·쓰기가 모두 같은 컬렉션을 쓰도록 시작할 때 한 번만 결정
+    collection_name = get_collection().name
+    model_version = get_model_version(mode)
+    threads = [
+        threading.Thread(target=_read_stage,
+                         args=(queues[0], queues[3], max_news, chunk_size, collection_name, model_version),
+                         name="reader"),
+        threading.Thread(target=_run_stage,
+                         args=("토크나이징", functools.partial(_tokenize, mode=mode), queues[0], queues[1], result),
+                         name="tokenize"),
+        threading.Thread(target=_run_stage, args=("요약", _summarize, queues[1], queues[2], result), name="summarize"),
+        threading.Thread(target=_run_stage,
+                         args=("분류", functools.partial(_classify, model_version=model_version, mode=mode),
+                               queues[2], queues[3], result),
+                         name="classify"),
+        threading.Thread(target=_write_stage,
+                         args=(queues[3], write_batch_size, result, collection_name, model_version),
+                         name="writer"),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.time() - start_time
+    logger.info(f"스트리밍 처리 완료: {result['written']}개 뉴스, 소요 시간: {elapsed:.2f}초")
+    if result["failed"]:
+        logger.warning(f"⚠️ 처리 실패로 건너뛴 기사 {result['failed']}개 (다음 실행에서 다시 채점)")
+    return result["written"]
+
+
+if __name__ == "__main__":
+    run_streaming_pipeline()
@@ -0,0 +1,276 @@
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from db_utils import get_db, get_meta_collection, get_collection_names_in_range, COLLECTION_DATE_FORMAT, DateLike
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ✅ 대시보드 지표 기준 (app.py의 집계와 롤업이 함께 사용)
+ENGAGEMENT_LIKE_WEIGHT = 0.3
+ENGAGEMENT_COMMENT_WEIGHT = 0.7
+MEDIUM_RISK_THRESHOLD = 0.4
+HIGH_RISK_THRESHOLD = 0.7
+MEDIUM_ENGAGEMENT_THRESHOLD = 10
+HIGH_ENGAGEMENT_THRESHOLD = 20
+CONTROVERSIAL_THRESHOLD = 2.0
+MEDIA_MIN_ARTICLES = 3
+UNKNOWN_MEDIA = "알 수 없음"
+
+# 분포 구간 (하한, 이름) - 대시보드 카드와 같은 기준
+# 위험도: 저위험 < 0.4 ≤ 중위험 < 0.7 ≤ 고위험 / 참여도: 저참여 < 10 ≤ 중참여 < 20 ≤ 고참여
+# 구간을 바꾸면 이미 쌓인 롤업은 python rollup_utils.py rebuild로 다시 만들어야 함
+ENGAGEMENT_BUCKETS = [(0, "low"), (MEDIUM_ENGAGEMENT_THRESHOLD, "medium"), (HIGH_ENGAGEMENT_THRESHOLD, "high")]
+RISK_BUCKETS = [(0.0, "low"), (MEDIUM_RISK_THRESHOLD, "medium"), (HIGH_RISK_THRESHOLD, "high")]
+
+# (일, 언론사)별 롤업 컬렉션 (news_meta DB)
+ROLLUP_COLLECTION = "daily_media_rollup"
+
+
+def calculate_engagement_score(like_count, comment_count):
+    """
+    참여도 점수 계산
+    공감수와 댓글수를 가중평균하여 참여도 산출
+    """
+    # 댓글이 공감보다 더 높은 참여를 의미하므로 가중치 부여
+    return (like_count * ENGAGEMENT_LIKE_WEIGHT) + (comment_count * ENGAGEMENT_COMMENT_WEIGHT)
+
+
+def calculate_controversial_ratio(like_count, comment_count):
+    """
+    화제성 지표 계산
+    댓글 대 공감 비율이 높을수록 화제성이 높음
+    """
+    if like_count == 0:
+        return comment_count if comment_count > 0 else 0
+    return comment_count / like_count
+
+
+def _bucket(value: float, buckets: List[Tuple[float, str]]) -> str:
+    label = buckets[0][1]
+    for lower, name in buckets:
+        if value >= lower:
+            label = name
+    return label
+
+
+def collection_day(collection_name: str) -> Optional[str]:
+    """일별 컬렉션 이름("2025.06.09")을 롤업의 day("2025-06-09")로 바꿉니다. 날짜 형식이 아니면 None"""
+    try:
+        return datetime.strptime(collection_name, COLLECTION_DATE_FORMAT).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _media(doc: Dict) -> str:
+    return doc.get("media") or UNKNOWN_MEDIA
+
+
+# ✅ 기사 하나가 롤업에 더하는 값
+def _base_contribution(doc: Dict) -> Dict[str, float]:
+    likes = doc.get("like_count") or 0
+    comments = doc.get("comment_count") or 0
+    engagement = calculate_engagement_score(likes, comments)
+    return {
+        "count": 1,
+        "likes_sum": likes,
+        "comments_sum": comments,
+        "engagement_sum": engagement,
+        "high_engagement_count": int(engagement >= HIGH_ENGAGEMENT_THRESHOLD),
+        "controversial_count": int(calculate_controversial_ratio(likes, comments) >= CONTROVERSIAL_THRESHOLD),
+        f"engagement_buckets.{_bucket(engagement, ENGAGEMENT_BUCKETS)}": 1,
+    }
+
+
+def _probability_contribution(prob: Optional[float]) -> Dict[str, float]:
+    if prob is None:
+        return {"risk_buckets.unscored": 1}
+    return {
+        "scored_count": 1,
+        "prob_sum": prob,
+        "high_risk_count": int(prob >= HIGH_RISK_THRESHOLD),
+        f"risk_buckets.{_bucket(prob, RISK_BUCKETS)}": 1,
+    }
+
+
+def _add(target: Dict[str, float], delta: Dict[str, float], sign: int = 1) -> None:
+    for key, value in delta.items():
+        target[key] = target.get(key, 0) + sign * value
+
+
+def _apply(day: str, deltas: Dict[str, Dict[str, float]]) -> None:
+    operations = []
+    for media, inc in deltas.items():
+        inc = {k: v for k, v in inc.items() if v}
+        if not inc:
+            continue
+        operations.append(UpdateOne(
+            {"_id": f"{day}|{media}"},
+            {"$inc": inc, "$set": {"day": day, "media": media, "updated_at": datetime.now()}},
+            upsert=True
+        ))
+    if operations:
+        get_meta_collection(ROLLUP_COLLECTION).bulk_write(operations, ordered=False)
+
+
+# ✅ 증분 반영
+def record_articles(collection_name: str, docs: Iterable[Dict]) -> None:
+    """새로 저장된 기사(크롤러)를 롤업에 더합니다."""
+    day = collection_day(collection_name)
+    if day is None:
+        return
+    deltas = defaultdict(dict)
+    for doc in docs:
+        _add(deltas[_media(doc)], _base_contribution(doc))
+        _add(deltas[_media(doc)], _probability_contribution(doc.get("mismatch_probability")))
+    _apply(day, deltas)
+
+
+def record_probability_changes(collection_name: str, changes: Iterable[Tuple[str, Optional[float], float]]) -> None:
+    """(언론사, 이전 확률 또는 None, 새 확률) 목록을 받아 이전 값을 빼고 새 값을 더합니다."""
+    day = collection_day(collection_name)
+    if day is None:
+        return
+    deltas = defaultdict(dict)
+    for media, old_prob, new_prob in changes:
+        _add(deltas[media or UNKNOWN_MEDIA], _probability_contribution(old_prob), -1)
+        _add(deltas[media or UNKNOWN_MEDIA], _probability_contribution(new_prob))
+    _apply(day, deltas)
+
+
+# ✅ 재구축 (복구용)
+def rebuild_rollup(start: DateLike = None, end: DateLike = None) -> int:
+    """
+    날짜 범위의 일별 컬렉션을 다시 읽어 해당 날짜의 롤업을 새로 만듭니다.
+    증분 반영과 같은 계산 함수를 쓰며, 쓰기 작업(크롤러·채점)이 없을 때 실행하는 것이 안전합니다.
+    """
+    rollup = get_meta_collection(ROLLUP_COLLECTION)
+    rebuilt = 0
+    for name in get_collection_names_in_range(start, end):
+        day = collection_day(name)
+        deltas = defaultdict(dict)
+        projection = {"_id": 0, "media": 1, "mismatch_probability": 1, "like_count": 1, "comment_count": 1}
+        for doc in get_db()[name].find({}, projection):
+            _add(deltas[_media(doc)], _base_contribution(doc))
+            _add(deltas[_media(doc)], _probability_contribution(doc.get("mismatch_probability")))
+
+        rollup.delete_many({"day": day})
+        _apply(day, deltas)
+        rebuilt += 1
+        logger.info(f"🔁 {day}: 언론사 {len(deltas)}곳 롤업 재구축")
+    return rebuilt
+
+
+def ensure_rollup_index() -> None:
+    get_meta_collection(ROLLUP_COLLECTION).create_index("day")
+
+
+# ✅ 조회
+def read_rollup(start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+    """start/end(YYYY-MM-DD) 범위의 (일, 언론사) 롤업 문서를 반환합니다."""
+    query = {}
+    if start or end:
+        query["day"] = {}
+        if start:
+            query["day"]["$gte"] = start
+        if end:
+            query["day"]["$lte"] = end
+    return list(get_meta_collection(ROLLUP_COLLECTION).find(query, {"_id": 0, "updated_at": 0}))
+
+
+def _media_stats(media_totals: Dict[str, Dict[str, int]]) -> List[Dict]:
+    # 기사 MEDIA_MIN_ARTICLES개 이상인 언론사만, 고위험 비율 높은 순
+    media_stats = [
+        dict(values, media=media, high_risk_ratio=values["high_risk_articles"] / values["total_articles"])
+        for media, values in media_totals.items()
+        if values["total_articles"] >= MEDIA_MIN_ARTICLES
+    ]
+    media_stats.sort(key=lambda x: (-x["high_risk_ratio"], x["media"]))
+    return media_stats
+
+
+def analyze_media_trustworthiness(articles: Iterable[Dict]) -> List[Dict]:
+    """
+    언론사별 신뢰도 분석 (기사 목록에서 직접 계산, summarize_rollup의 media_stats와 같은 형식)
+    - 고위험 기사(불일치율 ≥ HIGH_RISK_THRESHOLD) 비율 기준 정렬
+    - 고위험 기사 비율, 총 기사 수 포함
+    """
+    media_totals = defaultdict(lambda: {"total_articles": 0, "high_risk_articles": 0})
+    for article in articles:
+        values = media_totals[_media(article)]
+        values["total_articles"] += 1
+        values["high_risk_articles"] += (article.get("mismatch_probability") or 0) >= HIGH_RISK_THRESHOLD
+    return _media_stats(media_totals)
+
+
+def summarize_rollup(rows: List[Dict]) -> Dict:
+    """롤업 문서들을 대시보드 통계(상단 지표 + 언론사 신뢰도)로 합칩니다."""
+    totals = defaultdict(float)
+    media_totals = defaultdict(lambda: {"total_articles": 0, "high_risk_articles": 0})
+    for row in rows:
+        for key in ("count", "prob_sum", "high_risk_count", "likes_sum", "comments_sum",
+                    "engagement_sum", "high_engagement_count", "controversial_count"):
+            totals[key] += row.get(key, 0)
+        media_totals[row["media"]]["total_articles"] += row.get("count", 0)
+        media_totals[row["media"]]["high_risk_articles"] += row.get("high_risk_count", 0)
+
+    count = totals["count"]
+    return {
+        "total_articles": int(count),
+        "high_mismatch_count": int(totals["high_risk_count"]),
+        # 확률이 없는 기사는 0으로 취급 (기존 대시보드와 동일)
+        "avg_mismatch": totals["prob_sum"] / count if count else 0,
+        "total_likes": int(totals["likes_sum"]),
+        "total_comments": int(totals["comments_sum"]),
+        "avg_engagement": totals["engagement_sum"] / count if count else 0,
+        "high_engagement_count": int(totals["high_engagement_count"]),
+        "controversial_count": int(totals["controversial_count"]),
+        "media_stats": _media_stats(media_totals)
+    }
+
+
+def daily_trend(rows: List[Dict]) -> List[Dict]:
+    """롤업 문서들을 날짜별 추이(기사 수, 고위험 수, 평균 불일치율, 위험 분포)로 합칩니다."""
+    days = defaultdict(lambda: defaultdict(float))
+    for row in rows:
+        day = days[row["day"]]
+        for key in ("count", "prob_sum", "high_risk_count", "engagement_sum"):
+            day[key] += row.get(key, 0)
+        for name, value in (row.get("risk_buckets") or {}).items():
+            day[f"risk_{name}"] += value
+    trend = []
+    for day, values in sorted(days.items()):
+        count = values["count"]
+        trend.append({
+            "day": day,
+            "total_articles": int(count),
+            "high_mismatch_count": int(values["high_risk_count"]),
+            "avg_mismatch": values["prob_sum"] / count if count else 0,
+            "avg_engagement": values["engagement_sum"] / count if count else 0,
+            "risk_buckets": {name: int(values[f"risk_{name}"]) for _, name in RISK_BUCKETS + [(None, "unscored")]}
+        })
+    return trend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="(일, 언론사)별 통계 롤업 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="일별 컬렉션을 다시 읽어 롤업 재구축")
+    rebuild.add_argument("--start", help="시작 날짜 (YYYY-MM-DD)")
+    rebuild.add_argument("--end", help="끝 날짜 (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        ensure_rollup_index()
+        count = rebuild_rollup(args.start, args.end)
+        logger.info(f"✅ 롤업 재구축 완료: {count}일")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple, Union
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 마이크로 배치 설정
+# PREDICT_MAX_WAIT_MS: 첫 요청이 들어온 뒤 다른 요청을 기다리는 최대 시간
+# PREDICT_MAX_BATCH: 한 번의 forward에 묶는 최대 요청 수
+PREDICT_MAX_WAIT_MS = float(os.environ.get("CTN_PREDICT_MAX_WAIT_MS", "15"))
+PREDICT_MAX_BATCH = int(os.environ.get("CTN_PREDICT_MAX_BATCH", "32"))
+LATENCY_WINDOW = 10000
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class MicroBatcher:
+    """동시에 들어온 채점 요청을 짧은 대기 시간 안에 모아 한 번의 배치 추론으로 처리합니다."""
+
+    def __init__(self, max_wait_ms: float = PREDICT_MAX_WAIT_MS, max_batch: int = PREDICT_MAX_BATCH):
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[str, str, Future, float]]" = queue.Queue()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, title: str, body: str) -> Future:
+        """채점 요청을 큐에 넣고 결과를 받을 Future를 반환합니다."""
+        future = Future()
+        self._queue.put((title, body, future, time.perf_counter()))
+        return future
+
+    def predict(self, title: str, body: str, timeout: Optional[float] = None) -> float:
+        return self.submit(title, body).result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[str, str, Future, float]]:
+        # 첫 요청은 무기한 대기, 이후에는 마감 시간까지 최대 max_batch개 수집
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        from model_utils import score_articles
+
+        while True:
+            batch = self._collect()
+            try:
+                probs = score_articles([(title, body) for title, body, _, _ in batch])
+                for (_, _, future, _), prob in zip(batch, probs):
+                    future.set_result(prob)
+            except Exception as e:
+                logger.error(f"❌ 배치 예측 실패: {e}")
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+
+            now = time.perf_counter()
+            with self._lock:
+                self._batch_sizes.append(len(batch))
+                for _, _, _, submitted in batch:
+                    self._latencies.append((now - submitted) * 1000)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """최근 요청들의 지연 시간 백분위수(ms)와 평균 배치 크기를 반환합니다."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+        return _stats(latencies, batch_sizes, self.max_wait * 1000, self.max_batch)
+
+
+def _stats(latencies: List[float], batch_sizes: List[int], max_wait_ms: float,
+           max_batch: int) -> Dict[str, Union[int, float]]:
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "avg_batch_size": sum(batch_sizes) / len(batch_sizes) if batch_sizes else 0.0,
+        "max_wait_ms": max_wait_ms,
+        "max_batch": max_batch
+    }
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+# 공용 배처 (처음 요청 시 시작)
+def get_batcher() -> MicroBatcher:
+    """
+    모델을 먼저 로딩한 뒤 배처 스레드를 시작합니다.
+    로딩에 실패하면 예외가 그대로 올라가고 배처를 만들지 않으므로, 다음 요청에서 다시 시도합니다.
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from model_utils import warmup
+
+                warmup()
+                _batcher = MicroBatcher()
+    return _batcher
+
+
+def get_batcher_stats() -> Dict[str, Union[int, float]]:
+    """배처 통계. 아직 요청이 없어 배처가 없으면 모델을 로딩하지 않고 빈 통계를 반환합니다."""
+    batcher = _batcher
+    if batcher is None:
+        return _stats([], [], PREDICT_MAX_WAIT_MS, PREDICT_MAX_BATCH)
+    return batcher.stats()
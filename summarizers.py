@@ -0,0 +1,81 @@
+import math
+import re
+from collections import Counter
+from typing import List
+
+# 추출 요약 설정
+LEAD_SENTENCES = 3
+TEXTRANK_SENTENCES = 3
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+
+# 문장 경계: 마침표/물음표/느낌표 뒤 공백, 또는 "다." 종결
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|(?<=다\.)")
+_TOKEN = re.compile(r"[0-9A-Za-z가-힣]+")
+
+
+# ✅ 문장 분리
+def split_sentences(text: str) -> List[str]:
+    """본문을 문장 단위로 나눕니다."""
+    if not text:
+        return []
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+# ✅ 앞 k문장 요약
+def lead_summary(body: str, k: int = LEAD_SENTENCES) -> str:
+    """본문의 앞 k문장을 요약으로 사용합니다."""
+    sentences = split_sentences(body)
+    return " ".join(sentences[:k]) if sentences else (body or "")[:1000]
+
+
+def _tfidf_vectors(sentences: List[str]) -> List[dict]:
+    tokenized = [_TOKEN.findall(s) for s in sentences]
+    df = Counter(token for tokens in tokenized for token in set(tokens))
+    n = len(sentences)
+    vectors = []
+    for tokens in tokenized:
+        tf = Counter(tokens)
+        vec = {t: c * (math.log((1 + n) / (1 + df[t])) + 1) for t, c in tf.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({t: v / norm for t, v in vec.items()})
+    return vectors
+
+
+def _cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(t, 0.0) for t, v in a.items())
+
+
+# ✅ TextRank 추출 요약 (TF-IDF 문장 유사도 기반)
+def textrank_summary(body: str, k: int = TEXTRANK_SENTENCES) -> str:
+    """문장 간 TF-IDF 유사도 그래프에서 중심성이 높은 k문장을 원래 순서대로 골라 요약합니다."""
+    sentences = split_sentences(body)
+    if len(sentences) <= k:
+        return " ".join(sentences) if sentences else (body or "")[:1000]
+
+    vectors = _tfidf_vectors(sentences)
+    n = len(sentences)
+    weights = [[_cosine(vectors[i], vectors[j]) if i != j else 0.0 for j in range(n)] for i in range(n)]
+    out_sums = [sum(row) or 1.0 for row in weights]
+
+    scores = [1.0 / n] * n
+    for _ in range(TEXTRANK_ITERATIONS):
+        scores = [
+            (1 - TEXTRANK_DAMPING) / n
+            + TEXTRANK_DAMPING * sum(weights[j][i] / out_sums[j] * scores[j] for j in range(n))
+            for i in range(n)
+        ]
+
+    top = sorted(sorted(range(n), key=lambda i: scores[i], reverse=True)[:k])
+    return " ".join(sentences[i] for i in top)
+
+
+# 여러 본문 일괄 처리 (model_utils 요약 전략 인터페이스: 본문 리스트 → 요약 리스트)
+def lead_summaries(bodies: List[str]) -> List[str]:
+    return [lead_summary(body) if body and body.strip() else "" for body in bodies]
+
+
+def textrank_summaries(bodies: List[str]) -> List[str]:
+    return [textrank_summary(body) if body and body.strip() else "" for body in bodies]
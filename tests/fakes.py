@@ -0,0 +1,135 @@
+"""테스트용 MongoDB 대역 (테스트에서 쓰는 연산자만 지원)"""
+from datetime import datetime, timezone
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$and":
+            if not all(_matches(doc, q) for q in cond):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            for op, arg in cond.items():
+                if op == "$in":
+                    values = value if isinstance(value, list) else [value]
+                    if not any(v in arg for v in values):
+                        return False
+                elif op == "$exists":
+                    if (key in doc) != arg:
+                        return False
+                elif op == "$ne":
+                    if value == arg:
+                        return False
+                elif value is None:
+                    return False
+                elif op == "$gt" and not value > arg:
+                    return False
+                elif op == "$gte" and not value >= arg:
+                    return False
+                elif op == "$lt" and not value < arg:
+                    return False
+                elif op == "$lte" and not value <= arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return dict(doc)
+    included = {k for k, v in projection.items() if v}
+    if included:
+        return {k: v for k, v in doc.items() if k in included or (k == "_id" and projection.get("_id", 1))}
+    return {k: v for k, v in doc.items() if k not in projection}
+
+
+def _apply(doc, update):
+    for key, value in update.get("$set", {}).items():
+        doc[key] = value
+    for key, value in update.get("$inc", {}).items():
+        target = doc
+        *parents, leaf = key.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = target.get(leaf, 0) + value
+    for key in update.get("$currentDate", {}):
+        doc[key] = datetime.now(timezone.utc)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def sort(self, keys, direction=1):
+        if isinstance(keys, str):
+            keys = [(keys, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: (d.get(field) is not None, d.get(field)), reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self.docs = self.docs[:n]
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class FakeCollection:
+    def __init__(self, name, docs=()):
+        self.name = name
+        self.docs = [dict(d) for d in docs]
+        self.queries = []
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query or {})
+        return FakeCursor(_project(d, projection) for d in self.docs if _matches(d, query or {}))
+
+    def delete_many(self, query):
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+
+    def bulk_write(self, operations, ordered=True):
+        # UpdateOne 대신 (filter, update, upsert) 튜플을 받음 (테스트에서 UpdateOne을 바꿔 끼움)
+        for flt, update, upsert in operations:
+            doc = next((d for d in self.docs if _matches(d, flt)), None)
+            if doc is None:
+                if not upsert:
+                    continue
+                doc = dict(flt)
+                self.docs.append(doc)
+            _apply(doc, update)
+
+    def find_one_and_update(self, query, update, projection=None):
+        # 수정 전 문서를 반환 (pymongo 기본값과 같음)
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            return None
+        previous = _project(doc, projection)
+        _apply(doc, update)
+        return previous
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection(name)
+        return self[name]
+
+    def list_collection_names(self):
+        return list(self)
+
+
+def fake_update_one(flt, update, upsert=False):
+    return flt, update, upsert
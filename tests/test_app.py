@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("pymongo")
+
+import app as dashboard  # noqa: E402
+
+
+def _row(day, media, count, **values):
+    return dict({"day": day, "media": media, "count": count, "prob_sum": 0.0, "high_risk_count": 0,
+                 "risk_buckets": {"unscored": count}}, **values)
+
+
+@pytest.fixture
+def days(monkeypatch):
+    rows = [
+        _row("2025-06-08", "A", 2),
+        # 롤업 도입 전에 저장된 기사를 재채점하면 기사 수 0인 행만 생김
+        _row("2025-06-09", "A", 0, prob_sum=0.9, high_risk_count=1, risk_buckets={"unscored": -1, "high": 1}),
+    ]
+    live_calls = []
+
+    def live(day):
+        live_calls.append(day)
+        return [_row(day, "A", 3)]
+
+    monkeypatch.setattr(dashboard, "read_rollup", lambda start=None, end=None: [dict(r) for r in rows])
+    monkeypatch.setattr(dashboard, "get_collection_names_in_range",
+                        lambda start=None, end=None: ["2025.06.10", "2025.06.09", "2025.06.08"])
+    monkeypatch.setattr(dashboard, "count_news_by_collection",
+                        lambda names: {"2025.06.10": 3, "2025.06.09": 3, "2025.06.08": 2})
+    monkeypatch.setattr(dashboard, "get_live_rollup_rows", live)
+    return live_calls
+
+
+def test_rollup_rows_replace_days_whose_count_does_not_match(days):
+    rows = dashboard.get_rollup_rows()
+    assert days == ["2025-06-09", "2025-06-10"]
+    assert sorted((row["day"], row["count"]) for row in rows) == [
+        ("2025-06-08", 2), ("2025-06-09", 3), ("2025-06-10", 3)
+    ]
+
+
+def test_trend_fills_days_missing_from_rollup(days):
+    response = dashboard.app.test_client().get("/trend")
+    trend = response.get_json()["trend"]
+    assert [(day["day"], day["total_articles"]) for day in trend] == [
+        ("2025-06-08", 2), ("2025-06-09", 3), ("2025-06-10", 3)
+    ]
+    assert all(count >= 0 for day in trend for count in day["risk_buckets"].values())
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pymongo")
+
+from bson import ObjectId  # noqa: E402
+
+import article_store  # noqa: E402
+import db_utils  # noqa: E402
+import rollup_utils  # noqa: E402
+from fakes import FakeCollection, FakeDB, fake_update_one  # noqa: E402
+from rollup_utils import (  # noqa: E402
+    calculate_engagement_score, calculate_controversial_ratio, summarize_rollup, record_articles, read_rollup
+)
+
+OLD = datetime.now(timezone.utc) - timedelta(days=1)
+
+
+def _article(i, media, prob, likes, comments, cluster=None, hour=0):
+    return {"_id": ObjectId.from_datetime(OLD + timedelta(seconds=i)), "title": f"기사 {i}", "URL": f"u{i}",
+            "date": f"2025-06-09 {hour:02d}:00:00", "media": media, "mismatch_probability": prob,
+            "like_count": likes, "comment_count": comments, "duplicate_cluster": cluster}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    fake["2025.06.08"].docs = [
+        _article(0, "A", 0.9, 10, 30, hour=9),
+        _article(1, "A", None, 0, 5, hour=10),
+    ]
+    fake["2025.06.09"].docs = [
+        _article(2, "A", 0.2, 40, 10, cluster="c1", hour=8),
+        _article(3, None, 0.7, 3, 0, cluster="c1", hour=12),
+        _article(4, "B", 0.5, 100, 80, hour=11),
+        _article(5, "A", 0.35, 0, 0, cluster="c2", hour=7),
+    ]
+    monkeypatch.setattr(db_utils, "get_db", lambda: fake)
+    monkeypatch.setattr(article_store, "get_collection_names_in_range",
+                        lambda start=None, end=None: sorted(fake, reverse=True))
+    return fake
+
+
+@pytest.fixture
+def store(db):
+    store = article_store.ArticleStore(refresh_seconds=0)
+    store.refresh(force=True)
+    return store
+
+
+def _all_docs(db):
+    return [doc for name in sorted(db) for doc in db[name].docs]
+
+
+def test_stats_match_rollup_summary(store, db, monkeypatch):
+    # 같은 기사로 만든 롤업 요약과 일치해야 함
+    rollup = FakeCollection(rollup_utils.ROLLUP_COLLECTION)
+    monkeypatch.setattr(rollup_utils, "get_meta_collection", lambda name: rollup)
+    monkeypatch.setattr(rollup_utils, "UpdateOne", fake_update_one)
+    for name in db:
+        record_articles(name, db[name].docs)
+
+    stats = store.stats()
+    risk_buckets = stats.pop("risk_buckets")
+    expected = summarize_rollup(read_rollup())
+    assert stats.pop("avg_mismatch") == pytest.approx(expected.pop("avg_mismatch"))
+    assert stats.pop("avg_engagement") == pytest.approx(expected.pop("avg_engagement"))
+    assert stats == expected
+    # 0.35는 대시보드 기준(< 0.4)으로 저위험
+    assert risk_buckets == {"low": 2, "medium": 1, "high": 2, "unscored": 1}
+
+
+def test_stats_date_range(store, db):
+    stats = store.stats(start="2025-06-09", end="2025-06-09")
+    docs = db["2025.06.09"].docs
+    assert stats["total_articles"] == len(docs)
+    assert stats["total_likes"] == sum(d["like_count"] for d in docs)
+    assert stats["high_mismatch_count"] == 1
+    assert store.stats(start="2025-06-10")["total_articles"] == 0
+
+
+def test_page_rows_match_python_formulas(store, db):
+    by_url = {d["URL"]: d for d in _all_docs(db)}
+    for item in store.page("risk", limit=10):
+        doc = by_url[item["url"]]
+        assert item["engagement_score"] == pytest.approx(
+            calculate_engagement_score(doc["like_count"], doc["comment_count"]))
+        assert item["controversial_ratio"] == pytest.approx(
+            calculate_controversial_ratio(doc["like_count"], doc["comment_count"]))
+        assert item["mismatch_prob"] == pytest.approx(doc["mismatch_probability"] or 0)
+        assert item["media"] == (doc["media"] or article_store.UNKNOWN_MEDIA)
+
+
+def test_page_sort_orders_and_offsets(store):
+    def urls(sort_order, **kwargs):
+        return [item["url"] for item in store.page(sort_order, **kwargs)]
+
+    assert urls("risk") == ["u0", "u3", "u4", "u5", "u2", "u1"]
+    # 동점이 없으므로 위험순의 역순
+    assert urls("safe") == ["u1", "u2", "u5", "u4", "u3", "u0"]
+    assert urls("latest") == ["u3", "u4", "u1", "u0", "u2", "u5"]
+    assert urls("engagement") == ["u4", "u0", "u2", "u1", "u3", "u5"]
+    assert urls("risk", offset=2, limit=2) == ["u4", "u5"]
+    assert urls("risk", start="2025-06-09") == ["u3", "u4", "u5", "u2"]
+
+
+def test_page_duplicate_count_within_range(store):
+    counts = {item["url"]: (item["duplicate_cluster"], item["duplicate_count"]) for item in store.page("risk")}
+    assert counts["u2"] == ("c1", 2)
+    assert counts["u3"] == ("c1", 2)
+    assert counts["u5"] == ("c2", 1)
+    assert counts["u0"] == (None, 1)
+
+
+def test_incremental_refresh_picks_up_new_and_updated(store, db):
+    now = datetime.now(timezone.utc)
+    db["2025.06.09"].docs.append(dict(_article(6, "B", 0.95, 1, 1, hour=13), _id=ObjectId.from_datetime(now)))
+    db["2025.06.08"].docs[1].update(mismatch_probability=0.99, updated_at=now)
+
+    assert store.refresh(force=True) == 2
+    assert len(store) == 7
+    assert [item["url"] for item in store.page("risk")][:3] == ["u1", "u6", "u0"]
+    # 두 번째 갱신부터는 _id/updated_at 조건으로 바뀐 문서만 조회
+    assert "$or" in db["2025.06.09"].queries[-1]
+
+
+def test_full_refresh_evicts_deleted_articles(store, db):
+    del db["2025.06.08"]
+    db["2025.06.09"].docs.pop(1)
+
+    store.refresh(force=True)
+    assert len(store) == 6
+    # 증분 갱신으로는 삭제를 알 수 없고, 전체 갱신에서 제거
+    assert store.refresh(force=True, full=True) == 3
+    assert len(store) == 3
+    assert [item["url"] for item in store.page("risk")] == ["u4", "u5", "u2"]
+    assert store.stats()["total_articles"] == 3
+    # 남은 행도 계속 갱신됨
+    db["2025.06.09"].docs[0].update(mismatch_probability=0.99, updated_at=datetime.now(timezone.utc))
+    store.refresh(force=True)
+    assert [item["url"] for item in store.page("risk")] == ["u2", "u4", "u5"]
+    assert len(store) == 3
+
+
+def test_order_cache_is_bounded(store, monkeypatch):
+    monkeypatch.setattr(article_store, "ORDER_CACHE_SIZE", 2)
+    for sort_order in ("risk", "safe", "latest", "engagement"):
+        store.page(sort_order)
+    assert [key[0] for key in store._orders] == ["latest", "engagement"]
+    store.page("latest")
+    store.page("risk")
+    assert [key[0] for key in store._orders] == ["latest", "risk"]
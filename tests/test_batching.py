@@ -0,0 +1,48 @@
+import random
+
+from batching import PaddingStats, plan_token_batches
+
+
+def test_plan_token_batches_covers_every_index_once():
+    lengths = [random.Random(0).randint(1, 300) for _ in range(200)]
+    batches = plan_token_batches(lengths, max_batch_tokens=1024, max_batch_size=16)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+
+def test_plan_token_batches_respects_token_budget_and_batch_size():
+    lengths = [random.Random(1).randint(1, 300) for _ in range(200)]
+    for batch in plan_token_batches(lengths, max_batch_tokens=1024, max_batch_size=16):
+        assert len(batch) <= 16
+        # 한 시퀀스가 예산보다 긴 경우에만 단독 배치로 예산을 넘을 수 있음
+        assert max(lengths[i] for i in batch) * len(batch) <= 1024 or len(batch) == 1
+
+
+def test_plan_token_batches_groups_similar_lengths():
+    lengths = [500, 10, 490, 12, 11, 505]
+    batches = plan_token_batches(lengths, max_batch_tokens=1100, max_batch_size=8)
+    assert batches == [[1, 4, 3], [2, 0], [5]]
+
+
+def test_plan_token_batches_empty():
+    assert plan_token_batches([], max_batch_tokens=100) == []
+
+
+def test_padding_stats_record():
+    stats = PaddingStats()
+    stats.record([2, 4])
+    assert stats.as_dict() == {
+        "batches": 1, "sequences": 2, "real_tokens": 6, "padded_tokens": 8, "padding_efficiency": 0.75
+    }
+    stats.record([])
+    assert stats.batches == 1
+    stats.reset()
+    assert stats.efficiency == 1.0
+
+
+def test_padding_stats_merge():
+    stats = PaddingStats()
+    stats.record([2, 4])
+    other = PaddingStats()
+    other.record([3, 3, 3])
+    stats.merge(other.as_dict())
+    assert (stats.batches, stats.sequences, stats.real_tokens, stats.padded_tokens) == (2, 5, 15, 17)
@@ -0,0 +1,53 @@
+import threading
+
+import cache_utils
+
+
+def _last_access(cache, key):
+    return cache._conn.execute("SELECT last_access FROM results WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_get_touches_recency_at_most_once_per_interval(tmp_path, monkeypatch):
+    cache = cache_utils.ResultCache(str(tmp_path / "cache.sqlite3"))
+    clock = [1000.0]
+    monkeypatch.setattr(cache_utils.time, "time", lambda: clock[0])
+    cache.set("summary", "k", "요약")
+
+    clock[0] += cache_utils.CACHE_TOUCH_SECONDS / 2
+    assert cache.get("summary", "k") == "요약"
+    assert _last_access(cache, "k") == 1000.0
+
+    clock[0] += cache_utils.CACHE_TOUCH_SECONDS
+    assert cache.get("summary", "k") == "요약"
+    assert _last_access(cache, "k") == clock[0]
+    assert cache.get("summary", "missing") is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_get_cache_creates_one_instance_across_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "_cache", None)
+    monkeypatch.setattr(cache_utils, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cache_utils, "CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    created = []
+    original = cache_utils.ResultCache
+
+    class CountingCache(original):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            super().__init__(cache_utils.CACHE_PATH)
+
+    monkeypatch.setattr(cache_utils, "ResultCache", CountingCache)
+    start = threading.Barrier(8)
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(cache_utils.get_cache())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(cache is created[0] for cache in results)
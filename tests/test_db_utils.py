@@ -0,0 +1,106 @@
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo import ASCENDING, DESCENDING  # noqa: E402
+
+import db_utils  # noqa: E402
+from fakes import FakeDB  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(db_utils, "get_db", lambda: fake)
+    return fake
+
+
+def _fill(db):
+    db["2025.06.08"].docs = [{"_id": f"8-{i}", "date": f"2025-06-08 1{i}:00:00", "n": i} for i in range(5)]
+    db["2025.06.09"].docs = [{"_id": f"9-{i}", "date": f"2025-06-09 1{i}:00:00", "n": i} for i in range(5)]
+    db["2025.06.10"].docs = [{"_id": "10-0"}]  # date 없는 문서
+    db["users"].docs = [{"_id": "not-news"}]
+
+
+def test_collection_names_in_range_skips_non_date_names(db):
+    _fill(db)
+    assert db_utils.get_collection_names_in_range() == ["2025.06.10", "2025.06.09", "2025.06.08"]
+    assert db_utils.get_collection_names_in_range("2025-06-09", "2025-06-09") == ["2025.06.09"]
+    with pytest.raises(ValueError):
+        db_utils.get_collection_names_in_range("06/09/2025")
+
+
+def test_query_news_merges_sorted_partials_with_global_limit(db):
+    _fill(db)
+    results = db_utils.query_news(sort=[("date", DESCENDING)], limit=4)
+    assert [doc["_id"] for doc in results] == ["9-4", "9-3", "9-2", "9-1"]
+    # 날짜 컬렉션마다 한 번씩만 조회
+    assert [len(db[name].queries) for name in ("2025.06.08", "2025.06.09", "2025.06.10", "users")] == [1, 1, 1, 0]
+
+
+def test_query_news_descending_puts_missing_values_last(db):
+    _fill(db)
+    results = db_utils.query_news(sort=[("date", DESCENDING)])
+    assert len(results) == 11
+    assert results[-1]["_id"] == "10-0"
+    dates = [doc["date"] for doc in results[:-1]]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_query_news_ascending_with_date_range(db):
+    _fill(db)
+    results = db_utils.query_news({"n": {"$gte": 3}}, sort=[("date", ASCENDING)],
+                                  start="2025-06-08", end="2025.06.09")
+    assert [doc["_id"] for doc in results] == ["8-3", "8-4", "9-3", "9-4"]
+
+
+def test_query_news_without_sort_concatenates_newest_first(db):
+    _fill(db)
+    results = db_utils.query_news(limit=3, start="2025-06-08", end="2025-06-09")
+    assert [doc["_id"] for doc in results] == ["9-0", "9-1", "9-2"]
+
+
+def test_query_news_rejects_mixed_directions(db):
+    _fill(db)
+    with pytest.raises(ValueError):
+        db_utils.query_news(sort=[("date", DESCENDING), ("_id", ASCENDING)])
+
+
+def test_iter_news_without_probability_pages_by_id(db):
+    db["2025.06.09"].docs = [{"_id": i, "title": f"t{i}", "body": "b"} for i in range(7)]
+    db["2025.06.09"].docs[2]["mismatch_probability"] = 0.5
+    news = list(db_utils.iter_news_without_probability(batch_size=2, collection_name="2025.06.09"))
+    assert [doc["_id"] for doc in news] == [0, 1, 3, 4, 5, 6]
+    # 페이지마다 마지막 _id 다음부터 새로 조회 (마지막 빈 페이지 포함)
+    assert len(db["2025.06.09"].queries) == 4
+    assert db["2025.06.09"].queries[1]["_id"] == {"$gt": 1}
+    limited = list(db_utils.iter_news_without_probability(limit=3, batch_size=2, collection_name="2025.06.09"))
+    assert [doc["_id"] for doc in limited] == [0, 1, 3]
+
+
+def test_batch_update_probabilities_takes_rollup_deltas_from_previous_values(db, monkeypatch):
+    db["2025.06.09"].docs = [{"_id": 1, "media": "A"}, {"_id": 2, "media": "B", "mismatch_probability": 0.9}]
+    changes = []
+    monkeypatch.setattr(db_utils, "_update_rollup", lambda name, batch: changes.extend(batch))
+
+    # 다른 작업이 먼저 채점한 문서는 그 값에서의 변화만 반영
+    assert db_utils.batch_update_probabilities([(1, 0.8), (2, 0.1), (3, 0.5)], "v1",
+                                               collection_name="2025.06.09") == 2
+    assert db_utils.batch_update_probabilities([(1, 0.2)], "v1", collection_name="2025.06.09") == 1
+    assert changes == [("A", None, 0.8), ("B", 0.9, 0.1), ("A", 0.8, 0.2)]
+    assert [doc["mismatch_probability"] for doc in db["2025.06.09"].docs] == [0.2, 0.1]
+    assert all("updated_at" in doc for doc in db["2025.06.09"].docs)
+
+
+def test_iter_stale_news_pages_past_documents_without_date(db):
+    db["2025.06.09"].docs = [
+        {"_id": 1, "date": "2025-06-09 10:00:00"},
+        {"_id": 2, "date": "2025-06-09 10:00:00"},
+        {"_id": 3, "date": "2025-06-09 11:00:00", "model_version": "v2"},
+        {"_id": 4},
+        {"_id": 5, "date": None},
+        {"_id": 6, "date": "2025-06-09 09:00:00"},
+    ]
+    news = list(db_utils.iter_stale_news("v2", collection_name="2025.06.09", page_size=2))
+    # date가 없는 문서는 내림차순의 맨 뒤에서 _id 내림차순으로
+    assert [doc["_id"] for doc in news] == [2, 1, 6, 5, 4]
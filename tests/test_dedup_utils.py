@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip("pymongo")
+
+import dedup_utils  # noqa: E402
+from fakes import FakeCollection  # noqa: E402
+
+BODY = " ".join(f"국회는 {i}번째 안건을 논의하고 여야가 합의한 법안을 본회의에서 처리했다." for i in range(20))
+
+
+@pytest.fixture
+def index(monkeypatch):
+    collection = FakeCollection(dedup_utils.DEDUP_COLLECTION)
+    monkeypatch.setattr(dedup_utils, "get_meta_collection", lambda name: collection)
+    monkeypatch.setattr(dedup_utils, "DEDUP_ENABLED", True)
+    return collection
+
+
+def _entry(news_id, title, body, probability=None, model_version=None):
+    signature = dedup_utils.minhash(body)
+    return {"_id": news_id, "title": title, "signature": signature, "bands": dedup_utils.lsh_bands(signature),
+            "cluster": news_id, "probability": probability, "model_version": model_version}
+
+
+# ✅ MinHash / LSH
+def test_shingles():
+    assert dedup_utils.shingles("가 나 다") == {"가나다"}
+    assert dedup_utils.shingles("abcdef", size=5) == {"abcde", "bcdef"}
+    assert dedup_utils.shingles("") == set()
+
+
+def test_minhash_is_deterministic_and_sized():
+    signature = dedup_utils.minhash(BODY)
+    assert signature == dedup_utils.minhash(BODY)
+    assert len(signature) == dedup_utils.NUM_PERM
+    assert len(dedup_utils.lsh_bands(signature)) == dedup_utils.BANDS
+    assert dedup_utils.minhash("") == []
+
+
+def test_similarity_separates_near_and_unrelated_bodies():
+    signature = dedup_utils.minhash(BODY)
+    near = dedup_utils.minhash(BODY.replace("19번째", "열아홉번째"))
+    unrelated = dedup_utils.minhash("전혀 다른 경제 기사 본문입니다. " * 20)
+    assert dedup_utils.estimate_similarity(signature, signature) == 1.0
+    assert dedup_utils.estimate_similarity(signature, near) >= dedup_utils.DUPLICATE_THRESHOLD
+    assert dedup_utils.estimate_similarity(signature, unrelated) < 0.2
+    assert dedup_utils.estimate_similarity(signature, []) == 0.0
+
+
+# ✅ 결과 재사용 후보 선택
+def test_resolve_duplicate_skips_better_matches_that_are_not_eligible(index):
+    near_body = BODY.replace("19번째", "열아홉번째")
+    index.docs = [
+        _entry("other-title", "다른 제목", BODY, probability=0.9, model_version="v1"),
+        _entry("unscored", "같은 제목", BODY),
+        _entry("old-version", "같은 제목", BODY, probability=0.1, model_version="v0"),
+        _entry("eligible", "같은 제목", near_body, probability=0.4, model_version="v1"),
+    ]
+    result = dedup_utils.resolve_duplicate(" 같은 제목 ", BODY, model_version="v1")
+    assert result["source_id"] == "eligible"
+    assert result["probability"] == 0.4
+    assert result["model_version"] == "v1"
+
+    # 버전을 지정하지 않으면 채점된 같은 제목 후보 중 가장 비슷한 것
+    assert dedup_utils.resolve_duplicate("같은 제목", BODY)["source_id"] == "old-version"
+
+
+def test_resolve_duplicate_none_without_eligible_candidate(index):
+    index.docs = [_entry("other-title", "다른 제목", BODY, probability=0.9, model_version="v1")]
+    assert dedup_utils.resolve_duplicate("같은 제목", BODY, "v1") is None
+
+
+def test_find_near_duplicate_unfiltered_for_clustering(index):
+    index.docs = [_entry("a", "다른 제목", BODY), _entry("b", "같은 제목", "전혀 다른 기사 본문 " * 30)]
+    match = dedup_utils.find_near_duplicate(BODY)
+    assert match["_id"] == "a"
+    assert dedup_utils.find_near_duplicate(BODY, exclude_id="a") is None
+
+
+def test_find_near_duplicate_filters_before_candidate_limit(index, monkeypatch):
+    monkeypatch.setattr(dedup_utils, "MAX_CANDIDATES", 2)
+    index.docs = [_entry(f"other-{i}", "다른 제목", BODY, probability=0.9, model_version="v1") for i in range(3)]
+    index.docs.append(_entry("eligible", "같은 제목", BODY, probability=0.4, model_version="v1"))
+    match = dedup_utils.find_near_duplicate(BODY, title="같은 제목", scored=True, model_version="v1")
+    assert match["_id"] == "eligible"
+    assert index.queries[-1]["title"] == "같은 제목"
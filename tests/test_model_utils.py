@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("pymongo")
+
+import model_utils  # noqa: E402
+from batching import padding_stats  # noqa: E402
+
+
+class FakeTokenizer:
+    """입력 ID 목록을 0으로 오른쪽 패딩하는 토크나이저 대역"""
+    pad_token_id = 0
+
+    def __call__(self, titles, bodies, truncation=True, max_length=512):
+        # 제목 글자 수만큼의 토큰 (본문은 무시)
+        return {"input_ids": [[5] * len(title) for title in titles]}
+
+    def pad(self, features, return_tensors="pt"):
+        longest = max(len(ids) for ids in features["input_ids"])
+        padded = {}
+        for key, rows in features.items():
+            padded[key] = torch.tensor([list(row) + [0] * (longest - len(row)) for row in rows])
+        if "attention_mask" not in padded:
+            padded["attention_mask"] = torch.tensor(
+                [[1] * len(row) + [0] * (longest - len(row)) for row in features["input_ids"]]
+            )
+        return padded
+
+    def batch_decode(self, ids, skip_special_tokens=True):
+        return [str(int((row != 0).sum())) for row in ids]
+
+
+class LengthClassifier:
+    """패딩을 뺀 실제 길이에 비례하는 불일치 로짓을 돌려주는 분류기 대역"""
+    scale = 0.1
+
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        lengths = attention_mask.sum(dim=1).float() * self.scale
+        return SimpleNamespace(logits=torch.stack([torch.zeros_like(lengths), lengths], dim=1))
+
+
+class EchoSummarizer:
+    """입력 ID를 그대로 돌려주는 요약 모델 대역"""
+
+    def generate(self, input_ids, attention_mask=None, **kwargs):
+        return input_ids * attention_mask
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    tokenizer = FakeTokenizer()
+    monkeypatch.setitem(model_utils._registry, "classifier", (tokenizer, LengthClassifier()))
+    monkeypatch.setitem(model_utils._registry, "summarizer", (tokenizer, EchoSummarizer()))
+    yield
+    for stats in padding_stats.values():
+        stats.reset()
+
+
+# ✅ 슬라이딩 윈도우
+def test_sliding_window_ids_short_input_is_single_window():
+    assert model_utils.sliding_window_ids([1, 2, 3], window=5, step=2) == [[1, 2, 3]]
+    assert model_utils.sliding_window_ids([], window=5, step=2) == []
+
+
+def test_sliding_window_ids_overlap_and_tail():
+    ids = list(range(10))
+    windows = model_utils.sliding_window_ids(ids, window=4, step=3)
+    assert windows == [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]]
+
+
+def test_sliding_window_ids_covers_every_token():
+    ids = list(range(1000))
+    windows = model_utils.sliding_window_ids(ids, window=512, step=256)
+    assert all(len(window) <= 512 for window in windows)
+    assert sorted({i for window in windows for i in window}) == ids
+    assert windows[-1][-1] == 999
+
+
+def test_sliding_window_words():
+    text = " ".join(str(i) for i in range(7))
+    assert model_utils.sliding_window(text, window=4, step=2) == ["0 1 2 3", "2 3 4 5", "4 5 6"]
+    assert model_utils.sliding_window("   ") == []
+
+
+# ✅ 길이별 배치 후 원래 순서 복원
+def test_predict_mismatch_batch_restores_input_order(fake_models):
+    lengths = [7, 1, 30, 3, 12, 30, 2]
+    pairs = [("제" * n, "본문") for n in lengths]
+    probabilities = model_utils.predict_mismatch_batch(pairs, batch_size=2, max_batch_tokens=40)
+    expected = torch.sigmoid(torch.tensor(lengths) * LengthClassifier.scale).tolist()
+    assert probabilities == pytest.approx(expected)
+    assert padding_stats["classifier"].sequences == len(lengths)
+    assert padding_stats["classifier"].batches > 1
+
+
+def test_summarize_windows_restores_input_order(fake_models):
+    windows = [[3] * n for n in (9, 2, 15, 4, 1)]
+    summaries = model_utils._summarize_windows(windows, batch_size=2, max_batch_tokens=20)
+    assert summaries == ["9", "2", "15", "4", "1"]
+
+
+# ✅ 확률 캐시 키
+def test_probability_cache_id_separates_unavailable_summarizer(monkeypatch):
+    monkeypatch.setattr(model_utils, "SUMMARIZER", "kobart")
+    monkeypatch.setitem(model_utils._registry, "summarizer", (FakeTokenizer(), EchoSummarizer()))
+    available = model_utils._probability_cache_id()
+    monkeypatch.setitem(model_utils._registry, "summarizer", (None, None))
+    unavailable = model_utils._probability_cache_id()
+    assert available != unavailable
+    assert "unavailable" in unavailable
+
+    monkeypatch.setattr(model_utils, "SUMMARY_WINDOW_STRIDE", model_utils.SUMMARY_WINDOW_STRIDE // 2)
+    monkeypatch.delitem(model_utils._registry, "summarizer")
+    assert model_utils._probability_cache_id() != available
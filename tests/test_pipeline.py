@@ -0,0 +1,41 @@
+import queue
+import threading
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("pymongo")
+
+import pipeline  # noqa: E402
+
+
+def test_run_stage_counts_failed_chunks():
+    inbox, outbox = queue.Queue(), queue.Queue()
+    result = {"failed": 0, "lock": threading.Lock()}
+
+    def stage(item):
+        if item[0] == "bad":
+            raise RuntimeError("boom")
+        return item
+
+    for item in [("ok", [1, 2]), ("bad", [3, 4, 5]), pipeline._DONE]:
+        inbox.put(item)
+    pipeline._run_stage("테스트", stage, inbox, outbox, result)
+    assert outbox.get() == ("ok", [1, 2])
+    assert outbox.get() is pipeline._DONE
+    assert result["failed"] == 3
+
+
+def test_non_full_mode_skips_summaries_and_scores_with_mode(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pipeline, "lookup_probabilities", lambda pairs: pytest.fail("full 모드 전용 캐시 조회"))
+    monkeypatch.setattr(pipeline, "score_with_mode",
+                        lambda pairs, mode: calls.append((pairs, mode)) or [0.1 * len(pairs)] * len(pairs))
+    monkeypatch.setattr(pipeline, "index_scored_articles", lambda *args: None)
+
+    chunk = [(1, "제목1", "본문1"), (2, "제목2", "본문2")]
+    job = pipeline._summarize(pipeline._tokenize(("2025.06.09", chunk), mode="windows"))
+    written = pipeline._classify(job, "v1", mode="windows")
+    assert calls == [([("제목1", "본문1"), ("제목2", "본문2")], "windows")]
+    assert [(news_id, prob) for news_id, prob, _ in written] == [(1, 0.2), (2, 0.2)]
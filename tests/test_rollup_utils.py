@@ -0,0 +1,121 @@
+import copy
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+import rollup_utils  # noqa: E402
+from fakes import FakeCollection, FakeDB, fake_update_one  # noqa: E402
+
+ARTICLES = [
+    {"_id": 1, "media": "A", "like_count": 10, "comment_count": 30, "mismatch_probability": 0.9},
+    {"_id": 2, "media": "A", "like_count": 0, "comment_count": 5},
+    {"_id": 3, "media": "A", "like_count": 40, "comment_count": 10, "mismatch_probability": 0.2},
+    {"_id": 4, "media": None, "like_count": 3, "comment_count": 0, "mismatch_probability": 0.7},
+    {"_id": 5, "media": "B", "like_count": 100, "comment_count": 80, "mismatch_probability": 0.5},
+]
+
+
+@pytest.fixture
+def rollup(monkeypatch):
+    collection = FakeCollection(rollup_utils.ROLLUP_COLLECTION)
+    monkeypatch.setattr(rollup_utils, "get_meta_collection", lambda name: collection)
+    monkeypatch.setattr(rollup_utils, "UpdateOne", fake_update_one)
+    return collection
+
+
+def _expected(articles):
+    """대시보드 통계를 기사 목록에서 직접 계산 (확률이 없으면 0)"""
+    probs = [a.get("mismatch_probability") or 0 for a in articles]
+    engagement = [rollup_utils.calculate_engagement_score(a["like_count"], a["comment_count"]) for a in articles]
+    controversial = [rollup_utils.calculate_controversial_ratio(a["like_count"], a["comment_count"])
+                     for a in articles]
+    return {
+        "total_articles": len(articles),
+        "high_mismatch_count": sum(p >= rollup_utils.HIGH_RISK_THRESHOLD for p in probs),
+        "avg_mismatch": pytest.approx(sum(probs) / len(articles)),
+        "total_likes": sum(a["like_count"] for a in articles),
+        "total_comments": sum(a["comment_count"] for a in articles),
+        "avg_engagement": pytest.approx(sum(engagement) / len(articles)),
+        "high_engagement_count": sum(e >= rollup_utils.HIGH_ENGAGEMENT_THRESHOLD for e in engagement),
+        "controversial_count": sum(c >= rollup_utils.CONTROVERSIAL_THRESHOLD for c in controversial),
+    }
+
+
+def _snapshot(collection):
+    return {r["_id"]: copy.deepcopy({k: v for k, v in r.items() if k != "updated_at"}) for r in collection.docs}
+
+
+def test_collection_day():
+    assert rollup_utils.collection_day("2025.06.09") == "2025-06-09"
+    assert rollup_utils.collection_day("users") is None
+
+
+def test_buckets_follow_dashboard_tiers():
+    # 대시보드: 저위험 < 0.4 ≤ 중위험 < 0.7 ≤ 고위험, 저참여 < 10 ≤ 중참여 < 20 ≤ 고참여
+    assert [rollup_utils._bucket(p, rollup_utils.RISK_BUCKETS) for p in (0.0, 0.35, 0.4, 0.69, 0.7)] == \
+        ["low", "low", "medium", "medium", "high"]
+    assert [rollup_utils._bucket(e, rollup_utils.ENGAGEMENT_BUCKETS) for e in (0, 9.9, 10, 19.9, 20, 80)] == \
+        ["low", "low", "medium", "medium", "high", "high"]
+
+
+def test_record_articles_matches_direct_calculation(rollup):
+    rollup_utils.record_articles("2025.06.09", ARTICLES)
+    stats = rollup_utils.summarize_rollup(rollup_utils.read_rollup())
+    media_stats = stats.pop("media_stats")
+    assert stats == _expected(ARTICLES)
+    # 기사 3개 이상인 언론사만
+    assert media_stats == [{"media": "A", "total_articles": 3, "high_risk_articles": 1, "high_risk_ratio": 1 / 3}]
+
+
+def test_analyze_media_trustworthiness_matches_rollup(rollup):
+    rollup_utils.record_articles("2025.06.09", ARTICLES)
+    expected = rollup_utils.summarize_rollup(rollup_utils.read_rollup())["media_stats"]
+    assert rollup_utils.analyze_media_trustworthiness(ARTICLES) == expected
+
+
+def test_probability_change_moves_counts_between_buckets(rollup):
+    rollup_utils.record_articles("2025.06.09", ARTICLES)
+    # 미채점 → 0.8, 0.9 → 0.1
+    rollup_utils.record_probability_changes("2025.06.09", [("A", None, 0.8), ("A", 0.9, 0.1)])
+    changed = [dict(a) for a in ARTICLES]
+    changed[1]["mismatch_probability"] = 0.8
+    changed[0]["mismatch_probability"] = 0.1
+
+    stats = rollup_utils.summarize_rollup(rollup_utils.read_rollup())
+    stats.pop("media_stats")
+    assert stats == _expected(changed)
+
+    row = next(r for r in rollup.docs if r["media"] == "A")
+    assert row["risk_buckets"] == {"unscored": 0, "high": 1, "low": 2}
+    assert row["scored_count"] == 3
+
+
+def test_rebuild_matches_incremental(rollup, monkeypatch):
+    db = FakeDB()
+    db["2025.06.08"].docs = ARTICLES[:2]
+    db["2025.06.09"].docs = ARTICLES[2:]
+    monkeypatch.setattr(rollup_utils, "get_db", lambda: db)
+    monkeypatch.setattr(rollup_utils, "get_collection_names_in_range",
+                        lambda start=None, end=None: ["2025.06.09", "2025.06.08"])
+
+    rollup_utils.record_articles("2025.06.08", ARTICLES[:2])
+    rollup_utils.record_articles("2025.06.09", ARTICLES[2:])
+    incremental = _snapshot(rollup)
+
+    # 잘못된 값이 있어도 재구축하면 기사 컬렉션 기준으로 돌아감
+    rollup_utils.record_articles("2025.06.09", ARTICLES[2:])
+    assert rollup_utils.rebuild_rollup() == 2
+    assert _snapshot(rollup) == incremental
+
+
+def test_read_rollup_date_range_and_daily_trend(rollup):
+    rollup_utils.record_articles("2025.06.08", ARTICLES[:2])
+    rollup_utils.record_articles("2025.06.09", ARTICLES[2:])
+
+    assert {r["day"] for r in rollup_utils.read_rollup("2025-06-09")} == {"2025-06-09"}
+    trend = rollup_utils.daily_trend(rollup_utils.read_rollup())
+    assert [day["day"] for day in trend] == ["2025-06-08", "2025-06-09"]
+    assert trend[0]["total_articles"] == 2
+    assert trend[0]["risk_buckets"] == {"low": 0, "medium": 0, "high": 1, "unscored": 1}
+    assert trend[1]["avg_mismatch"] == pytest.approx((0.2 + 0.7 + 0.5) / 3)
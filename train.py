@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset, DataLoader, Sampler
+from transformers import BertTokenizer, BertForSequenceClassification, get_linear_schedule_with_warmup
+
+from dataset_utils import load_dataset, accuracy, f1_score, TRAIN_DATASET_PATH, VAL_DATASET_PATH
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_DIR = "./token_cache"
+
+
+# ✅ 토큰 캐시 키 (토크나이저 + 최대 길이 + 데이터 파일 내용)
+def _cache_key(tokenizer, max_length, data_path):
+    digest = hashlib.sha256()
+    digest.update(f"{tokenizer.name_or_path}|{type(tokenizer).__name__}|{len(tokenizer)}|{max_length}".encode())
+    with open(data_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+# ✅ 토큰 캐시 만들기 / 불러오기
+def build_token_cache(data_path, tokenizer, max_length=512, cache_dir=TOKEN_CACHE_DIR):
+    """
+    데이터셋을 한 번만 토크나이징해 NumPy 파일로 저장하고 메모리 매핑으로 불러옵니다.
+    토큰은 패딩 없이 이어 붙여 저장하며 offsets[i]:offsets[i+1]이 i번째 샘플입니다.
+    """
+    base = os.path.splitext(os.path.basename(data_path))[0]
+    path = os.path.join(cache_dir, f"{base}-{_cache_key(tokenizer, max_length, data_path)}")
+
+    if not os.path.exists(os.path.join(path, "offsets.npy")):
+        rows = load_dataset(data_path)
+        start = time.time()
+        encoded = tokenizer(
+            [row["title"] for row in rows],
+            [row["body"] for row in rows],
+            truncation=True,
+            max_length=max_length
+        )
+        lengths = np.array([len(ids) for ids in encoded["input_ids"]], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "input_ids.npy"),
+                np.fromiter((t for ids in encoded["input_ids"] for t in ids), dtype=np.int32, count=offsets[-1]))
+        np.save(os.path.join(path, "token_type_ids.npy"),
+                np.fromiter((t for ids in encoded["token_type_ids"] for t in ids), dtype=np.int8, count=offsets[-1]))
+        np.save(os.path.join(path, "labels.npy"), np.array([row["label"] for row in rows], dtype=np.int64))
+        # offsets는 마지막에 저장해 캐시 완성 여부 표시로 사용
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        logger.info(f"💾 토큰 캐시 생성: {path} ({len(rows)}개, {time.time() - start:.1f}초)")
+    else:
+        logger.info(f"📂 토큰 캐시 사용: {path}")
+
+    return TokenCacheDataset(path)
+
+
+class TokenCacheDataset(Dataset):
+    """메모리 매핑된 토큰 캐시에서 샘플을 꺼내는 Dataset"""
+
+    def __init__(self, path):
+        self.input_ids = np.load(os.path.join(path, "input_ids.npy"), mmap_mode="r")
+        self.token_type_ids = np.load(os.path.join(path, "token_type_ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.labels = np.load(os.path.join(path, "labels.npy"))
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return {
+            "input_ids": self.input_ids[start:end],
+            "token_type_ids": self.token_type_ids[start:end],
+            "label": int(self.labels[idx]),
+            "index": idx
+        }
+
+
+class LengthGroupedBatchSampler(Sampler):
+    """
+    무작위로 섞은 인덱스를 큰 묶음(배치 크기 × group_factor)으로 나누고, 묶음 안에서 길이순으로 정렬해 배치를 만듭니다.
+    배치 순서는 다시 섞어 학습 순서의 무작위성을 유지합니다.
+    """
+
+    def __init__(self, lengths, batch_size, group_factor=50, shuffle=True, seed=0):
+        self.lengths = lengths
+        self.batch_size = batch_size
+        self.group_size = batch_size * group_factor
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _batches(self):
+        rng = random.Random(self.seed + self.epoch)
+        indices = list(range(len(self.lengths)))
+        if self.shuffle:
+            rng.shuffle(indices)
+        batches = []
+        for start in range(0, len(indices), self.group_size):
+            group = sorted(indices[start:start + self.group_size], key=lambda i: self.lengths[i])
+            batches.extend(group[i:i + self.batch_size] for i in range(0, len(group), self.batch_size))
+        if self.shuffle:
+            rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        return iter(self._batches())
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+# ✅ 배치 내 최장 길이에 맞춘 동적 패딩
+def collate_batch(samples, pad_token_id=0):
+    max_len = max(len(s["input_ids"]) for s in samples)
+    input_ids = torch.full((len(samples), max_len), pad_token_id, dtype=torch.long)
+    token_type_ids = torch.zeros((len(samples), max_len), dtype=torch.long)
+    attention_mask = torch.zeros((len(samples), max_len), dtype=torch.long)
+    for row, sample in enumerate(samples):
+        n = len(sample["input_ids"])
+        input_ids[row, :n] = torch.from_numpy(np.asarray(sample["input_ids"], dtype=np.int64))
+        token_type_ids[row, :n] = torch.from_numpy(np.asarray(sample["token_type_ids"], dtype=np.int64))
+        attention_mask[row, :n] = 1
+    return {
+        "input_ids": input_ids,
+        "token_type_ids": token_type_ids,
+        "attention_mask": attention_mask,
+        "labels": torch.tensor([s["label"] for s in samples], dtype=torch.long),
+        "index": torch.tensor([s["index"] for s in samples], dtype=torch.long)
+    }
+
+
+def make_loader(dataset, batch_size, pad_token_id, shuffle):
+    sampler = LengthGroupedBatchSampler(dataset.lengths, batch_size, shuffle=shuffle)
+    loader = DataLoader(dataset, batch_sampler=sampler,
+                        collate_fn=lambda samples: collate_batch(samples, pad_token_id))
+    return loader, sampler
+
+
+def _model_inputs(batch, device):
+    return {k: batch[k].to(device) for k in ("input_ids", "token_type_ids", "attention_mask")}
+
+
+# ✅ 검증
+def evaluate_model(model, loader, device):
+    """검증 데이터의 불일치 확률을 원래 순서로 계산해 정확도·F1과 함께 반환합니다."""
+    model.eval()
+    probs = [0.0] * len(loader.dataset)
+    with torch.no_grad():
+        for batch in loader:
+            logits = model(**_model_inputs(batch, device)).logits
+            for idx, prob in zip(batch["index"].tolist(), F.softmax(logits, dim=1)[:, 1].tolist()):
+                probs[idx] = prob
+    labels = loader.dataset.labels.tolist()
+    return {"accuracy": accuracy(probs, labels), "f1": f1_score(probs, labels), "probs": probs}
+
+
+# ✅ 파인튜닝
+def fine_tune(model_path, output_dir, epochs=3, batch_size=16, lr=2e-5, max_length=512,
+              cache_dir=TOKEN_CACHE_DIR, train_path=TRAIN_DATASET_PATH, val_path=VAL_DATASET_PATH):
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = BertTokenizer.from_pretrained(model_path)
+    model = BertForSequenceClassification.from_pretrained(model_path, num_labels=2).to(device)
+
+    train_set = build_token_cache(train_path, tokenizer, max_length, cache_dir)
+    val_set = build_token_cache(val_path, tokenizer, max_length, cache_dir)
+    train_loader, train_sampler = make_loader(train_set, batch_size, tokenizer.pad_token_id, shuffle=True)
+    val_loader, _ = make_loader(val_set, batch_size * 2, tokenizer.pad_token_id, shuffle=False)
+
+    optimizer = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=0.01)
+    total_steps = len(train_loader) * epochs
+    scheduler = get_linear_schedule_with_warmup(optimizer, int(total_steps * 0.1), total_steps)
+
+    best = None
+    for epoch in range(epochs):
+        model.train()
+        train_sampler.set_epoch(epoch)
+        start = time.time()
+        total_loss = 0.0
+        for step, batch in enumerate(train_loader, 1):
+            outputs = model(**_model_inputs(batch, device), labels=batch["labels"].to(device))
+            outputs.loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+            total_loss += outputs.loss.item()
+            if step % 50 == 0:
+                logger.info(f"epoch {epoch + 1} step {step}/{len(train_loader)} loss {total_loss / step:.4f}")
+
+        metrics = evaluate_model(model, val_loader, device)
+        logger.info(
+            f"✅ epoch {epoch + 1}: loss {total_loss / max(1, len(train_loader)):.4f}, "
+            f"검증 정확도 {metrics['accuracy']:.4f}, F1 {metrics['f1']:.4f} ({time.time() - start:.1f}초)"
+        )
+        if best is None or metrics["accuracy"] > best["accuracy"]:
+            best = {"epoch": epoch + 1, "accuracy": metrics["accuracy"], "f1": metrics["f1"]}
+            model.save_pretrained(output_dir)
+            tokenizer.save_pretrained(output_dir)
+
+    with open(os.path.join(output_dir, "train_report.json"), "w", encoding="utf-8") as f:
+        json.dump(best, f, ensure_ascii=False, indent=2)
+    logger.info(f"📁 최고 성능 모델 저장: {output_dir} (epoch {best['epoch']})")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="토큰 캐시 기반 KoBERT 분류기 파인튜닝")
+    parser.add_argument("--model", default="./model2", help="초기 가중치 경로 또는 이름")
+    parser.add_argument("--output-dir", default="./model2-finetuned")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=2e-5)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--cache-dir", default=TOKEN_CACHE_DIR)
+    parser.add_argument("--prepare-only", action="store_true", help="토큰 캐시만 만들고 종료")
+    args = parser.parse_args()
+
+    if args.prepare_only:
+        tokenizer = BertTokenizer.from_pretrained(args.model)
+        for path in (TRAIN_DATASET_PATH, VAL_DATASET_PATH):
+            build_token_cache(path, tokenizer, args.max_length, args.cache_dir)
+        return
+
+    fine_tune(args.model, args.output_dir, args.epochs, args.batch_size, args.lr, args.max_length, args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()